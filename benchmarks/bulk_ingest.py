@@ -0,0 +1,70 @@
+"""
+Bulk transaction ingestion throughput on SQLite.
+
+Inserts N generated rows through bulk_create_transactions() and compares it
+with calling create_expense() once per row (the old import path).
+
+    python benchmarks/bulk_ingest.py [--rows 50000] [--chunk-size 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "bulk_ingest_bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+CATEGORIES = ["food", "groceries", "transport", "rent", "shopping", "bills", "entertainment"]
+PAYEES = ["swiggy", "zomato", "uber", "ola", "amazon", "bigbasket", "airtel", None]
+
+
+def generate_rows(n: int):
+    start = datetime.now(timezone.utc) - timedelta(days=30)
+    for i in range(n):
+        yield {
+            "type": "income" if i % 25 == 0 else "expense",
+            "amount": round(random.uniform(20, 5000), 2),
+            "category": random.choice(CATEGORIES),
+            "payee": random.choice(PAYEES),
+            "raw_description": f"UPI/{100000 + i}",
+            "timestamp": (start + timedelta(seconds=i * 30)).isoformat(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--single-rows", type=int, default=1000, help="rows for the one-insert-per-call baseline")
+    args = parser.parse_args()
+
+    from config.database import Base, engine
+    import models  # noqa: F401
+    from services.transaction_services import bulk_create_transactions, create_expense
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rows = list(generate_rows(args.single_rows))
+    started = time.perf_counter()
+    for row in rows:
+        create_expense(user_id=1, amount=row["amount"], category=row["category"], payee=row["payee"], raw_description=row["raw_description"])
+    single = args.single_rows / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    result = bulk_create_transactions(generate_rows(args.rows), user_id=1, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - started
+    bulk = result["inserted"] / elapsed
+
+    print(f"  one row per call: {single:>10,.0f} rows/sec ({args.single_rows:,} rows)")
+    print(f"bulk (chunk {args.chunk_size:>5}): {bulk:>10,.0f} rows/sec ({result['inserted']:,} rows in {elapsed:.2f}s, {result['failed']} failed)")
+    print(f"           speedup: {bulk / single:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
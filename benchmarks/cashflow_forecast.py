@@ -0,0 +1,102 @@
+"""
+Batch cashflow forecasting throughput.
+
+Generates synthetic users (1-2 salaries, up to 3 EMIs, up to 2 SIPs) and
+forecasts their daily balances with forecast_cashflow_batch. The old
+iterrows-based engine is timed on a small sample for comparison.
+
+    python benchmarks/cashflow_forecast.py [--users 100000] [--horizon 365] [--float32]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cashflow import forecast_cashflow_batch
+
+
+def synthetic_flows(n_users: int, rng):
+    def flows(max_per_user, low, high):
+        counts = rng.integers(0, max_per_user + 1, n_users)
+        user_idx = np.repeat(np.arange(n_users), counts)
+        day = rng.integers(1, 29, len(user_idx))
+        amount = rng.uniform(low, high, len(user_idx)).round(2)
+        return user_idx, day, amount
+
+    inflows = flows(2, 20_000, 150_000)
+    emis, sips = flows(3, 2_000, 40_000), flows(2, 500, 10_000)
+    outflows = tuple(np.concatenate(parts) for parts in zip(emis, sips))
+    return inflows, outflows
+
+
+def legacy_forecast(income_streams, loans, investments, daily_var_spend, starting_balance, horizon):
+    # the pre-vectorization engine, kept here only as a baseline
+    today = datetime.today().date()
+    df = pd.DataFrame({"date": [today + timedelta(days=i) for i in range(horizon)], "inflow": 0.0, "outflow": 0.0})
+
+    for inc in income_streams:
+        for i, row in df.iterrows():
+            if row["date"].day == inc["credit_day"]:
+                df.loc[i, "inflow"] += inc["amount"]
+    for loan in loans:
+        for i, row in df.iterrows():
+            if row["date"].day == loan["due_day"]:
+                df.loc[i, "outflow"] += loan["emi"]
+    for inv in investments:
+        for i, row in df.iterrows():
+            if row["date"].day == inv["day"]:
+                df.loc[i, "outflow"] += inv["amount"]
+
+    df["outflow"] += daily_var_spend
+    bal, balances = starting_balance, []
+    for _, row in df.iterrows():
+        bal = bal + row["inflow"] - row["outflow"]
+        balances.append(bal)
+    df["balance"] = balances
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--horizon", type=int, default=365)
+    parser.add_argument("--float32", action="store_true", help="halve memory for the balance matrix")
+    parser.add_argument("--legacy-users", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    dtype = np.float32 if args.float32 else np.float64
+    starting_balance = rng.uniform(0, 200_000, args.users)
+    daily_variable = rng.uniform(100, 2_000, args.users)
+    inflows, outflows = synthetic_flows(args.users, rng)
+
+    started = time.perf_counter()
+    forecast = forecast_cashflow_batch(starting_balance, inflows, outflows, daily_variable, horizon=args.horizon, dtype=dtype)
+    elapsed = time.perf_counter() - started
+    balance = forecast["balance"]
+
+    print(f"vectorized: {args.users:,} users x {args.horizon} days in {elapsed:.2f}s "
+          f"({args.users / elapsed:,.0f} users/sec, {balance.nbytes / 2**20:,.0f} MiB {balance.dtype})")
+
+    # legacy engine on the first few users, same inputs
+    n = min(args.legacy_users, args.users)
+    started = time.perf_counter()
+    for u in range(n):
+        incomes = [{"amount": a, "credit_day": d} for i, d, a in zip(*inflows) if i == u]
+        loans = [{"emi": a, "due_day": d} for i, d, a in zip(*outflows) if i == u]
+        legacy = legacy_forecast(incomes, loans, [], daily_variable[u], starting_balance[u], args.horizon)
+        assert np.allclose(legacy["balance"].to_numpy(), balance[u], rtol=1e-4, atol=10.0 if args.float32 else 1e-6)
+    legacy_rate = n / (time.perf_counter() - started)
+
+    print(f"    legacy: {legacy_rate:,.1f} users/sec (sampled {n} users, results match)")
+    print(f"   speedup: {args.users / elapsed / legacy_rate:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Concurrent /chat load benchmark with stubbed LLMs.
+
+Compares the old handler (sync classify + agent.run on the event loop) with the
+async workflow (workflow.ainvoke) for N chats in flight on one event loop.
+
+    python benchmarks/chat_load.py --chats 200 --latency 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'chat_load_bench.db')}")
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ.setdefault("MODEL_NAME", "stub-model")
+os.environ.setdefault("GEMINI_API_KEY", "stub")
+# every chat goes through the stubbed LLM: no TF-IDF shortcut, no cached intents or answers
+os.environ["INTENT_FAST_PATH"] = "0"
+os.environ["INTENT_CACHE"] = "0"
+os.environ["INVESTMENT_CACHE"] = "0"
+
+LLM_LATENCY = 0.3
+
+MESSAGES = [
+    ("review my portfolio", "portfolio_review"),
+    ("what strategy should I follow to maximize my returns", "portfolio_strategy"),
+]
+
+
+class _Reply:
+    def __init__(self, content):
+        self.content = content
+        self.text = content
+
+
+def _reply_for(prompt) -> _Reply:
+    text = prompt[0] if isinstance(prompt, list) else str(prompt)
+    if "intent extractor" in text:
+        for message, intent in MESSAGES:
+            if f"Utterance: {message}" in text:
+                return _Reply(json.dumps({"intent": intent, "confidence": 0.99}))
+        return _Reply(json.dumps({"intent": "unknown"}))
+    return _Reply("stubbed answer")
+
+
+class StubChatModel:
+    """Stands in for ChatGroq: fixed latency, canned replies."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def invoke(self, prompt, *args, **kwargs):
+        time.sleep(LLM_LATENCY)
+        return _reply_for(prompt)
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        await asyncio.sleep(LLM_LATENCY)
+        return _reply_for(prompt)
+
+
+class StubGeminiModel:
+    async def generate_content_async(self, prompt, *args, **kwargs):
+        await asyncio.sleep(LLM_LATENCY)
+        return _Reply("stubbed summary")
+
+
+def install_stubs():
+    import config.llm as llm
+    import mcp.tools.renderer as renderer
+
+    llm.ChatGroq = StubChatModel
+    gemini = StubGeminiModel()
+    renderer._get_model = lambda: gemini
+
+
+async def run_legacy(n: int) -> float:
+    """The pre-async handler: every step blocks the event loop."""
+    from graph.graph_builder import route_intent
+    from mcp.agents.intent_agent import IntentAgent
+    from mcp.agents.investment_agent import InvestmentAgent
+
+    intent_agent = IntentAgent(intents=[intent for _, intent in MESSAGES])
+    agents = {"investment": InvestmentAgent()}
+
+    async def chat(message):
+        intent, params, _ = intent_agent.classify(message)
+        node = route_intent(intent)
+        return agents[node].run({"input": message, "intent": intent, "params": params})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(chat(MESSAGES[i % len(MESSAGES)][0]) for i in range(n)))
+    return time.perf_counter() - start
+
+
+async def run_async(n: int) -> float:
+    from graph.graph_builder import build_graph
+
+    workflow = build_graph()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(workflow.ainvoke({"input": MESSAGES[i % len(MESSAGES)][0]}) for i in range(n)))
+    return time.perf_counter() - start
+
+
+def main():
+    global LLM_LATENCY
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=LLM_LATENCY, help="stubbed LLM round-trip in seconds")
+    args = parser.parse_args()
+    LLM_LATENCY = args.latency
+
+    from config.database import Base, engine
+    import models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    install_stubs()
+
+    for label, runner in (("blocking invoke", run_legacy), ("async ainvoke", run_async)):
+        elapsed = asyncio.run(runner(args.chats))
+        print(f"{label:>16}: {args.chats} chats in {elapsed:.2f}s -> {args.chats / elapsed:.1f} chats/s")
+
+
+if __name__ == "__main__":
+    main()
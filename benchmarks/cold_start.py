@@ -0,0 +1,106 @@
+"""
+Cold-start benchmark for `import main`.
+
+Imports the app in fresh interpreters with no API keys and no DATABASE_URL,
+reports the median import time and the slowest modules (from
+python -X importtime), and exits with status 1 if the median is over the
+import-time budget. With --workflow it also times the first
+container.get_workflow() call, which the startup hook normally pays.
+
+    python benchmarks/cold_start.py --runs 5 --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+# keys that would let import-time code reach out to a service
+SCRUBBED_ENV = ("DATABASE_URL", "GROQ_API_KEY", "MODEL_NAME", "GEMINI_API_KEY",
+                "RAZORPAY_TEST_API_KEY", "RAZORPAY_TEST_SECRET_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN")
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def clean_env() -> dict:
+    env = {k: v for k, v in os.environ.items() if k not in SCRUBBED_ENV}
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def run_python(code: str, *flags) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, env=clean_env(),
+                          capture_output=True, text=True)
+
+
+def time_import(runs: int) -> list:
+    timings = []
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    for _ in range(runs):
+        proc = run_python(code)
+        if proc.returncode != 0:
+            sys.exit(f"`import main` failed:\n{proc.stderr}")
+        timings.append(float(proc.stdout.strip().splitlines()[-1]) * 1000)
+    return timings
+
+
+def slowest_modules(top: int) -> list:
+    """
+    (cumulative ms, module) for the top-level packages that cost the most.
+    """
+    proc = run_python("import main", "-X", "importtime")
+    totals = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        # only direct imports: nested ones are already in their parent's cumulative time
+        if match and len(match.group(3)) <= 1:
+            totals.append((int(match.group(2)) / 1000, match.group(4)))
+    return sorted(totals, reverse=True)[:top]
+
+
+def time_workflow() -> float:
+    code = (
+        "import time; import main; from config import container; "
+        "t = time.perf_counter(); container.get_workflow(); print(time.perf_counter() - t)"
+    )
+    proc = run_python(code)
+    if proc.returncode != 0:
+        sys.exit(f"building the workflow failed:\n{proc.stderr}")
+    return float(proc.stdout.strip().splitlines()[-1]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--workflow", action="store_true", help="also time the first workflow build")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    timings = time_import(args.runs)
+    median = statistics.median(timings)
+    print(f"import main: median {median:.0f} ms over {args.runs} runs "
+          f"(min {min(timings):.0f}, max {max(timings):.0f}), budget {args.budget_ms:.0f} ms")
+
+    print("slowest imports (cumulative):")
+    for ms, module in slowest_modules(args.top):
+        print(f"  {ms:8.1f} ms  {module}")
+
+    if args.workflow:
+        print(f"first get_workflow(): {time_workflow():.0f} ms")
+
+    print(f"done in {time.perf_counter() - start:.1f}s")
+    if median > args.budget_ms:
+        print(f"FAIL: import time over budget by {median - args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
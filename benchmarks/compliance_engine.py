@@ -0,0 +1,80 @@
+"""
+Compliance check throughput: stateful counters vs. scanning history.
+
+The list-scan baseline is the old check_payment, which needed each user's
+recent transactions passed in and summed them on every call.
+
+    python benchmarks/compliance_engine.py [--payments 200000] [--users 5000] [--history 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.compliance import ComplianceEngine
+
+PAYEES = ["swiggy", "zomato", "uber", "amazon", "bigbasket", "airtel", "betting hub", "ramesh"]
+
+
+def legacy_check(engine, amount, payee, recent_transactions, now):
+    # the pre-counter rules, with the datetime.now.date() crash fixed
+    if amount > engine.MAX_TRANSACTIiON_AMOUNT:
+        return "AMOUNT_TOO_HIGH"
+    for word in engine.SUSPICIOUS_KEYWORDS:
+        if word in payee.lower():
+            return "SUSPICIOUS_PAYEE"
+    today_spend = sum(t.amount for t in recent_transactions if t.timestamp.date() == now.date())
+    if today_spend + amount > engine.MAX_DAILY_LIMIT:
+        return "DAILY_LIMIT_EXCEEDED"
+    rapid = [t for t in recent_transactions if now - t.timestamp <= timedelta(minutes=engine.RAPID_TXN_WINDOW)]
+    if len(rapid) >= engine.RAPID_TXN_LIMIT:
+        return "RAPID_TXN_LIMIT_EXCEEDED"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payments", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--history", type=int, default=200, help="recent transactions per user for the baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start = datetime(2026, 1, 1)
+    payments = [
+        {
+            "user": rng.randrange(args.users),
+            "amount": round(rng.uniform(10, 900), 2),
+            "payee": rng.choice(PAYEES),
+            "timestamp": start + timedelta(seconds=i * 3),
+        }
+        for i in range(args.payments)
+    ]
+
+    engine = ComplianceEngine()
+    started = time.perf_counter()
+    approved = sum(r["status"] == "approved" for r in engine.screen_payments(payments))
+    batch = args.payments / (time.perf_counter() - started)
+
+    history = [
+        SimpleNamespace(amount=rng.uniform(10, 500), timestamp=start - timedelta(minutes=rng.randrange(60 * 24 * 30)))
+        for _ in range(args.history)
+    ]
+    sample = payments[:min(args.payments, 20_000)]
+    started = time.perf_counter()
+    for p in sample:
+        legacy_check(engine, p["amount"], p["payee"], history, p["timestamp"])
+    legacy = len(sample) / (time.perf_counter() - started)
+
+    print(f"counters: {batch:>12,.0f} checks/sec ({approved:,} of {args.payments:,} approved)")
+    print(f"list scan: {legacy:>11,.0f} checks/sec ({args.history} transactions of history per call)")
+    print(f"speedup: {batch / legacy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
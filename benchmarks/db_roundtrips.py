@@ -0,0 +1,84 @@
+"""
+DB round-trips and pool checkouts per chat turn.
+
+A "turn" here is what the transaction + budget agents do for a typical message:
+add an expense, list budgets, list transactions. It runs once with every
+service opening its own session (the old behaviour, optionally with
+pool_pre_ping), and once with one request-scoped session shared by all calls.
+
+    python benchmarks/db_roundtrips.py [--pre-ping]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'db_roundtrips_bench.db')}")
+
+from sqlalchemy import event
+
+
+class Counter:
+    def __init__(self, engine):
+        self.statements = 0
+        self.checkouts = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.pool, "checkout", self._on_checkout)
+
+    def _on_execute(self, *args, **kwargs):
+        self.statements += 1
+
+    def _on_checkout(self, *args, **kwargs):
+        self.checkouts += 1
+
+    def reset(self):
+        self.statements = 0
+        self.checkouts = 0
+
+
+def chat_turn(db=None):
+    from services.budget_services import get_budgets
+    from services.transaction_services import create_expense, get_transactions
+
+    create_expense(user_id=1, amount=120.0, category="food", db=db)
+    get_budgets(1, db=db)
+    get_transactions(type="expense", db=db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--pre-ping", action="store_true", help="count one ping per checkout, as the old engine did")
+    args = parser.parse_args()
+
+    from config.database import Base, SessionLocal, engine
+    import models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    counter = Counter(engine)
+
+    for label, scoped in (("session per call", False), ("request-scoped", True)):
+        counter.reset()
+        for _ in range(args.turns):
+            if scoped:
+                db = SessionLocal()
+                try:
+                    chat_turn(db)
+                finally:
+                    db.close()
+            else:
+                chat_turn()
+
+        pings = counter.checkouts if args.pre_ping and not scoped else 0
+        per_turn = (counter.statements + pings) / args.turns
+        print(
+            f"{label:>16}: {counter.checkouts / args.turns:.1f} checkouts/turn, "
+            f"{counter.statements / args.turns:.1f} statements/turn, "
+            f"{per_turn:.1f} round-trips/turn (incl. {pings / args.turns:.1f} pings)"
+        )
+
+
+if __name__ == "__main__":
+    main()
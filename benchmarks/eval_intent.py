@@ -0,0 +1,114 @@
+"""
+Offline evaluation of the fast-path intent classifier.
+
+Runs k-fold cross-validation over mcp/agents/intent_corpus.json (rules are
+fixed, the TF-IDF model is retrained per fold) and reports how many utterances
+the fast path would answer without the LLM, how many of those are correct, and
+the per-utterance latency, then precision per predicted intent: of the
+utterances the fast path labelled X, how many really were X.
+
+    python benchmarks/eval_intent.py --folds 5 --threshold 0.6 0.7 0.8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.agents.fast_intent import CORPUS_PATH, FastIntentClassifier
+
+
+def split_folds(rows, k, seed):
+    by_intent = defaultdict(list)
+    for row in rows:
+        by_intent[row["intent"]].append(row)
+
+    rng = random.Random(seed)
+    folds = [[] for _ in range(k)]
+    for intent_rows in by_intent.values():
+        rng.shuffle(intent_rows)
+        for i, row in enumerate(intent_rows):
+            folds[i % k].append(row)
+    return folds
+
+
+def evaluate(rows, k, threshold, seed=7):
+    intents = sorted({row["intent"] for row in rows})
+    folds = split_folds(rows, k, seed)
+
+    per_intent = defaultdict(lambda: {"total": 0, "accepted": 0, "correct": 0})
+    per_predicted = defaultdict(lambda: {"predicted": 0, "correct": 0})
+    by_source = defaultdict(int)
+    latencies = []
+
+    for i, held_out in enumerate(folds):
+        train = [row for j, fold in enumerate(folds) if j != i for row in fold]
+        classifier = FastIntentClassifier(intents, corpus=train, threshold=threshold)
+        classifier.predict("warm up")
+
+        for row in held_out:
+            start = time.perf_counter()
+            hit = classifier.predict(row["text"])
+            latencies.append(time.perf_counter() - start)
+
+            stats = per_intent[row["intent"]]
+            stats["total"] += 1
+            if hit:
+                predicted, _, source = hit
+                by_source[source] += 1
+                stats["accepted"] += 1
+                stats["correct"] += int(predicted == row["intent"])
+                per_predicted[predicted]["predicted"] += 1
+                per_predicted[predicted]["correct"] += int(predicted == row["intent"])
+
+    total = sum(s["total"] for s in per_intent.values())
+    accepted = sum(s["accepted"] for s in per_intent.values())
+    correct = sum(s["correct"] for s in per_intent.values())
+    latencies.sort()
+
+    return {
+        "threshold": threshold,
+        "utterances": total,
+        "coverage": accepted / total if total else 0.0,
+        "precision": correct / accepted if accepted else 0.0,
+        "by_source": dict(by_source),
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "per_intent": dict(per_intent),
+        "per_predicted": dict(per_predicted),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--threshold", type=float, nargs="+", default=[0.6])
+    parser.add_argument("--verbose", action="store_true", help="print per-intent breakdown")
+    args = parser.parse_args()
+
+    with open(args.corpus, "r") as f:
+        rows = json.load(f)
+
+    for threshold in args.threshold:
+        report = evaluate(rows, args.folds, threshold)
+        print(
+            f"threshold={threshold:.2f} coverage={report['coverage']:.1%} "
+            f"precision={report['precision']:.1%} sources={report['by_source']} "
+            f"p50={report['p50_ms']:.3f}ms p95={report['p95_ms']:.3f}ms"
+        )
+        for intent, stats in sorted(report["per_intent"].items()):
+            predicted = report["per_predicted"].get(intent, {"predicted": 0, "correct": 0})
+            precision = f"{predicted['correct'] / predicted['predicted']:6.1%}" if predicted["predicted"] else "   n/a"
+            line = f"    {intent:<24} precision {precision} ({predicted['correct']:>3}/{predicted['predicted']:>3})"
+            if args.verbose:
+                line += f", {stats['correct']:>3}/{stats['accepted']:>3} correct, {stats['accepted']:>3}/{stats['total']:>3} accepted"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
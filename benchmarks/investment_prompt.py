@@ -0,0 +1,127 @@
+"""
+InvestmentAgent prompt size and latency: raw holdings vs cached digest.
+
+For portfolios of increasing size, builds the old prompt (repr of every
+holding) and the digest prompt, counts their tokens, and times
+InvestmentAgent.arun end to end against a stubbed LLM whose latency grows
+with prompt length (--prefill-us per token, default roughly a hosted
+model's prompt processing). Tokens are counted with tiktoken's cl100k
+encoding when it is installed, otherwise estimated as characters / 4.
+
+    python benchmarks/investment_prompt.py --sizes 13 100 1000 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# the stub LLM is attached after construction; no real client is built
+os.environ.pop("GROQ_API_KEY", None)
+
+PREFILL_US = 50.0
+TTFT = 0.15
+
+
+def token_counter():
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken cl100k"
+    except ImportError:
+        return lambda text: len(text) // 4, "chars/4 estimate"
+
+
+class StubLLM:
+    def __init__(self, count_tokens):
+        self.count_tokens = count_tokens
+        self.prompt_tokens = []
+
+    async def ainvoke(self, prompt):
+        tokens = self.count_tokens(prompt)
+        self.prompt_tokens.append(tokens)
+        await asyncio.sleep(TTFT + tokens * PREFILL_US / 1e6)
+
+        class Reply:
+            content = "stubbed answer"
+        return Reply()
+
+
+def write_holdings(path: str, size: int, seed: int = 3):
+    rng = random.Random(seed)
+    holdings = []
+    for i in range(size):
+        avg = rng.uniform(5, 5000)
+        last = avg * rng.uniform(0.7, 1.4)
+        quantity = rng.randint(1, 200)
+        holdings.append({
+            "tradingsymbol": f"SYM{i}",
+            "exchange": "Crypto" if rng.random() < 0.1 else "NSE",
+            "quantity": quantity,
+            "average_price": round(avg, 2),
+            "last_price": round(last, 2),
+            "pnl": round((last - avg) * quantity, 2),
+        })
+    with open(path, "w") as f:
+        json.dump({"user_id": 1, "holdings": holdings}, f)
+    return holdings
+
+
+async def time_agent(agent, state, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        await agent.arun(state)
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    global PREFILL_US
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[13, 100, 1000, 5000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--prefill-us", type=float, default=PREFILL_US)
+    args = parser.parse_args()
+    PREFILL_US = args.prefill_us
+
+    import services.holdings_store as holdings_store
+    from config.constants import PROMPT_TEMPLATES
+    from mcp.agents.investment_agent import InvestmentAgent
+
+    count_tokens, counter = token_counter()
+    state = {"intent": "portfolio_review", "params": {"stock": "SYM1"}}
+    print(f"tokens: {counter}; stub LLM: {TTFT * 1000:.0f} ms + {PREFILL_US:.0f} us/prompt token")
+    print(f"{'holdings':>9} {'raw tokens':>11} {'digest tokens':>14} {'raw ms':>9} {'digest ms':>10}")
+
+    for size in args.sizes:
+        path = os.path.join(tempfile.gettempdir(), f"investment_prompt_{size}.json")
+        holdings = write_holdings(path, size)
+        holdings_store._store = holdings_store.HoldingsStore(path)
+
+        # the prompt as InvestmentAgent built it before the digest
+        raw_prompt = (f"User holdings: {holdings}\nIntent: {state['intent']}\nParams: {state['params']}\n"
+                      + PROMPT_TEMPLATES[state["intent"]])
+        agent = InvestmentAgent()
+        agent.llm = StubLLM(count_tokens)
+        raw_agent = InvestmentAgent()
+        raw_agent.llm = agent.llm
+        # every run should reach the LLM; answers are not what's measured
+        agent.cache = raw_agent.cache = None
+        raw_agent._build_prompt = lambda s, portfolio: raw_prompt
+
+        asyncio.run(agent.arun(state))  # builds and caches the digest
+        digest_tokens = agent.llm.prompt_tokens[-1]
+        digest_ms = asyncio.run(time_agent(agent, state, args.runs)) * 1000
+        raw_ms = asyncio.run(time_agent(raw_agent, state, args.runs)) * 1000
+
+        print(f"{size:>9} {count_tokens(raw_prompt):>11} {digest_tokens:>14} {raw_ms:>9.0f} {digest_ms:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
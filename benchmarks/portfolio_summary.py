@@ -0,0 +1,98 @@
+"""
+Holdings read + portfolio_summary benchmark.
+
+Writes a synthetic holdings file with many users, then compares the old path
+(json.load of the whole file on every call, then Python loops over the
+holdings) with the cached HoldingsStore and the vectorized summary.
+
+    python benchmarks/portfolio_summary.py --users 200 --holdings 2000 --calls 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.holdings_store import HoldingsStore
+from services.portfolio import portfolio_summary, stock_pnl
+
+
+def write_holdings(path: str, users: int, holdings: int, seed: int = 7):
+    rng = random.Random(seed)
+    documents = []
+    for user_id in range(1, users + 1):
+        rows = []
+        for i in range(holdings):
+            crypto = rng.random() < 0.15
+            avg = rng.uniform(5, 5000)
+            rows.append({
+                "tradingsymbol": f"SYM{i}",
+                "exchange": "Crypto" if crypto else "NSE",
+                "quantity": rng.randint(1, 200),
+                "average_price": round(avg, 2),
+                "last_price": round(avg * rng.uniform(0.7, 1.4), 2),
+            })
+        documents.append({"user_id": user_id, "holdings": rows})
+    with open(path, "w") as f:
+        json.dump({"users": documents}, f)
+
+
+def legacy_summary(path: str, user_id: int):
+    with open(path) as f:
+        data = json.load(f)
+    holdings = next(d for d in data["users"] if d["user_id"] == user_id)["holdings"]
+
+    total_cost = 0
+    total_value = 0
+    allocation = defaultdict(float)
+    for inv in holdings:
+        cost = inv["quantity"] * inv["average_price"]
+        value = inv["quantity"] * inv["last_price"]
+        total_cost += cost
+        total_value += value
+        allocation["crypto" if inv["exchange"] == "Crypto" else "stock"] += value
+    return total_cost, total_value, dict(allocation)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--holdings", type=int, default=2000)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), "holdings_bench.json")
+    write_holdings(path, args.users, args.holdings)
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"{args.users} users x {args.holdings} holdings ({size_mb:.1f} MB)")
+
+    user_ids = [random.randint(1, args.users) for _ in range(args.calls)]
+
+    legacy_calls = max(1, min(args.calls, 20))
+    start = time.perf_counter()
+    for user_id in user_ids[:legacy_calls]:
+        legacy_summary(path, user_id)
+    legacy = (time.perf_counter() - start) / legacy_calls
+
+    start = time.perf_counter()
+    store = HoldingsStore(path)
+    load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        portfolio_summary(store.holdings(user_id))
+        stock_pnl(store.holdings(user_id), "SYM42")
+    cached = (time.perf_counter() - start) / args.calls
+
+    print(f"  json.load per call + loops: {legacy * 1000:9.2f} ms/call")
+    print(f"  store load (once):          {load * 1000:9.2f} ms")
+    print(f"  cached store + vectorized:  {cached * 1000:9.3f} ms/call -> {legacy / cached:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Query-plan regression check for the transaction and budget access paths.
+
+Runs EXPLAIN on the statements the services issue and exits with status 1 if
+any of them scans a table instead of searching an index. Works on SQLite
+(EXPLAIN QUERY PLAN) and PostgreSQL (EXPLAIN with enable_seqscan off, so a
+Seq Scan only shows up when no index can serve the query).
+
+    python benchmarks/query_plans.py
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'query_plans_check.db')}")
+
+from sqlalchemy import select
+
+_SQLITE_SCAN_RE = re.compile(r"^SCAN (\w+)\b(?! USING (?:COVERING )?INDEX)")
+
+
+def statements():
+    from models.budget import Budget
+    from services.transaction_services import (
+        DEFAULT_COLUMNS,
+        _select_transactions,
+        encode_cursor,
+        find_transaction_stmt,
+    )
+
+    now = datetime.now()
+    cursor = encode_cursor(now, 10_000)
+    return {
+        "list transactions": _select_transactions(DEFAULT_COLUMNS).limit(101),
+        "list by type": _select_transactions(DEFAULT_COLUMNS, type="expense").limit(101),
+        "list by category and type": _select_transactions(DEFAULT_COLUMNS, type="expense", category="food").limit(101),
+        "list date range": _select_transactions(DEFAULT_COLUMNS, start=now - timedelta(days=30), end=now).limit(101),
+        "next page": _select_transactions(DEFAULT_COLUMNS, cursor=cursor).limit(101),
+        "update/delete lookup": find_transaction_stmt("food", now.date().isoformat(), "expense"),
+        "budgets for user": select(Budget).where(Budget.user_id == 1),
+    }
+
+
+def explain_sqlite(conn, stmt):
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, params).fetchall()
+    plan = [row[-1] for row in rows]
+    scans = [line for line in plan if _SQLITE_SCAN_RE.match(line)]
+    return plan, scans
+
+
+def explain_postgres(conn, stmt):
+    compiled = stmt.compile(dialect=conn.dialect)
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    raw = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params).scalar()
+    root = (raw if isinstance(raw, list) else json.loads(raw))[0]["Plan"]
+
+    plan, scans, stack = [], [], [root]
+    while stack:
+        node = stack.pop()
+        line = f"{node['Node Type']} {node.get('Relation Name', '')}".strip()
+        plan.append(line)
+        if node["Node Type"] == "Seq Scan":
+            scans.append(line)
+        stack.extend(node.get("Plans", []))
+    return plan, scans
+
+
+def main():
+    from config.database import Base, engine
+    import models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    explain = explain_sqlite if engine.dialect.name == "sqlite" else explain_postgres
+
+    failures = 0
+    with engine.begin() as conn:
+        for label, stmt in statements().items():
+            plan, scans = explain(conn, stmt)
+            status = "FAIL" if scans else "ok"
+            failures += bool(scans)
+            print(f"[{status:>4}] {label}")
+            for line in plan:
+                print(f"         {line}")
+
+    if failures:
+        print(f"\n{failures} statement(s) fall back to a full table scan")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
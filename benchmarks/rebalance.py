@@ -0,0 +1,74 @@
+"""
+Rebalancing optimizer benchmark.
+
+Builds a synthetic price-history file and holdings for N assets, then times
+rebalance() cold (inputs + solve), cached, and warm-started with a new risk
+aversion, for both methods. For reference it also solves the same
+mean-variance problem with SciPy's general-purpose SLSQP.
+
+    python benchmarks/rebalance.py --assets 500 --days 756
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.holdings_store import to_array
+from services.rebalance import METHODS, market_inputs, rebalance
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=500)
+    parser.add_argument("--days", type=int, default=756)
+    parser.add_argument("--slsqp", action="store_true", help="also time SLSQP (slow above ~200 assets)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(5)
+    prices = 100 * np.cumprod(1 + rng.normal(0.0004, 0.02, (args.assets, args.days)), axis=1)
+    symbols = np.array([f"SYM{i}" for i in range(args.assets)])
+    path = os.path.join(tempfile.gettempdir(), "rebalance_bench_history.npz")
+    np.savez(path, symbols=symbols, prices=prices)
+
+    holdings = to_array([
+        {"tradingsymbol": s, "exchange": "NSE", "quantity": int(rng.integers(1, 100)),
+         "average_price": 100.0, "last_price": float(prices[i, -1])}
+        for i, s in enumerate(symbols)
+    ])
+
+    # scipy.optimize import is a one-off; keep it out of the first timing
+    import scipy.optimize  # noqa: F401
+
+    print(f"{args.assets} assets x {args.days} days")
+    for method in METHODS:
+        result, cold = timed(rebalance, holdings, method=method, history_path=path)
+        _, cached = timed(rebalance, holdings, method=method, history_path=path)
+        _, warm = timed(rebalance, holdings, method=method, risk_aversion=7.0, history_path=path)
+        print(f"  {method:>13}: cold {cold:7.1f} ms, cached {cached:6.1f} ms, "
+              f"warm start {warm:6.1f} ms, {len(result['trades'])} trades")
+
+    if args.slsqp:
+        from scipy.optimize import minimize
+
+        mu, cov, *_ = market_inputs(holdings, path)
+        n = len(mu)
+        objective = lambda w: -(w @ mu - 2.0 * w @ cov @ w)
+        gradient = lambda w: -(mu - 4.0 * cov @ w)
+        _, slsqp = timed(minimize, objective, np.full(n, 1.0 / n), jac=gradient, method="SLSQP",
+                         bounds=[(0, 0.25)] * n, constraints=[{"type": "eq", "fun": lambda w: w.sum() - 1}])
+        print(f"  SLSQP reference (mean-variance solve only): {slsqp:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
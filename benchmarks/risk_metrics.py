@@ -0,0 +1,80 @@
+"""
+Risk engine benchmark on synthetic price histories.
+
+Compares per-asset / per-user loops (calculate_volatility one series at a
+time, one portfolio at a time) with the whole-matrix risk_metrics and
+batch_portfolio_risk, reading the prices through a memory-mapped .npy file.
+
+    python benchmarks/risk_metrics.py --assets 500 --days 1260 --users 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.risk import (
+    batch_portfolio_risk,
+    calculate_volatility,
+    load_price_history,
+    max_drawdown,
+    risk_metrics,
+    rolling_volatility,
+    save_price_history,
+)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def loop_portfolios(prices, weights):
+    out = []
+    for w in weights:
+        series = w @ prices
+        returns = np.diff(series) / series[:-1]
+        out.append((returns.std(ddof=1), max_drawdown(series)))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=500)
+    parser.add_argument("--days", type=int, default=1260)
+    parser.add_argument("--users", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    prices = 100 * np.cumprod(1 + rng.normal(0.0004, 0.02, (args.assets, args.days)), axis=1)
+    benchmark = 100 * np.cumprod(1 + rng.normal(0.0003, 0.01, args.days))
+    weights = rng.dirichlet(np.ones(args.assets), size=args.users)
+
+    path = os.path.join(tempfile.gettempdir(), "risk_bench_prices.npy")
+    save_price_history(path, prices)
+    mapped = load_price_history(path)
+    print(f"{args.assets} assets x {args.days} days, {args.users} portfolios")
+
+    _, loop_vol = timed(lambda: [calculate_volatility(row) for row in mapped])
+    _, engine = timed(risk_metrics, mapped, benchmark=benchmark)
+    _, rolling = timed(rolling_volatility, mapped, 21)
+    print(f"  per-asset volatility loop:      {loop_vol * 1000:8.1f} ms")
+    print(f"  risk_metrics, every metric:     {engine * 1000:8.1f} ms")
+    print(f"  21-day rolling volatility:      {rolling * 1000:8.1f} ms")
+
+    loop_users = min(args.users, 200)
+    _, loop_batch = timed(loop_portfolios, mapped, weights[:loop_users])
+    _, batch = timed(batch_portfolio_risk, mapped, weights)
+    per_loop = loop_batch / loop_users
+    per_batch = batch / args.users
+    print(f"  per-portfolio loop:             {per_loop * 1e6:8.1f} us/portfolio")
+    print(f"  batch_portfolio_risk:           {per_batch * 1e6:8.1f} us/portfolio -> {per_loop / per_batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
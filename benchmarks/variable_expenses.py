@@ -0,0 +1,74 @@
+"""
+Nightly variable-expense forecast over many users.
+
+Runs forecast_variable_expenses_batch on a synthetic long-format frame and
+compares a sample of users against the old per-user pandas EWM +
+scikit-learn LinearRegression computation.
+
+    python benchmarks/variable_expenses.py [--users 100000] [--days 90]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cashflow import EMA_ALPHA, TREND_OFFSET_DAYS, forecast_variable_expenses_batch
+
+
+def synthetic_expenses(n_users: int, days: int, rng) -> pd.DataFrame:
+    per_user = rng.integers(1, days, n_users)
+    user_id = np.repeat(np.arange(1, n_users + 1), per_user)
+    day = rng.integers(0, days, len(user_id))
+    start = np.datetime64("2025-01-01")
+    return pd.DataFrame({
+        "user_id": user_id,
+        "date": start + day.astype("timedelta64[D]"),
+        "amount": rng.gamma(2.0, 300.0, len(user_id)).round(2),
+    })
+
+
+def legacy_projection(expenses_df: pd.DataFrame) -> float:
+    from sklearn.linear_model import LinearRegression
+
+    daily = expenses_df.groupby("date")["amount"].sum().reset_index()
+    daily.sort_values("date", inplace=True)
+    ema = daily["amount"].ewm(alpha=EMA_ALPHA).mean().iloc[-1]
+    daily["t"] = np.arange(len(daily))
+    model = LinearRegression()
+    model.fit(daily[["t"]], daily["amount"])
+    return float(max(ema + model.coef_[0] * TREND_OFFSET_DAYS, 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--legacy-users", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = synthetic_expenses(args.users, args.days, rng)
+
+    started = time.perf_counter()
+    result = forecast_variable_expenses_batch(df)
+    elapsed = time.perf_counter() - started
+    print(f" batch: {args.users:,} users / {len(df):,} rows in {elapsed:.2f}s "
+          f"({args.users / elapsed:,.0f} users/sec, result {result.nbytes / 2**20:.1f} MiB)")
+
+    sample = df[df["user_id"] <= args.legacy_users]
+    started = time.perf_counter()
+    legacy = np.array([legacy_projection(group) for _, group in sample.groupby("user_id")])
+    legacy_rate = len(legacy) / (time.perf_counter() - started)
+
+    assert np.allclose(legacy, result["daily_projection"][:len(legacy)], rtol=1e-9, atol=1e-6)
+    print(f"legacy: {legacy_rate:,.0f} users/sec (sampled {len(legacy)} users, results match)")
+    print(f"speedup: {args.users / elapsed / legacy_rate:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,31 @@
+import asyncio
+
 from config.database import Base, engine
 import models 
 
 Base.metadata.create_all(bind=engine)
 
+from config import llm
 from graph.graph_builder import build_graph
 
 workflow = build_graph()
 
-print("\n🤖 Financial AI Agent (type 'quit' to exit)\n")
 
-while True:
-    user = input("You: ")
-    if user.lower() == "quit":
-        break
+async def main():
+    # one event loop for the whole session: pooled LLM connections are bound to it
+    try:
+        while True:
+            user = await asyncio.to_thread(input, "You: ")
+            if user.lower() == "quit":
+                break
+
+            result = await workflow.ainvoke({"input": user})
+            print("RESULT:", result)
+            # print("\n[AI]:", result["result"], "\n")
+    finally:
+        await llm.aclose()
+
+
+print("\n🤖 Financial AI Agent (type 'quit' to exit)\n")
 
-    result = workflow.invoke({"input": user})
-    print("RESULT:", result)
-    # print("\n[AI]:", result["result"], "\n")
+asyncio.run(main())
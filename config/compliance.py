@@ -1,5 +1,137 @@
+import json
+import os
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any 
+from threading import Lock
+from typing import Dict, Any, Iterable, Iterator
+
+from utils.keyword_matcher import KeywordMatcher
+
+COMPLIANCE_RULES_PATH = os.getenv(
+    "COMPLIANCE_RULES_PATH", os.path.join(os.path.dirname(__file__), "compliance_rules.json")
+)
+RULES_RELOAD_INTERVAL = float(os.getenv("COMPLIANCE_RULES_RELOAD_INTERVAL", "1.0"))
+
+
+class ComplianceRules:
+    """
+    Suspicious-payee and banned-category matchers loaded from a JSON rule
+    file. The file's mtime is checked at most every `reload_interval`
+    seconds and the matchers are rebuilt when it changes; a bad edit keeps
+    the previous rules.
+    """
+
+    def __init__(self, path: str = COMPLIANCE_RULES_PATH, defaults: Dict[str, list] = None,
+                 reload_interval: float = RULES_RELOAD_INTERVAL):
+        self.path = path
+        self.defaults = defaults or {}
+        self.reload_interval = reload_interval
+        self._lock = Lock()
+        self._mtime = None
+        self._checked = 0.0
+        self._build(self.defaults)
+        self.reload()
+
+    def _build(self, rules: Dict[str, list]):
+        self.suspicious = KeywordMatcher(rules.get("suspicious_keywords", []))
+        self.banned = KeywordMatcher(rules.get("banned_categories", []))
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Rebuilds the matchers if the rule file changed. Returns True if it did.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.reload_interval:
+            return False
+
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return False
+            if mtime == self._mtime and not force:
+                return False
+
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    rules = {**self.defaults, **json.load(f)}
+                self._build(rules)
+            except (OSError, ValueError) as e:
+                # keep the previous rules until the file changes again
+                self._mtime = mtime
+                print("[DEBUG] compliance rules not reloaded:", e)
+                return False
+            self._mtime = mtime
+            print(f"[DEBUG] compliance rules loaded: {len(self.suspicious)} keywords, {len(self.banned)} banned categories")
+            return True
+
+
+class UserCounters:
+    """
+    Running totals for one user: today's and this month's spend, plus a ring
+    buffer of the last RAPID_TXN_LIMIT payment times. Every check is O(1).
+    """
+
+    __slots__ = ("day", "day_total", "month", "month_total", "recent")
+
+    def __init__(self, rapid_limit: int):
+        self.day = None
+        self.day_total = 0.0
+        self.month = None
+        self.month_total = 0.0
+        self.recent = deque(maxlen=rapid_limit)
+
+    def roll(self, now: datetime):
+        day = now.date().toordinal()
+        month = now.year * 12 + now.month
+        if day != self.day:
+            self.day, self.day_total = day, 0.0
+        if month != self.month:
+            self.month, self.month_total = month, 0.0
+
+    def add(self, amount: float, now: datetime):
+        self.roll(now)
+        self.day_total += amount
+        self.month_total += amount
+        self.recent.append(now)
+
+    def remove(self, amount: float, at: datetime):
+        """
+        Takes back an add() made `at` that did not go through; totals that
+        have rolled over since are left alone.
+        """
+        if at.date().toordinal() == self.day:
+            self.day_total = max(self.day_total - amount, 0.0)
+        if at.year * 12 + at.month == self.month:
+            self.month_total = max(self.month_total - amount, 0.0)
+        try:
+            self.recent.remove(at)
+        except ValueError:
+            pass
+
+
+class InMemoryComplianceStore:
+    """
+    Per-process counters keyed by user. A shared store (e.g. Redis) only needs
+    the same counters()/lock interface.
+    """
+
+    def __init__(self, rapid_limit: int):
+        self.rapid_limit = rapid_limit
+        self.lock = Lock()
+        self._counters: Dict[Any, UserCounters] = {}
+
+    def counters(self, user_key) -> UserCounters:
+        counters = self._counters.get(user_key)
+        if counters is None:
+            counters = self._counters[user_key] = UserCounters(self.rapid_limit)
+        return counters
+
+    def has(self, user_key) -> bool:
+        return user_key in self._counters
+
 
 class ComplianceEngine:
     MAX_TRANSACTIiON_AMOUNT = 1000.0
@@ -15,48 +147,133 @@ class ComplianceEngine:
     RAPID_TXN_LIMIT = 5
     RAPID_TXN_WINDOW = 2
 
-    def check_payment(self, *, amount: float, user, payee: str, recent_transactions: list) -> Dict[str, Any]:
-        
+    def __init__(self, store=None, rules: ComplianceRules = None):
+        self.store = store or InMemoryComplianceStore(self.RAPID_TXN_LIMIT)
+        self.rapid_window = timedelta(minutes=self.RAPID_TXN_WINDOW)
+        self.rules = rules or ComplianceRules(defaults={
+            "suspicious_keywords": self.SUSPICIOUS_KEYWORDS,
+            "banned_categories": self.BANNED_CATEGORIES,
+        })
+
+    @staticmethod
+    def _user_key(user):
+        return getattr(user, "id", user)
+
+    def _seed(self, counters: UserCounters, recent_transactions: list, now: datetime):
+        # first sight of a user whose caller still passes history: load it once
+        counters.roll(now)
+        for t in sorted(recent_transactions, key=lambda t: t.timestamp):
+            if t.timestamp.date() == now.date():
+                counters.day_total += t.amount
+            if (t.timestamp.year, t.timestamp.month) == (now.year, now.month):
+                counters.month_total += t.amount
+            counters.recent.append(t.timestamp)
+
+    def check_payment(self, *, amount: float, user, payee: str, category: str = None, recent_transactions: list = None,
+                      now: datetime = None, record: bool = False) -> Dict[str, Any]:
+        """
+        Screens one payment against the user's running counters. With
+        record=True an approved payment is added to them; otherwise call
+        record_payment() once the payment actually goes through.
+        """
+        now = now or datetime.now()
+
         # Rule 1: Hard cap of Transaction Amount
         if amount > self.MAX_TRANSACTIiON_AMOUNT:
             return {
-                "status": "rejected", 
-                "reason": "AMOUNT_TOO_HIGH", 
+                "status": "rejected",
+                "reason": "AMOUNT_TOO_HIGH",
                 "message": f"Payment of amount {amount} is too high. Max allowed is {self.MAX_TRANSACTIiON_AMOUNT}."
             }
-        
-        # Rule 2: Check for suspicious payee or notes 
-        for word in self.SUSPICIOUS_KEYWORDS:
-            if word in payee.lower():
-                return {
-                    "status": "rejected", 
-                    "reason": "SUSPICIOUS_PAYEE", 
-                    "message": f"Payment to {payee} is suspicious. Transaction flagged for safety."
-                }
 
-        # Rule 3: Daily spend limit check    
-        today_spend = sum(t.amount for t in recent_transactions if t.timestamp.date() == datetime.now.date())
+        self.rules.reload()
 
-        if today_spend + amount > self.MAX_DAILY_LIMIT:
+        # Rule 2: Check for suspicious payee or notes
+        if self.rules.suspicious.search(payee):
             return {
-                "status": "rejected", 
-                "reason": "DAILY_LIMIT_EXCEEDED", 
-                "message": f"Daily spend limit exceeded. You have spent Rs.{today_spend} today."
+                "status": "rejected",
+                "reason": "SUSPICIOUS_PAYEE",
+                "message": f"Payment to {payee} is suspicious. Transaction flagged for safety."
             }
-        
-        # Rule 4: Rapid transaction check (Fraud Defense)
-        now = datetime.now()
-        rapid_txns = [
-            t for t in recent_transactions
-            if now - t.timestamp <= timedelta(minutes=self.RAPID_TXN_WINDOW)
-        ]
-
-        if len(rapid_txns) >= self.RAPID_TXN_LIMIT:
+
+        # Rule 2b: Banned categories
+        if category and self.rules.banned.search(category):
             return {
-                "status": "rejected", 
-                "reason": "RAPID_TXN_LIMIT_EXCEEDED", 
-                "message": f"Rapid transaction limit exceeded. You have made {len(rapid_txns)} transactions in the last {self.RAPID_TXN_WINDOW} minutes."
+                "status": "rejected",
+                "reason": "BANNED_CATEGORY",
+                "message": f"Payments in the {category} category are not allowed."
             }
-        
-        
-        return {"status": "approved"}
\ No newline at end of file
+
+        user_key = self._user_key(user)
+        with self.store.lock:
+            fresh = not self.store.has(user_key)
+            counters = self.store.counters(user_key)
+            if fresh and recent_transactions:
+                self._seed(counters, recent_transactions, now)
+            counters.roll(now)
+
+            # Rule 3: Daily spend limit check
+            if counters.day_total + amount > self.MAX_DAILY_LIMIT:
+                return {
+                    "status": "rejected",
+                    "reason": "DAILY_LIMIT_EXCEEDED",
+                    "message": f"Daily spend limit exceeded. You have spent Rs.{counters.day_total} today."
+                }
+
+            # Rule 4: Monthly spend limit check
+            if counters.month_total + amount > self.MAX_MONTHLY_LIMIT:
+                return {
+                    "status": "rejected",
+                    "reason": "MONTHLY_LIMIT_EXCEEDED",
+                    "message": f"Monthly spend limit exceeded. You have spent Rs.{counters.month_total} this month."
+                }
+
+            # Rule 5: Rapid transaction check (Fraud Defense)
+            recent = counters.recent
+            if len(recent) == recent.maxlen and now - recent[0] <= self.rapid_window:
+                return {
+                    "status": "rejected",
+                    "reason": "RAPID_TXN_LIMIT_EXCEEDED",
+                    "message": f"Rapid transaction limit exceeded. You have made {len(recent)} transactions in the last {self.RAPID_TXN_WINDOW} minutes."
+                }
+
+            if record:
+                counters.add(amount, now)
+
+        return {"status": "approved"}
+
+    def record_payment(self, *, amount: float, user, now: datetime = None):
+        with self.store.lock:
+            self.store.counters(self._user_key(user)).add(amount, now or datetime.now())
+
+    def release_payment(self, *, amount: float, user, now: datetime):
+        """
+        Gives back the amount reserved by check_payment(record=True, now=now)
+        when the payment then failed.
+        """
+        with self.store.lock:
+            self.store.counters(self._user_key(user)).remove(amount, now)
+
+    def knows(self, user) -> bool:
+        """
+        Whether the user's counters are loaded; if not, pass their history
+        as recent_transactions on the next check.
+        """
+        return self.store.has(self._user_key(user))
+
+    def screen_payments(self, payments: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Batch mode: screens a stream of payments (dicts with amount, user,
+        payee and optionally category and timestamp) in order, counting each approved one
+        towards the limits of the ones after it.
+        """
+        for payment in payments:
+            result = self.check_payment(
+                amount=payment["amount"],
+                user=payment["user"],
+                payee=payment.get("payee") or "",
+                category=payment.get("category"),
+                now=payment.get("timestamp"),
+                record=True,
+            )
+            yield {**payment, **result}
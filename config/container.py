@@ -0,0 +1,65 @@
+"""
+Process-wide application container.
+
+Nothing here runs at import time, so `import main` stays cheap and works
+without API keys or a database. The compiled LangGraph workflow is built
+once, on first use or by startup(), and then shared by every request. Each
+ainvoke() call still starts from its own fresh state (there is no
+checkpointer), and the per-request DB session travels in the run config,
+so requests never see each other's state.
+
+startup() is the app's lifespan hook: it creates the DB engine and tables,
+opens pooled LLM connections and compiles the workflow (which also trains
+the intent fast path), so the first request pays for none of it.
+"""
+import asyncio
+import threading
+import time
+
+_lock = threading.Lock()
+_workflow = None
+
+
+def get_workflow():
+    global _workflow
+    if _workflow is None:
+        with _lock:
+            if _workflow is None:
+                from graph.graph_builder import build_graph
+
+                start = time.perf_counter()
+                _workflow = build_graph()
+                print(f"[DEBUG] workflow compiled in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return _workflow
+
+
+def reset():
+    """
+    Drops the compiled workflow, e.g. after tests change the environment.
+    """
+    global _workflow
+    with _lock:
+        _workflow = None
+
+
+async def startup():
+    from config import llm
+    from config.database import init_db
+
+    # DB and graph setup are sync; run them alongside the LLM connection warm-up
+    results = await asyncio.gather(
+        asyncio.to_thread(init_db),
+        llm.warm_up(),
+        asyncio.to_thread(get_workflow),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            # logged, not raised: the app still starts, and get_workflow() retries on first use
+            print("[DEBUG] startup step failed:", result)
+
+
+async def shutdown():
+    from config import llm
+
+    await llm.aclose()
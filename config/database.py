@@ -1,9 +1,12 @@
+from contextlib import contextmanager
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
 import os
+import threading
 from dotenv import load_dotenv
 
-load_dotenv() 
+load_dotenv()
 
 from sqlalchemy.orm import DeclarativeBase
 
@@ -12,12 +15,107 @@ class Base(DeclarativeBase):
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL is not set or could not be loaded")
+# Pool settings. Connections are recycled before the server/LB would drop them,
+# so the per-checkout pre-ping round-trip is off unless explicitly enabled.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "0") == "1"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def engine_options(url: str) -> dict:
+    backend = make_url(url).get_backend_name()
+
+    if backend == "sqlite":
+        # sessions are handed to worker threads, and the driver has no statement timeout
+        return {
+            "connect_args": {"check_same_thread": False, "timeout": DB_STATEMENT_TIMEOUT_MS / 1000},
+            "pool_pre_ping": DB_POOL_PRE_PING,
+        }
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if backend == "postgresql" and DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# expire_on_commit=False: services return committed rows without an extra reload query
+_session_factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+def get_engine():
+    """
+    The engine is created on first use, so importing models or the app does
+    not need a database (or DATABASE_URL) until something actually queries.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if not DATABASE_URL:
+                    raise ValueError("DATABASE_URL is not set or could not be loaded")
+                engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+                _session_factory.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+
+def __getattr__(name):
+    # `from config.database import engine` keeps working, lazily
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def SessionLocal() -> Session:
+    get_engine()
+    return _session_factory()
+
+
+def init_db():
+    """
+    Creates the engine (opening the first pooled connection) and any missing
+    tables. Called from the app's startup hook.
+    """
+    import models  # noqa: F401  (registers every table on Base.metadata)
+
+    Base.metadata.create_all(bind=get_engine())
+
+
+def get_db():
+    """
+    FastAPI dependency: one session (one pooled connection) per request.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def use_session(db: Session = None):
+    """
+    Reuse the caller's request-scoped session if there is one,
+    otherwise open a session just for this block.
+    """
+    if db is not None:
+        yield db
+        return
+
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,236 @@
+"""
+Process-wide LLM client registry.
+
+Clients are built lazily on first use and then shared by every agent, tool and
+route. Groq clients reuse one pooled httpx client (sync and async) with
+keep-alive, so TLS handshakes happen once per worker instead of per request.
+warm_up() opens those connections at startup.
+
+Async connections belong to the event loop that opened them, so the async
+httpx client is kept per running loop, like the concurrency slots. Groq
+clients are built outside any loop (graph compile runs in a thread) and keep
+the client they were handed; that client goes to the first loop that asks
+for one, so callers that start several loops (asyncio.run per call) must
+not expect the Groq clients to follow them.
+
+Settings (env):
+    LLM_TIMEOUT            request timeout in seconds (default 30)
+    LLM_MAX_RETRIES        client-side retries (default 2)
+    LLM_MAX_CONCURRENCY    in-flight calls per model (default 16)
+    LLM_CONCURRENCY        per-model overrides, e.g. "llama-3.3-70b=8,gemini-2.0-flash=32"
+    LLM_POOL_SIZE          max pooled connections per HTTP client (default 50)
+"""
+import asyncio
+import os
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "50"))
+
+GROQ_MODELS_URL = "https://api.groq.com/openai/v1/models"
+
+# langchain_groq pulls in the Groq SDK and most of langchain_core; it is
+# imported by the first get_groq() call rather than at app import
+ChatGroq = None
+
+_lock = threading.RLock()
+_clients = {}
+_sync_slots = {}
+_async_slots = weakref.WeakKeyDictionary()
+_async_http = weakref.WeakKeyDictionary()
+
+
+def _parse_limits(raw: str) -> dict:
+    limits = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        model, _, value = item.partition("=")
+        limits[model.strip()] = int(value)
+    return limits
+
+
+_MODEL_LIMITS = _parse_limits(os.getenv("LLM_CONCURRENCY", ""))
+
+
+def concurrency_limit(model: str) -> int:
+    return _MODEL_LIMITS.get(model, LLM_MAX_CONCURRENCY)
+
+
+def _cached(key, factory):
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_POOL_SIZE,
+        max_keepalive_connections=LLM_POOL_SIZE,
+        keepalive_expiry=120,
+    )
+
+
+def get_http_client() -> httpx.Client:
+    return _cached("http", lambda: httpx.Client(timeout=LLM_TIMEOUT, limits=_limits()))
+
+
+def _new_async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(timeout=LLM_TIMEOUT, limits=_limits())
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Pooled async client for the running event loop. Outside a loop, the
+    client handed to the Groq clients, adopted by the first loop that asks.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _cached("ahttp", _new_async_http_client)
+
+    client = _async_http.get(loop)
+    if client is None:
+        with _lock:
+            client = _async_http.get(loop)
+            if client is None:
+                client = _clients.pop("ahttp", None) or _new_async_http_client()
+                _async_http[loop] = client
+    return client
+
+
+def groq_configured() -> bool:
+    return bool(os.getenv("MODEL_NAME") and os.getenv("GROQ_API_KEY"))
+
+
+def _chat_groq_class():
+    global ChatGroq
+    if ChatGroq is None:
+        from langchain_groq import ChatGroq as chat_groq
+        ChatGroq = chat_groq
+    return ChatGroq
+
+
+def get_groq(temperature: float = 0.0, model_name: str = None):
+    model_name = model_name or os.getenv("MODEL_NAME")
+    api_key = os.getenv("GROQ_API_KEY")
+    if not model_name or not api_key:
+        raise ValueError("MODEL_NAME or GROQ_API_KEY missing in environment variables.")
+
+    return _cached(("groq", model_name, temperature), lambda: _chat_groq_class()(
+        model_name=model_name,
+        api_key=api_key,
+        temperature=temperature,
+        timeout=LLM_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    ))
+
+
+def get_gemini_model(model_name: str = None):
+    """
+    google.generativeai model (used for response polish).
+    """
+    model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+    def build():
+        import google.generativeai as genai
+
+        _cached("genai_configured", lambda: genai.configure(api_key=os.getenv("GEMINI_API_KEY")) or True)
+        return genai.GenerativeModel(model_name)
+
+    return _cached(("gemini", model_name), build)
+
+
+def gemini_request_options() -> dict:
+    return {"timeout": LLM_TIMEOUT}
+
+
+def get_genai_client():
+    """
+    google.genai client (used for bill image extraction).
+    """
+    def build():
+        from google import genai
+        from google.genai import types
+
+        return genai.Client(http_options=types.HttpOptions(
+            timeout=int(LLM_TIMEOUT * 1000),
+            retry_options=types.HttpRetryOptions(attempts=LLM_MAX_RETRIES + 1),
+        ))
+
+    return _cached("genai_client", build)
+
+
+@contextmanager
+def llm_slot_sync(model: str):
+    """
+    Caps in-flight calls per model for sync callers (threads).
+    """
+    with _lock:
+        slot = _sync_slots.get(model)
+        if slot is None:
+            slot = _sync_slots[model] = threading.BoundedSemaphore(concurrency_limit(model))
+    with slot:
+        yield
+
+
+@asynccontextmanager
+async def llm_slot(model: str):
+    """
+    Caps in-flight calls per model on the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    slots = _async_slots.setdefault(loop, {})
+    slot = slots.get(model)
+    if slot is None:
+        slot = slots[model] = asyncio.Semaphore(concurrency_limit(model))
+    async with slot:
+        yield
+
+
+async def warm_up():
+    """
+    Build the clients and open pooled connections before the first request.
+    Failures are logged, not raised: a missing key should not block startup.
+    """
+    try:
+        if groq_configured():
+            get_groq(0.0)
+            get_groq(0.2)
+            headers = {"Authorization": f"Bearer {os.getenv('GROQ_API_KEY')}"}
+            await get_async_http_client().get(GROQ_MODELS_URL, headers=headers)
+            await asyncio.to_thread(get_http_client().get, GROQ_MODELS_URL, headers=headers)
+        if os.getenv("GEMINI_API_KEY"):
+            get_gemini_model()
+            get_genai_client()
+    except Exception as e:
+        print("[DEBUG] LLM warm-up failed:", e)
+
+
+async def aclose():
+    client = _async_http.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+    client = _clients.pop("ahttp", None)
+    if client is not None:
+        await client.aclose()
+    client = _clients.pop("http", None)
+    if client is not None:
+        client.close()
+    with _lock:
+        for key in [k for k in _clients if isinstance(k, tuple) and k[0] == "groq"]:
+            del _clients[key]
@@ -1,5 +1,11 @@
+import operator
+import re
+from contextlib import nullcontext
+
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
+from langgraph.types import Send
 
 from mcp.agents.budget_agent import BudgetAgent
 from mcp.agents.payment_agent import PaymentAgent
@@ -7,13 +13,20 @@ from mcp.agents.intent_agent import IntentAgent
 from mcp.agents.investment_agent import InvestmentAgent
 from mcp.agents.transaction_agent import TransactionAgent
 # from mcp.agents.debt_agent import DebtAgent
-from typing import TypedDict, Any
+from typing import Annotated, TypedDict, Any
 from config.constants import DYNAMIC_STOCKS
+from config.database import use_session
+from mcp.agents.base_agent import request_session
 
 class GraphState(TypedDict):
     input: str
     intent: str
     params: dict
+    # one {"index", "intent", "params"} per intent found in the message
+    tasks: list
+    # appended to by the agent branches, which may run in parallel
+    results: Annotated[list, operator.add]
+    data: Any
     result: Any
 
 def create_state():
@@ -21,31 +34,35 @@ def create_state():
         "input": "",
         "intent": "",
         "params": {},
+        "tasks": [],
+        "results": [],
+        "data": None,
         "result": None,
     }
 
-def route_intent(state: GraphState):
-    intent = state["intent"]
-
+def route_intent(intent: str) -> str:
+    """
+    Name of the agent node that handles `intent`.
+    """
     if intent in ["set_budget", "update_budget", "get_budgets", "remaining_budgets", "show_budgets", "list_budgets", "what_are_my_budgets"]:
-        return {"next": "budget"}
+        return "budget"
     elif intent == "send_money":
-        return {"next": "payment"}
+        return "payment"
     elif intent in [
         "portfolio_value", "stock_pnl", "portfolio_optimize", "portfolio_strategy",
         "portfolio_advice", "portfolio_rebalancing", "portfolio_review"
     ]:
-        return {"next": "investment"}
-    elif intent in ["get_expenses", "create_expenses", "update_expenses", "delete_expenses", "create_income", "update_income", "delete_income", "get_income", "get_transactions"]:
-        return {"next": "transactions"}
+        return "investment"
+    elif intent in ["get_expenses", "create_expenses", "update_expenses", "delete_expenses", "create_income", "update_income", "delete_income", "get_income", "get_transactions", "forecast_balance"]:
+        return "transactions"
     # elif intent in [
     #     "get_debts", "create_debt", "update_debt", "delete_debt",
     #     "loan_details", "emi_details", "emi_status", "missed_emis",
     #     "debt_summary", "creditworthiness", "repayment_strategy"
     # ]:
-    #     return {"next": "debts"}
+    #     return "debts"
     else:
-        return {"next": "unknown"} 
+        return "unknown"
 
 
 def build_graph():
@@ -53,7 +70,7 @@ def build_graph():
 
     # Instantiate agents
     intents = [
-        "set_budget", "update_budget", "get_budgets", "remaining_budger","show_budgets", "list_budgets", "what_are_my_budgets", "send_money", "check_balance", "portfolio_value", "stock_pnl",
+        "set_budget", "update_budget", "get_budgets", "remaining_budgets", "show_budgets", "list_budgets", "what_are_my_budgets", "send_money", "check_balance", "forecast_balance", "portfolio_value", "stock_pnl",
         "portfolio_strategy", "portfolio_advice", "portfolio_rebalancing", "portfolio_review", "portfolio_optimize", 
         "get_transactions", "create_expenses", "update_expenses", "delete_expenses", "create_income", "update_income", "delete_income", "get_debts", "create_debt", "update_debt", "delete_debt",
         "loan_details", "emi_details", "missed_emis",
@@ -66,63 +83,103 @@ def build_graph():
     transaction_agent = TransactionAgent()
     # debt_agent = DebtAgent()
 
-    def intent_node(state: GraphState):
-        intent, entities, conf = intent_agent.classify(state["input"])
+    def enrich_entities(intent: str, entities: dict, text: str):
         # For stock_pnl, try to extract stock name from input
         if intent == "stock_pnl":
             stock = None
             for s in DYNAMIC_STOCKS:
-                if s in state["input"].lower():
+                if s in text.lower():
                     stock = s.upper() if s != "infy" else "INFY"
                     break
             entities["stock"] = stock if stock else "RELIANCE"
         if intent == "portfolio_optimize":
             # Try to extract expenses from input
-            import re
-            match = re.search(r"(\d{3,})", state["input"])
+            match = re.search(r"(\d{3,})", text)
             if match:
                 entities["expenses"] = int(match.group(1))
                 entities["amount"] = float(match.group(1))
             else:
                 entities["expenses"] = 0
                 entities["amount"] = None
+        return entities
+
+    async def intent_node(state: GraphState):
+        classified = await intent_agent.aclassify_many(state["input"])
+        tasks = [
+            {
+                "index": i,
+                "intent": intent,
+                # entities come from the clause, so enrich against it
+                "params": enrich_entities(intent, entities, entities.get("raw_description") or state["input"]),
+            }
+            for i, (intent, entities, conf) in enumerate(classified)
+        ]
         return {
-            "intent": intent,
-            "params": entities,
+            "intent": tasks[0]["intent"],
+            "params": tasks[0]["params"],
+            "tasks": tasks,
         }
 
-    def unknown_node(state):
-        return {"result": "Sorry, I didn't understand your request."}
+    async def unknown_agent(state, config: RunnableConfig = None):
+        return {"data": None, "result": "Sorry, I didn't understand your request."}
+
+    agents = {
+        "budget": budget_agent.arun,
+        "payment": payment_agent.arun,
+        "investment": investment_agent.arun,
+        "transactions": transaction_agent.arun,
+        "unknown": unknown_agent,
+    }
+
+    def fan_out(state: GraphState):
+        """
+        One Send per agent, so different agents run in parallel. Tasks for the
+        same agent stay in one branch and run in message order, since later
+        ones may depend on earlier ones ("add 300 for food and show my expenses").
+        """
+        groups = {}
+        for task in state["tasks"]:
+            groups.setdefault(route_intent(task["intent"]), []).append(task)
+
+        isolated = len(groups) > 1
+        return [
+            Send(node, {"input": state["input"], "tasks": tasks, "isolated": isolated})
+            for node, tasks in groups.items()
+        ]
+
+    def branch(run):
+        async def node(state: dict, config: RunnableConfig = None):
+            config = config or {}
+            # a Session is not thread-safe, so parallel branches each open their own
+            with (use_session(None) if state.get("isolated") else nullcontext(request_session(config))) as db:
+                branch_config = {**config, "configurable": {**config.get("configurable", {}), "db": db}}
+                results = []
+                for task in state["tasks"]:
+                    out = await run({"input": state["input"], "intent": task["intent"], "params": task["params"]}, branch_config)
+                    results.append({**task, "data": out.get("data"), "result": out["result"]})
+            return {"results": results}
+        return node
+
+    def merge_node(state: GraphState):
+        results = sorted(state["results"], key=lambda r: r["index"])
+        if len(results) == 1:
+            return {"data": results[0]["data"], "result": results[0]["result"]}
+        return {
+            "data": [r["data"] for r in results],
+            "result": "\n".join(str(r["result"]) for r in results),
+        }
 
     # --- Nodes ---
     g.add_node("intent", intent_node)
-    g.add_node("budget", budget_agent.run)
-    g.add_node("payment", payment_agent.run)
-    g.add_node("investment", investment_agent.run)
-    g.add_node("transactions", transaction_agent.run)
-    g.add_node("unknown", unknown_node)
-
-    # --- Router node ---
-    g.add_node("route", route_intent)
+    for name, run in agents.items():
+        g.add_node(name, branch(run))
+    g.add_node("merge", merge_node)
 
     # --- Wiring ---
     g.set_entry_point("intent")
-    g.add_edge("intent", "route")
-    g.add_conditional_edges(
-        "route",
-        lambda state: state["next"],
-        {
-            "budget": "budget",
-            "payment": "payment",
-            "investment": "investment",
-            "transactions": "transactions",
-            "unknown": "unknown",
-        }
-    )
-    g.add_edge("budget", END)
-    g.add_edge("payment", END)
-    g.add_edge("investment", END)
-    g.add_edge("transactions", END)
-    g.add_edge("unknown", END)
+    g.add_conditional_edges("intent", fan_out, list(agents))
+    for name in agents:
+        g.add_edge(name, "merge")
+    g.add_edge("merge", END)
 
     return g.compile()
@@ -0,0 +1,63 @@
+"""
+Server-sent events for the /chat/stream endpoint.
+
+Runs the compiled graph with astream() and forwards, in order:
+    intent  -> classified intent and params (plus every task, for multi-intent
+               messages), as soon as the intent node finishes
+    result  -> the raw structured tool result, before any LLM rendering; one
+               per agent branch
+    token   -> LLM text chunks as they arrive (Groq via "messages", Gemini polish via "custom")
+    done    -> the final response text
+"""
+import json
+
+from langchain_core.runnables import RunnableConfig
+
+STREAM_MODES = ["updates", "messages", "custom"]
+
+# nodes whose LLM tokens are internal and must not reach the user
+SILENT_NODES = {"intent", "merge"}
+
+
+def stream_tokens_requested(config: RunnableConfig = None) -> bool:
+    return bool((config or {}).get("configurable", {}).get("stream_tokens"))
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+
+async def stream_chat(workflow, message: str, db=None):
+    final = None
+    config = {"configurable": {"stream_tokens": True, "db": db}}
+
+    try:
+        async for mode, chunk in workflow.astream({"input": message}, config=config, stream_mode=STREAM_MODES):
+            if mode == "updates":
+                for node, update in chunk.items():
+                    if not update:
+                        continue
+                    if node == "intent":
+                        yield sse("intent", {"intent": update.get("intent"), "params": update.get("params"),
+                                             "tasks": update.get("tasks")})
+                    elif "result" in update:
+                        final = update["result"]
+
+            elif mode == "messages":
+                message_chunk, metadata = chunk
+                if metadata.get("langgraph_node") in SILENT_NODES:
+                    continue
+                if message_chunk.content:
+                    yield sse("token", {"text": message_chunk.content})
+
+            elif mode == "custom":
+                if chunk.get("event") == "data":
+                    yield sse("result", {"node": chunk.get("node"), "data": chunk.get("data")})
+                elif chunk.get("event") == "token":
+                    yield sse("token", {"text": chunk.get("text")})
+
+    except Exception as e:
+        print("[DEBUG] chat stream failed:", e)
+        yield sse("error", {"message": str(e)})
+
+    yield sse("done", {"response": final})
@@ -1,45 +1,100 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 
 # ---- Import DB + Models ----
-from config.database import Base, engine
+from config.database import SessionLocal, get_db
 import models
 
-# ---- Import Workflow Graph Builder ----
-from graph.graph_builder import build_graph
+# ---- Workflow container (built at startup, not at import) ----
+from config import container
 
 # ---- Import Routers ----
 from routes.budget_routes import router as budget_routes
 from routes.investment_routes import router as investment_routes
+from routes.payment_routes import router as payment_routes
 from routes.transaction_routes import router as transaction_routes
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # tables, pooled LLM connections and the compiled graph, before the first request
+    await container.startup()
+    yield
+    await container.shutdown()
+
+
 app = FastAPI(
     title="Financial AI Agent API",
     description="HTTP endpoint for the Financial AI conversational agent",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.include_router(budget_routes)
 app.include_router(investment_routes)
+app.include_router(payment_routes)
 app.include_router(transaction_routes)
 
-Base.metadata.create_all(bind=engine)
-
-workflow = build_graph()
-
 class ChatRequest(BaseModel):
     message: str
 
 @app.post("/chat")
-async def chat_agent(request: ChatRequest):
+async def chat_agent(request: ChatRequest, db: Session = Depends(get_db)):
     """
     Send a message to the Financial AI Agent and get a response.
+    All DB work in the turn shares the request's session.
     """
-    result = workflow.invoke({"input": request.message})
+    workflow = container.get_workflow()
+    result = await workflow.ainvoke({"input": request.message}, config={"configurable": {"db": db}})
     return {"response": result}
 
 
+@app.post("/chat/stream")
+async def chat_agent_stream(request: ChatRequest):
+    """
+    Same as /chat, but streams server-sent events: intent, raw tool result,
+    LLM tokens, then done with the final response.
+    """
+    from graph.streaming import stream_chat
+
+    workflow = container.get_workflow()
+
+    async def events():
+        # the session must outlive the handler, so the stream owns it
+        db = SessionLocal()
+        try:
+            async for event in stream_chat(workflow, request.message, db=db):
+                yield event
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/chat/metrics")
+async def chat_metrics():
+    """
+    Intent resolution stats: fast-path hit rate, latency per source and cache counters.
+    """
+    from mcp.agents.fast_intent import INTENT_METRICS
+    from mcp.agents.intent_agent import get_intent_cache
+    from mcp.agents.investment_agent import get_answer_cache
+
+    return {
+        **INTENT_METRICS.snapshot(),
+        "cache": get_intent_cache().stats(),
+        "investment_cache": get_answer_cache().stats(),
+    }
+
+
 @app.get("/")
 async def root():
     return {"message": "Financial AI Agent API is running. Use POST /chat to interact."}
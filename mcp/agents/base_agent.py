@@ -1,10 +1,17 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+import asyncio
 import os
 
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+
+from config.llm import get_groq, groq_configured, llm_slot_sync
+from graph.streaming import stream_tokens_requested
+from mcp.tools.renderer import arender, astream_polish, render
+
 load_dotenv()
 
 class ToneEmotionSchema(BaseModel):
@@ -12,6 +19,14 @@ class ToneEmotionSchema(BaseModel):
     tone: str = Field(..., description="Tone/Style of the query (e.g., urgent, polite, casual)")
 
 
+def request_session(config: RunnableConfig = None):
+    """
+    The request-scoped DB session passed in the run config, if any:
+    workflow.ainvoke(state, config={"configurable": {"db": db}})
+    """
+    return (config or {}).get("configurable", {}).get("db")
+
+
 class BaseAgent:
     def __init__(self, name: str):
         self.name = name
@@ -19,12 +34,8 @@ class BaseAgent:
         self.model_name = os.getenv("MODEL_NAME")
         self.groq_api_key = os.getenv("GROQ_API_KEY")
 
-        if self.model_name and self.groq_api_key:
-            self.llm = ChatGroq(
-                model_name=self.model_name, 
-                api_key=self.groq_api_key, 
-                temperature=0.0
-            )
+        if groq_configured():
+            self.llm = get_groq(temperature=0.0)
             self._tone_parser = PydanticOutputParser(pydantic_object=ToneEmotionSchema)
 
             self._tone_prompt = PromptTemplate(
@@ -61,7 +72,8 @@ class BaseAgent:
         
         try:
         # llm_resp = self.llm.invoke([{"role": "user", "content": prompt}])
-            llm_resp = self.llm.invoke(prompt)
+            with llm_slot_sync(self.model_name):
+                llm_resp = self.llm.invoke(prompt)
             # raw_text = raw.generations[0][0].text
             raw_text = llm_resp.content
             parsed = self._tone_parser.parse(raw_text)
@@ -77,12 +89,48 @@ class BaseAgent:
             }        
 
 
-    def run(self, *args, **kwargs):
+    def execute(self, state: dict, db=None) -> dict:
+        """
+        Call the agent's tool for state["intent"] and return its structured result.
+        `db` is the request-scoped session, if the caller provided one.
+        Should be overridden by subclasses.
+        """
+        raise NotImplementedError(f"{self.name}.execute() not implemented")
+
+    async def aexecute(self, state: dict, db=None) -> dict:
+        """
+        Async counterpart of execute(). The default pushes execute() to a worker
+        thread, since the tools behind it use the sync DB session; agents whose
+        tools are natively async override this instead.
+        """
+        return await asyncio.to_thread(self.execute, state, db)
+
+    def run(self, state: dict, config: RunnableConfig = None):
         """
-        Default agent behavior. Should be overridden by subclasses.
+        Default agent behavior: execute the tool and render its result.
         In LangGraph, this method is what the graph node executes.
         """
-        raise NotImplementedError(f"{self.name}.run() not implemented")
+        data = self.execute(state, db=request_session(config))
+        return {"data": data, "result": render(data)}
+
+    async def arun(self, state: dict, config: RunnableConfig = None):
+        """
+        Async graph node, built on aexecute(). When streaming, the raw result
+        and the rendered text chunks are pushed to the stream writer as soon
+        as they exist.
+        """
+        data = await self.aexecute(state, request_session(config))
+        if not stream_tokens_requested(config):
+            return {"data": data, "result": await arender(data)}
+
+        writer = get_stream_writer()
+        writer({"event": "data", "node": self.name, "data": data})
+
+        text = ""
+        async for chunk in astream_polish(render(data)):
+            text += chunk
+            writer({"event": "token", "text": chunk})
+        return {"data": data, "result": text.strip()}
 
     def __repr__(self):
         return f"<Agent: {self.name}>"
\ No newline at end of file
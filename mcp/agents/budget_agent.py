@@ -3,6 +3,7 @@ from datetime import datetime
 from mcp.tools.budget_tools import (
     create_budget_tool,
     get_budgets_tool,
+    get_remaining_budgets_tool,
     update_budget_tool
 )
 
@@ -10,35 +11,33 @@ class BudgetAgent(BaseAgent):
     def __init__(self):
         super().__init__("BudgetAgent")
 
-    def run(self, state: dict):
+    def execute(self, state: dict, db=None):
         print("[DEBUG] state received:", state)
 
         intent = state["intent"]
         params = state["params"]
 
         if intent == "set_budget":
-            if intent == "set_budget":
-                return {
-                    "result": create_budget_tool(
-                        user_id=1,
-                        category=params.get("category") or "miscellaneous",
-                        max_limit=params.get("amount")
-                    )
-                }
+            return create_budget_tool(
+                user_id=1,
+                category=params.get("category") or "miscellaneous",
+                max_limit=params.get("amount"),
+                db=db
+            )
 
         elif intent in ["get_budgets", "show_budgets", "list_budgets", "what are my budgets"]:
-            return {
-                "result": get_budgets_tool(user_id=1)
-            }
+            return get_budgets_tool(user_id=1, db=db)
+
+        elif intent == "remaining_budgets":
+            return get_remaining_budgets_tool(user_id=1, time_period=params.get("time_period"), db=db)
 
         elif intent == "update_budget":
-            return {
-                "result": update_budget_tool(
-                    user_id=1,
-                    category=params.get("category") or "miscellaneous",
-                    amount=params.get("amount")
-                )
-            }
+            return update_budget_tool(
+                user_id=1,
+                category=params.get("category") or "miscellaneous",
+                amount=params.get("amount"),
+                db=db
+            )
 
         else:
-            return {"error": "Unknown budget intent"}
+            return {"kind": "error", "action": "handle that budget request", "message": "unknown budget intent"}
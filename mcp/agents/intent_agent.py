@@ -1,21 +1,31 @@
+import asyncio
 import os
 import re
+import time
 from typing import Optional, Dict, Tuple, List
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
-from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 
-from datetime import datetime, timedelta
-import calendar
+from mcp.agents.fast_intent import (
+    FastIntentClassifier,
+    INTENT_METRICS,
+    extract_amount,
+    extract_category,
+    extract_payee,
+)
+
+from config.llm import get_groq, groq_configured, llm_slot, llm_slot_sync
+from utils.cache import build_cache
 
 load_dotenv()
 
-from datetime import datetime, timedelta
 import calendar
 
+from utils import periods
+
 def extract_time_period(text: str):
     text = text.lower()
     # explicit month names
@@ -23,19 +33,78 @@ def extract_time_period(text: str):
         if idx == 0:
             continue
         if month.lower() in text:
-            year = datetime.now().year
+            year = periods.now().year
             return f"{year}-{idx:02d}"
 
-    # implicit
+    # implicit, in budget months
     if "this month" in text:
-        return datetime.now().strftime("%Y-%m")
+        return periods.current_period()
     if "next month" in text:
-        next_month = (datetime.now().replace(day=1) + timedelta(days=32))
-        return next_month.strftime("%Y-%m")
+        return periods.next_period()
 
     return None
 
 
+_AMOUNT_TOKEN_RE = re.compile(r"(?:₹|\brs\.?|\binr)?\s*\d+(?:[.,]\d+)*\s*k?\b", re.IGNORECASE)
+_PUNCT_RE = re.compile(r"[^\w<>\s]")
+
+# "add 300 for food and show my budgets" -> two clauses
+_CLAUSE_SPLIT_RE = re.compile(r"(\s*(?:;|,?\s+\b(?:and then|and also|and|then|also|plus)\b)\s+)", re.IGNORECASE)
+# a clause only stands on its own if it starts like a request
+_CLAUSE_START_RE = re.compile(
+    r"^(?:please\s+|i\s+(?:also\s+|have\s+|just\s+)?|can you\s+)?"
+    r"(?:show|list|view|display|add|set|create|make|log|record|spent|spend|paid|pay|send|transfer|received|"
+    r"earned|got|bought|update|change|increase|raise|lower|reduce|delete|remove|undo|check|what|how|which|"
+    r"when|review|rebalance|optimi[sz]e|suggest|give|tell|forecast)\b",
+    re.IGNORECASE,
+)
+MAX_INTENTS = 4
+
+
+def starts_request(clause: str) -> bool:
+    return bool(_CLAUSE_START_RE.match(clause))
+
+
+def split_clauses(text: str, stands_alone=starts_request) -> List[str]:
+    """
+    Splits on "and", "then", ";" and the like, but only where the next
+    fragment stands on its own: "spent 300 on bread and butter" and
+    "pay 500 to Ram and Shyam" stay one clause.
+    """
+    pieces = _CLAUSE_SPLIT_RE.split(text)
+    clauses = [pieces[0]]
+    for separator, part in zip(pieces[1::2], pieces[2::2]):
+        if stands_alone(part.strip(" ,.")):
+            clauses.append(part)
+        else:
+            clauses[-1] += separator + part
+    clauses = [c.strip(" ,.") for c in clauses]
+    return [c for c in clauses if c]
+
+_intent_cache = None
+
+
+def get_intent_cache():
+    global _intent_cache
+    if _intent_cache is None:
+        _intent_cache = build_cache(
+            "intent",
+            maxsize=int(os.getenv("INTENT_CACHE_SIZE", "2048")),
+            ttl=float(os.getenv("INTENT_CACHE_TTL", "86400")),
+        )
+    return _intent_cache
+
+
+def normalize_utterance(text: str) -> str:
+    """
+    Cache key for an utterance: amounts masked, punctuation and case dropped,
+    so "Spent ₹200 on food!" and "spent 350 on food" share an entry.
+    """
+    text = _AMOUNT_TOKEN_RE.sub(" <num> ", text.lower())
+    text = _PUNCT_RE.sub(" ", text)
+    return " ".join(text.split())
+
+
 class IntentSchema(BaseModel):
     intent: str
     amount: Optional[float] = None
@@ -49,20 +118,20 @@ class IntentAgent:
         self.intents = intents or []
 
         self.model_name = os.getenv("MODEL_NAME")
-        api_key = os.getenv("GROQ_API_KEY")
-
-        if api_key is None:
-            raise ValueError("GROQ_API_KEY is missing in environment variables.")
-
-        self.llm = ChatGroq(
-            model_name=self.model_name,
-            api_key=api_key,
-            temperature=0.0
-        )
+        # without Groq credentials only the fast path and the cache can answer
+        self.llm = get_groq(temperature=0.0) if groq_configured() else None
 
         self.parser = PydanticOutputParser(pydantic_object=IntentSchema)
 
-        self.prompt = PromptTemplate(
+        # Local rules + TF-IDF model; the LLM only sees low-confidence utterances.
+        self.fast_path = None
+        if os.getenv("INTENT_FAST_PATH", "1") != "0":
+            self.fast_path = FastIntentClassifier(
+                self.intents,
+                threshold=float(os.getenv("INTENT_FAST_PATH_THRESHOLD", "0.6"))
+            )
+
+        prompt = PromptTemplate(
             input_variables=["text", "intents_list", "parser_schema"],
             template=(
                 """ 
@@ -87,55 +156,188 @@ class IntentAgent:
                 """
             )
         )
+        # intents and schema never change per agent, so bind them once
+        self.prompt = prompt.partial(
+            intents_list=", ".join(self.intents),
+            parser_schema=self.parser.get_format_instructions()
+        )
 
-    def classify(self, text: str) -> Tuple[str, Dict, float]:
-        # intents_list = ", ".join([it["intent"] for it in self.intents]) if self.intents else "send_money, set_budget, unknown"
-        intents_list = ", ".join(self.intents)
-        schema_text = self.parser.get_format_instructions()
-        # print("[DEBUG] schema_text:", schema_text)
-
-        prompt_text = self.prompt.format(
-            text=text,
-            intents_list=intents_list,
-            parser_schema=schema_text
+        self.cache = get_intent_cache() if os.getenv("INTENT_CACHE", "1") != "0" else None
+
+    def _build_prompt(self, text: str) -> str:
+        return self.prompt.format(text=text)
+
+    def _parse_response(self, out: str, text: str) -> Tuple[str, Dict, float]:
+        # extract first JSON object
+        json_match = re.search(r"\{.*\}", out, re.DOTALL)
+
+        if json_match:
+            out = json_match.group(0)
+        else:
+            raise ValueError("No JSON found in LLM output")
+
+        parsed = self.parser.parse(out)
+        category = parsed.category or parsed.payee
+        time_period = extract_time_period(text)
+
+        entities = {
+            "amount": parsed.amount,
+            "category": category,
+            "payee": parsed.payee,
+            "time_period": time_period,
+            "raw_description": text,
+            "is_recurring": False
+        }
+
+        return (
+            parsed.intent,
+            entities,
+            float(parsed.confidence) if parsed.confidence else 0.85
         )
 
+    def _fallback(self, e: Exception) -> Tuple[str, Dict, float]:
+        print("[DEBUG] LLM FAILED!!!!!!!!!")
+        print("[DEBUG] e:", e)
+        # fallback if LLM fails
+        return "unknown", {"amount": None, "payee": None}, 0.0
+
+    def _local_entities(self, text: str) -> Dict:
+        payee = extract_payee(text)
+        return {
+            "amount": extract_amount(text),
+            "category": extract_category(text) or payee,
+            "payee": payee,
+            "time_period": extract_time_period(text),
+            "raw_description": text,
+            "is_recurring": False
+        }
+
+    def _fast_classify(self, text: str) -> Optional[Tuple[str, Dict, float]]:
+        if not self.fast_path:
+            return None
+
+        start = time.perf_counter()
+        try:
+            hit = self.fast_path.predict(text)
+        except Exception as e:
+            print("[DEBUG] fast path failed:", e)
+            hit = None
+
+        if not hit:
+            return None
+
+        intent, confidence, source = hit
+        result = (intent, self._local_entities(text), confidence)
+        INTENT_METRICS.record(source, time.perf_counter() - start)
+        return result
+
+    def _cache_key(self, text: str) -> str:
+        return f"{self.model_name}:{normalize_utterance(text)}"
+
+    def _cached_classify(self, text: str) -> Optional[Tuple[str, Dict, float]]:
+        if self.cache is None:
+            return None
+
+        start = time.perf_counter()
+        try:
+            hit = self.cache.get(self._cache_key(text))
+        except Exception as e:
+            print("[DEBUG] intent cache unavailable:", e)
+            return None
+
+        if hit is None:
+            return None
+
+        # amounts were masked out of the key, so take them from this utterance
+        entities = {
+            "amount": extract_amount(text),
+            "category": hit["category"],
+            "payee": hit["payee"],
+            "time_period": extract_time_period(text),
+            "raw_description": text,
+            "is_recurring": False
+        }
+        INTENT_METRICS.record("cache", time.perf_counter() - start)
+        return hit["intent"], entities, hit["confidence"]
+
+    def _remember(self, text: str, result: Tuple[str, Dict, float]):
+        if self.cache is None:
+            return
+
+        intent, entities, confidence = result
+        try:
+            self.cache.set(self._cache_key(text), {
+                "intent": intent,
+                "category": entities.get("category"),
+                "payee": entities.get("payee"),
+                "confidence": confidence,
+            })
+        except Exception as e:
+            print("[DEBUG] intent cache unavailable:", e)
+
+    def classify(self, text: str) -> Tuple[str, Dict, float]:
+        fast = self._fast_classify(text) or self._cached_classify(text)
+        if fast:
+            return fast
+        if self.llm is None:
+            return self._fallback(ValueError("MODEL_NAME or GROQ_API_KEY missing in environment variables."))
+
+        start = time.perf_counter()
+        prompt_text = self._build_prompt(text)
+
         # print("[DEBUG] prompt_text:", prompt_text)
         try:
-            response = self.llm.invoke([prompt_text])
-            out = response.content
-            # print("[DEBUG] out:", out)
-
-            import re
-            # extract first JSON object
-            json_match = re.search(r"\{.*\}", out, re.DOTALL)
-
-            if json_match:
-                out = json_match.group(0)
-            else:
-                raise ValueError("No JSON found in LLM output")
-            
-            parsed = self.parser.parse(out)
-            category = parsed.category or parsed.payee
-            time_period = extract_time_period(text)
-        
-            entities = {
-                "amount": parsed.amount,
-                "category": category,
-                "payee": parsed.payee,
-                "time_period": time_period,
-                "raw_description": text,
-                "is_recurring": False
-            }
-
-            return (
-                parsed.intent,
-                entities,
-                float(parsed.confidence) if parsed.confidence else 0.85
-            )
+            with llm_slot_sync(self.model_name):
+                response = self.llm.invoke([prompt_text])
+            # print("[DEBUG] out:", response.content)
+            result = self._parse_response(response.content, text)
+            self._remember(text, result)
+            return result
+        except Exception as e:
+            return self._fallback(e)
+        finally:
+            INTENT_METRICS.record("llm", time.perf_counter() - start)
+
+    async def aclassify(self, text: str) -> Tuple[str, Dict, float]:
+        """
+        Non-blocking variant of classify() used by the async graph nodes.
+        """
+        fast = self._fast_classify(text) or self._cached_classify(text)
+        if fast:
+            return fast
+        if self.llm is None:
+            return self._fallback(ValueError("MODEL_NAME or GROQ_API_KEY missing in environment variables."))
 
+        start = time.perf_counter()
+        prompt_text = self._build_prompt(text)
+
+        try:
+            async with llm_slot(self.model_name):
+                response = await self.llm.ainvoke([prompt_text])
+            result = self._parse_response(response.content, text)
+            self._remember(text, result)
+            return result
         except Exception as e:
-            print("[DEBUG] LLM FAILED!!!!!!!!!")
-            print("[DEBUG] e:", e)
-            # fallback if LLM fails
-            return "unknown", {"amount": None, "payee": None}, 0.0
+            return self._fallback(e)
+        finally:
+            INTENT_METRICS.record("llm", time.perf_counter() - start)
+
+    def _stands_alone(self, clause: str) -> bool:
+        return starts_request(clause) or bool(self.fast_path and self.fast_path.match_rules(clause))
+
+    async def aclassify_many(self, text: str) -> List[Tuple[str, Dict, float]]:
+        """
+        Splits a message into clauses and classifies them concurrently, one
+        (intent, entities, confidence) per clause. Fragments that aren't a
+        request of their own ("pay Aditi and Rahul") stay with the clause
+        before them, and if any clause is still not understood, the message
+        is classified as a whole instead.
+        """
+        clauses = split_clauses(text, self._stands_alone)
+        if len(clauses) < 2 or len(clauses) > MAX_INTENTS:
+            return [await self.aclassify(text)]
+
+        results = await asyncio.gather(*(self.aclassify(c) for c in clauses))
+        if any(intent == "unknown" for intent, _, _ in results):
+            return [await self.aclassify(text)]
+        return list(results)
@@ -1,33 +1,169 @@
-from services.portfolio import get_stock_investments, portfolio_summary
-from langchain_groq import ChatGroq
+from services.holdings_store import get_holdings_store
+from services.portfolio import match_symbols, portfolio_summary, stock_pnl
+from services.portfolio_digest import portfolio_context
+from config.llm import get_groq, groq_configured, llm_slot, llm_slot_sync
+from mcp.tools.renderer import render
+from utils.cache import build_cache
+import asyncio
+import hashlib
+import json
 import os
 from config.constants import PROMPT_TEMPLATES
 
+# answered from the holdings directly, no LLM call
+NUMERIC_INTENTS = {"portfolio_value", "stock_pnl"}
+
+_answer_cache = None
+
+
+def get_answer_cache():
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = build_cache(
+            "investment",
+            maxsize=int(os.getenv("INVESTMENT_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("INVESTMENT_CACHE_TTL", "3600")),
+        )
+    return _answer_cache
+
+
+def numeric_answer(intent: str, params: dict, holdings) -> str:
+    if intent == "portfolio_value":
+        summary = portfolio_summary(holdings)
+        return render({
+            "kind": "portfolio_value",
+            **summary,
+            "direction": "up" if summary["net_pnl"] >= 0 else "down",
+            "net_pnl": abs(summary["net_pnl"]),
+            "returns_percent": abs(summary["returns_percent"]),
+        })
+
+    stock = params.get("stock")
+    if not stock:
+        return render({"kind": "error", "action": "look up that stock", "message": "no stock was named"})
+    matches = match_symbols(holdings, stock)
+    if not matches:
+        return render({"kind": "stock_not_held", "stock": stock.upper()})
+    if len(matches) > 1:
+        return render({"kind": "stock_ambiguous", "stock": stock.upper(), "items": ", ".join(matches)})
+    pnl = stock_pnl(holdings, matches[0])
+    return render({
+        "kind": "stock_pnl",
+        **pnl,
+        "direction": "up" if pnl["pnl"] >= 0 else "down",
+        "pnl": abs(pnl["pnl"]),
+        "pnl_percent": abs(pnl["pnl_percent"]),
+    })
+
 
 class InvestmentAgent:
     def __init__(self):
         self.model_name = os.getenv("MODEL_NAME")
         self.api_key = os.getenv("GROQ_API_KEY")
-        if not self.model_name or not self.api_key:
-            raise ValueError("MODEL_NAME or GROQ_API_KEY missing in environment variables.")
-        self.llm = ChatGroq(model_name=self.model_name, api_key=self.api_key, temperature=0.2)
+        # checked per request instead, so the app starts without credentials
+        self.llm = get_groq(temperature=0.2) if groq_configured() else None
+        self.cache = get_answer_cache() if os.getenv("INVESTMENT_CACHE", "1") != "0" else None
+
+    def _question(self, intent: str, params: dict):
+        """
+        The intent's template filled in from params; None when the intent has
+        no template or a param it needs is missing.
+        """
+        try:
+            return PROMPT_TEMPLATES[intent].format(**params)
+        except KeyError:
+            return None
 
-    def run(self, state: dict):
+    def _build_prompt(self, state: dict, portfolio: str):
         intent = state.get("intent")
         params = state.get("params", {})
+        question = self._question(intent, params)
+        if question is None:
+            return None
+
+        # Prepare context for LLM: the cached digest, not every holding
+        context = f"{portfolio}\nIntent: {intent}\nParams: {params}"
+        return context + "\n" + question
+
+    def _cache_key(self, intent: str, question: str, fingerprint: str) -> str:
+        """
+        Same question, holdings and model -> same answer. The question is the
+        formatted template, so the wording of the utterance (raw_description)
+        and params the template doesn't use don't split the cache.
+        """
+        raw = json.dumps([intent, question, fingerprint, self.model_name])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _prepare(self, state: dict, user_id: int):
+        """
+        (answer, None, None) when it needs no LLM call, (None, None, None)
+        when the request can't be answered, else (None, cache key, prompt).
+        Blocking: store reads and the cache.
+        """
+        intent = state.get("intent")
+        params = state.get("params", {})
+        store = get_holdings_store()
+
+        if intent in NUMERIC_INTENTS:
+            return numeric_answer(intent, params, store.holdings(user_id)), None, None
+
+        question = self._question(intent, params)
+        if question is None:
+            return None, None, None
+
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(intent, question, store.fingerprint(user_id))
+            try:
+                hit = self.cache.get(key)
+            except Exception as e:
+                print("[DEBUG] investment cache unavailable:", e)
+                hit = None
+            if hit is not None:
+                return hit, None, None
+
+        portfolio = portfolio_context(user_id, params.get("stock"))
+        return None, key, self._build_prompt(state, portfolio)
+
+    def _remember(self, key, answer: str):
+        if key is None:
+            return
+        try:
+            self.cache.set(key, answer)
+        except Exception as e:
+            print("[DEBUG] investment cache unavailable:", e)
+
+    def run(self, state: dict, config=None):
         user_id = 1  # static for mock
-        holdings_data = get_stock_investments(user_id)
-        holdings = holdings_data.get("holdings", [])
+        answer, key, prompt = self._prepare(state, user_id)
+        if answer is not None:
+            return {"result": answer}
+
+        if prompt and self.llm is None:
+            return {"result": "AI error: MODEL_NAME or GROQ_API_KEY missing in environment variables."}
+        if prompt:
+            try:
+                with llm_slot_sync(self.model_name):
+                    response = self.llm.invoke(prompt)
+                self._remember(key, response.content)
+                return {"result": response.content}
+            except Exception as e:
+                return {"result": f"AI error: {e}"}
+        return {"result": "Sorry, I didn't understand your investment request."}
 
-        # Prepare context for LLM
-        context = f"User holdings: {holdings}\nIntent: {intent}\nParams: {params}"
-        prompt = None
-        if intent in PROMPT_TEMPLATES:
-            prompt = context + "\n" + PROMPT_TEMPLATES[intent].format(**params)
+    async def arun(self, state: dict, config=None):
+        user_id = 1  # static for mock
+        answer, key, prompt = await asyncio.to_thread(self._prepare, state, user_id)
+        if answer is not None:
+            return {"result": answer}
 
+        if prompt and self.llm is None:
+            return {"result": "AI error: MODEL_NAME or GROQ_API_KEY missing in environment variables."}
         if prompt:
             try:
-                response = self.llm.invoke(prompt)
+                async with llm_slot(self.model_name):
+                    response = await self.llm.ainvoke(prompt)
+                await asyncio.to_thread(self._remember, key, response.content)
                 return {"result": response.content}
             except Exception as e:
                 return {"result": f"AI error: {e}"}
@@ -5,19 +5,22 @@ from mcp.tools.payment_tools import execute_payment
 class PaymentAgent(BaseAgent):
     def __init__(self):
         super().__init__("PaymentAgent")
-        self.tools = {
-            "execute_payment": execute_payment
-        }
 
-    def run(self, instruction: str, **kwargs):
+    async def aexecute(self, state: dict, db=None):
         """
-        The agent receives an instruction like:
-        - instruction="execute_payment", amount=500, payee="Aditi"
+        Payments await the gateway directly instead of holding a worker
+        thread for the HTTP round-trip.
         """
-        tool = self.tools.get(instruction)
+        intent = state["intent"]
+        params = state["params"]
 
-        if not tool:
-            return {"error": f"Unknown instruction: {instruction}"}
+        if intent == "send_money":
+            return await execute_payment(
+                amount=params.get("amount"),
+                payee=params.get("payee"),
+                category=params.get("category"),
+                user_id=1,
+                db=db
+            )
 
-        # Call the LangGraph Tool function
-        return tool.func(**kwargs)
+        return {"kind": "error", "action": "handle that payment request", "message": "unknown payment intent"}
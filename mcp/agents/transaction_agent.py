@@ -1,4 +1,5 @@
 from mcp.agents.base_agent import BaseAgent
+from services.transaction_services import month_range
 
 from mcp.tools.transaction_tools import (
     create_expense_tool,
@@ -7,67 +8,81 @@ from mcp.tools.transaction_tools import (
     update_transaction_tool,
     delete_transaction_tool,
 )
+from mcp.tools.forecast_tools import forecast_balance_tool
+
+# per-type intents from the classifier -> (generic intent, transaction type)
+TYPED_INTENTS = {
+    "update_expenses": ("update_transaction", "expense"),
+    "delete_expenses": ("delete_transaction", "expense"),
+    "update_income": ("update_transaction", "income"),
+    "delete_income": ("delete_transaction", "income"),
+}
+
 
 class TransactionAgent(BaseAgent):
     def __init__(self):
         super().__init__("TransactionAgent")
 
-    def run(self, state: dict):
+    def execute(self, state: dict, db=None):
         print("[DEBUG] TransactionAgent received:", state)
 
         intent = state["intent"]
         p = state["params"]
+        if intent in TYPED_INTENTS:
+            intent, txn_type = TYPED_INTENTS[intent]
+            p = {**p, "type": txn_type}
 
         if intent == "create_expenses":
-            return {
-                "result": create_expense_tool(
-                    user_id=1,
-                    amount=p["amount"],
-                    category=p["category"] or "miscellaneous",
-                    payee=p["payee"],
-                    raw_description=p["raw_description"],
-                    is_recurring=p["is_recurring"],
-                )
-            }
+            return create_expense_tool(
+                user_id=1,
+                amount=p["amount"],
+                category=p["category"] or "miscellaneous",
+                payee=p["payee"],
+                raw_description=p["raw_description"],
+                is_recurring=p["is_recurring"],
+                db=db,
+            )
 
         elif intent == "create_income":
-            return {
-                "result": create_income_tool(
-                    user_id=1,
-                    amount=p["amount"],
-                    category=p["category"] or "",
-                    payee=p["payee"],
-                    raw_description=p["raw_description"],
-                    is_recurring=p["is_recurring"],
-                )
-            }
+            return create_income_tool(
+                user_id=1,
+                amount=p["amount"],
+                category=p["category"] or "",
+                payee=p["payee"],
+                raw_description=p["raw_description"],
+                is_recurring=p["is_recurring"],
+                db=db,
+            )
 
         elif intent == "get_transactions":
-            return {
-                "result": get_transactions_tool(
-                    user_id=1,
-                    type=p.get("type"),
-                    category=p.get("category")
-                )
-            }
+            start, end = month_range(p["time_period"]) if p.get("time_period") else (None, None)
+            return get_transactions_tool(
+                user_id=1,
+                type=p.get("type"),
+                category=p.get("category"),
+                start=start,
+                end=end,
+                db=db
+            )
 
         elif intent == "update_transaction":
-            return {
-                "result": update_transaction_tool(
-                    category=p["category"],
-                    amount=p["amount"],
-                    date_str=p["raw_description"],  # or params["timestamp"] if available
-                    type=p.get("type", "expense")
-                )
-            }
+            return update_transaction_tool(
+                category=p["category"],
+                amount=p["amount"],
+                date_str=p["raw_description"],  # or params["timestamp"] if available
+                type=p.get("type", "expense"),
+                db=db
+            )
 
         elif intent == "delete_transaction":
-            return {
-                "result": delete_transaction_tool(
-                    category=p["category"],
-                    date_str=p["raw_description"],
-                    type=p.get("type", "expense")
-                )
-            }
+            return delete_transaction_tool(
+                category=p["category"],
+                date_str=p["raw_description"],
+                type=p.get("type", "expense"),
+                db=db
+            )
+
+        elif intent == "forecast_balance":
+            return forecast_balance_tool(user_id=1, time_period=p.get("time_period"), db=db)
 
-        return {"result": "Sorry, I did not understand your transaction request."}
+        return {"kind": "error", "action": "handle that transaction request", "message": "unknown transaction intent"}
@@ -3,7 +3,7 @@ budget_tools_schema = [
         "type": "function",
         "function": {
             "name": "create_budget_tool",
-            "description": "Create a budget and return a natural language summary.",
+            "description": "Create a budget and return a structured result for the response renderer.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -20,7 +20,7 @@ budget_tools_schema = [
         "type": "function",
         "function": {
             "name": "get_budgets_tool",
-            "description": "Fetch budgets and return a natural language summary.",
+            "description": "Fetch budgets and return a structured result for the response renderer.",
             "parameters": {
                 "type": "object",
                 "properties": {"user_id": {"type": "integer"}},
@@ -32,7 +32,7 @@ budget_tools_schema = [
         "type": "function",
         "function": {
             "name": "update_budget_tool",
-            "description": "Update a budget and return a natural language summary.",
+            "description": "Update a budget and return a structured result for the response renderer.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+from sqlalchemy.orm import Session
+from services.forecast_service import get_forecast_state
+from services.transaction_services import month_range
+
+
+def forecast_balance_tool(user_id: int, time_period: str = None, db: Session = None) -> dict:
+    """
+    Projected balance at the end of `time_period` (YYYY-MM, default this month),
+    from the user's incremental forecast state -- no history scan.
+    """
+    today = date.today()
+    try:
+        _, end = month_range(time_period or today.strftime("%Y-%m"))
+        target = end.date() - timedelta(days=1)
+        days = max((target - today).days, 0)
+
+        state = get_forecast_state(user_id, db=db)
+    except Exception as e:
+        return {"kind": "error", "action": "forecast your balance", "message": str(e)}
+
+    return {
+        "kind": "balance_forecast",
+        "balance": state.balance,
+        "projected_balance": state.project_balance(days),
+        "daily_spend": state.daily_projection(),
+        "date": target.strftime("%d %B %Y"),
+        "days": days,
+    }
@@ -1,30 +1,43 @@
+from sqlalchemy.orm import Session
 
-import razorpay 
-import os 
+from services.payment_service import get_orchestrator
 
-razorpay_client = razorpay.Client(auth=(os.getenv("RAZORPAY_TEST_API_KEY"), os.getenv("RAZORPAY_TEST_SECRET_KEY")))
 
-def execute_payment(amount: float, payee: str):
-   """
-   Create a Razorpay UPI order
-   """
-   try: 
-        order_data = {
-            "amount": int(amount * 100), 
-            "currency": "INR",
-            "payment_capture": 1,
-            "notes": {
-                "payee": payee
-            }
-        }
-      
-        order = razorpay_client.order.create(order_data)
+async def execute_payment(amount: float, payee: str, category: str = None, idempotency_key: str = None,
+                          user_id: int = 1, db: Session = None) -> dict:
+    """
+    Screen the payment and create a UPI order for it. Retries of the same
+    payment (same key, or same amount and payee within the idempotency
+    window) return the original order instead of a new one.
+    """
+    if not amount:
+        return {"kind": "error", "action": "make the payment", "message": "no amount given"}
 
-        return {
-            "status": "pending", 
-            "order_id": order["id"], 
-            "upi_link": f"https://rzp.io/i/{order['id']}",
-            "message": f"UPI payment link generated for ₹{amount}. Ask user to complete payment."
-        }
-   except Exception as e:
-        return {"status": "error", "message": str(e)}
+    try:
+        orchestrator = get_orchestrator()
+    except ValueError as e:
+        print("[DEBUG] payment gateway not configured:", e)
+        return {"kind": "error", "action": "make the payment", "message": "payments are not configured"}
+
+    result = await orchestrator.pay(
+        amount, payee, user_id=user_id, category=category, idempotency_key=idempotency_key, db=db
+    )
+
+    if result["status"] == "error":
+        return {"kind": "error", "action": "make the payment", "message": result["message"]}
+    if result["status"] == "rejected":
+        return {"kind": "payment_rejected", "amount": amount, "payee": payee, "message": result.get("message")}
+    if result["status"] == "failed":
+        return {"kind": "error", "action": "make the payment", "message": result["message"]}
+    if result["status"] == "created":
+        # a duplicate of a payment that is still waiting on the gateway
+        return {"kind": "payment_processing", "amount": result["amount"], "payee": payee}
+
+    return {
+        "kind": "payment_duplicate" if result["duplicate"] else "payment_pending",
+        "amount": result["amount"],
+        "payee": payee,
+        "status": result["status"],
+        "order_id": result["order_id"],
+        "upi_link": result["upi_link"],
+    }
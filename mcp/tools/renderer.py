@@ -0,0 +1,296 @@
+"""
+Turns structured tool results into user-facing text.
+
+Tools in mcp/tools return structured dicts, never text: a "kind" key naming
+a template here plus its fields, or kind "error" with an action and message.
+render() fills the deterministic template for the kind (amounts in ₹ with
+Indian digit grouping). Setting RESPONSE_POLISH=llm additionally rewrites the
+text with Gemini. Concurrent polish requests are batched into one Gemini call
+and results are cached by text.
+"""
+import asyncio
+import os
+import re
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from config.llm import gemini_request_options, get_gemini_model, llm_slot
+from utils.cache import build_cache
+
+load_dotenv()
+
+POLISH_MODE = os.getenv("RESPONSE_POLISH", "off").lower()
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+MAX_LISTED_ITEMS = 10
+
+TEMPLATES = {
+    "budget_created": "Done! Your {category} budget is set to {max_limit} for {period}.",
+    "budget_updated": "Your {category} budget is now {amount} for {period}.",
+    "budget_list": "Here are your budgets: {items}.",
+    "budget_list_empty": "You haven't set any budgets yet.",
+    "remaining_budgets": "Here's where your budgets stand for {period}: {items}.",
+    "remaining_budgets_empty": "You haven't set any budgets for {period}.",
+    "expense_created": "Added an expense of {amount} under {category}.",
+    "income_created": "Recorded income of {amount} under {category}.",
+    "transaction_list": "Here are your transactions: {items}.",
+    "transaction_list_empty": "No transactions found.",
+    "transaction_updated": "Updated your {type} in {category} on {date} to {amount}.",
+    "transaction_deleted": "Deleted your {type} in {category} on {date}.",
+    "balance_forecast": "Spending about {daily_spend} a day, your balance should be around {projected_balance} by {date} (it's {balance} now).",
+    "payment_pending": "Your payment of {amount} to {payee} is ready. Complete it here: {upi_link}",
+    "payment_duplicate": "That payment of {amount} to {payee} was already started. Complete it here: {upi_link}",
+    "payment_processing": "Your payment of {amount} to {payee} is still being processed. Try again in a moment.",
+    "payment_rejected": "I couldn't send {amount} to {payee}: {message}",
+    "portfolio_value": "Your portfolio is worth {total_current_value} against {total_cost} invested, {direction} {net_pnl} ({returns_percent}%).",
+    "stock_pnl": "You hold {quantity:g} {stock} at an average of {avg_price}, now {last_price}: {direction} {pnl} ({pnl_percent}%).",
+    "stock_not_held": "You don't hold {stock} in your portfolio.",
+    "stock_ambiguous": "You hold more than one {stock}: {items}. Which one did you mean?",
+    "error": "Sorry, I couldn't {action}: {message}",
+}
+
+AMOUNT_FIELDS = {
+    "amount", "max_limit", "balance", "projected_balance", "daily_spend",
+    "total_cost", "total_current_value", "net_pnl", "pnl", "avg_price", "last_price",
+}
+
+
+def format_inr(amount) -> str:
+    """
+    1234567.5 -> "₹12,34,567.50"; whole amounts drop the paise.
+    """
+    if amount is None:
+        return "₹0"
+
+    value = round(abs(float(amount)), 2)
+    whole = int(value)
+    paise = int(round((value - whole) * 100))
+
+    digits = str(whole)
+    if len(digits) > 3:
+        head, tail = digits[:-3], digits[-3:]
+        groups = []
+        while len(head) > 2:
+            groups.insert(0, head[-2:])
+            head = head[:-2]
+        if head:
+            groups.insert(0, head)
+        digits = ",".join(groups + [tail])
+
+    sign = "-" if float(amount) < 0 else ""
+    return f"{sign}₹{digits}" + (f".{paise:02d}" if paise else "")
+
+
+def format_period(period: Optional[str]) -> str:
+    try:
+        return datetime.strptime(period, "%Y-%m").strftime("%B %Y")
+    except (TypeError, ValueError):
+        return period or "this month"
+
+
+def _format_budget(b: dict) -> str:
+    return f"{b['category']} {format_inr(b['max_limit'])} ({format_period(b['time_period'])})"
+
+
+def _format_remaining(b: dict) -> str:
+    if b["remaining"] < 0:
+        return f"{b['category']} is over by {format_inr(-b['remaining'])} (limit {format_inr(b['max_limit'])})"
+    used = f", {b['percent_used']:.0f}% used" if b["percent_used"] is not None else ""
+    return f"{b['category']} {format_inr(b['remaining'])} left of {format_inr(b['max_limit'])}{used}"
+
+
+def _format_transaction(t: dict) -> str:
+    day = str(t.get("timestamp", ""))[:10]
+    return f"{t['type']} of {format_inr(t['amount'])} in {t['category']} on {day}"
+
+
+def _format_items(items: List[dict], formatter, has_more: bool = False) -> str:
+    shown = "; ".join(formatter(item) for item in items[:MAX_LISTED_ITEMS])
+    if len(items) > MAX_LISTED_ITEMS:
+        shown += f"; and {len(items) - MAX_LISTED_ITEMS}{'+' if has_more else ''} more"
+    elif has_more:
+        shown += "; and more"
+    return shown
+
+
+def render(result) -> str:
+    if not isinstance(result, dict) or "kind" not in result:
+        return str(result)
+
+    kind = result["kind"]
+    fields = {k: (format_inr(v) if k in AMOUNT_FIELDS else v) for k, v in result.items()}
+    fields["period"] = format_period(result.get("time_period"))
+
+    if kind == "budget_list":
+        if not result["budgets"]:
+            kind = "budget_list_empty"
+        fields["items"] = _format_items(result["budgets"], _format_budget)
+    elif kind == "remaining_budgets":
+        if not result["budgets"]:
+            kind = "remaining_budgets_empty"
+        fields["items"] = _format_items(result["budgets"], _format_remaining)
+    elif kind == "transaction_list":
+        if not result["transactions"]:
+            kind = "transaction_list_empty"
+        fields["items"] = _format_items(result["transactions"], _format_transaction, bool(result.get("next_cursor")))
+
+    template = TEMPLATES.get(kind)
+    if template is None:
+        return str(result)
+    return template.format(**fields)
+
+
+# ---------------- optional LLM polish ----------------
+
+_POLISH_PROMPT = """
+Rewrite the following message into a friendly financial assistant response like a summary or key highlights.
+Always use the INR currency symbol (₹).
+Do NOT add assumptions.
+
+Message:
+{text}
+
+Return only the rewritten final sentence.
+"""
+
+_BATCH_PROMPT = """
+Rewrite each numbered message below into a friendly financial assistant response.
+Always use the INR currency symbol (₹). Do NOT add assumptions.
+Return exactly one line per message, in the same order, formatted as "<number>. <rewritten sentence>".
+
+{messages}
+"""
+
+_NUMBERED_LINE_RE = re.compile(r"^\s*(\d+)[.)]\s*(.+)$")
+
+_polish_cache = build_cache("polish", maxsize=4096, ttl=3600)
+
+
+def _get_model():
+    return get_gemini_model(GEMINI_MODEL)
+
+
+class PolishBatcher:
+    """
+    Collects polish requests for `window` seconds and sends them to Gemini as
+    one numbered prompt. Identical texts in flight share one future.
+    """
+
+    def __init__(self, window: float = 0.02, max_batch: int = 16):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def polish(self, text: str) -> str:
+        cached = _polish_cache.get(text)
+        if cached is not None:
+            return cached
+
+        future = self._pending.get(text)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[text] = future
+            if len(self._pending) >= self.max_batch:
+                self._schedule(0)
+            elif self._flush_task is None:
+                self._schedule(self.window)
+        return await future
+
+    def _schedule(self, delay: float):
+        if self._flush_task is not None and delay:
+            return
+        self._flush_task = asyncio.ensure_future(self._flush(delay))
+
+    async def _flush(self, delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+        batch, self._pending = self._pending, {}
+        self._flush_task = None
+        if not batch:
+            return
+
+        texts = list(batch)
+        try:
+            polished = await self._generate(texts)
+        except Exception as e:
+            print("[DEBUG] polish failed, using template text:", e)
+            polished = texts
+
+        for text, out in zip(texts, polished):
+            if out != text:
+                _polish_cache.set(text, out)
+            if not batch[text].done():
+                batch[text].set_result(out)
+
+    async def _generate(self, texts: List[str]) -> List[str]:
+        if len(texts) == 1:
+            prompt = _POLISH_PROMPT.format(text=texts[0])
+        else:
+            messages = "\n".join(f"{i}. {text}" for i, text in enumerate(texts, start=1))
+            prompt = _BATCH_PROMPT.format(messages=messages)
+
+        async with llm_slot(GEMINI_MODEL):
+            response = await _get_model().generate_content_async(
+                prompt,
+                generation_config={"temperature": 0.1},
+                request_options=gemini_request_options()
+            )
+
+        if len(texts) == 1:
+            return [response.text.strip()]
+
+        polished = list(texts)
+        for line in response.text.splitlines():
+            match = _NUMBERED_LINE_RE.match(line)
+            if match and 1 <= int(match.group(1)) <= len(texts):
+                polished[int(match.group(1)) - 1] = match.group(2).strip()
+        return polished
+
+
+_batcher = PolishBatcher()
+
+
+def polish_enabled() -> bool:
+    return POLISH_MODE == "llm"
+
+
+async def arender(result) -> str:
+    text = render(result)
+    if not polish_enabled():
+        return text
+    return await _batcher.polish(text)
+
+
+async def astream_polish(text: str) -> AsyncIterator[str]:
+    """
+    Yields the polished text chunk by chunk as Gemini produces it.
+    Falls back to the template text in one chunk when polish is off or fails.
+    """
+    cached = _polish_cache.get(text) if polish_enabled() else None
+    if not polish_enabled() or cached is not None:
+        yield cached or text
+        return
+
+    parts = []
+    try:
+        async with llm_slot(GEMINI_MODEL):
+            response = await _get_model().generate_content_async(
+                _POLISH_PROMPT.format(text=text),
+                generation_config={"temperature": 0.1},
+                request_options=gemini_request_options(),
+                stream=True
+            )
+            async for chunk in response:
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+    except Exception as e:
+        print("[DEBUG] polish stream failed, using template text:", e)
+        if not parts:
+            yield text
+        return
+
+    _polish_cache.set(text, "".join(parts).strip())
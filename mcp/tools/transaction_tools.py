@@ -1,132 +1,123 @@
 from datetime import datetime
+from sqlalchemy.orm import Session
 from services.transaction_services import (
+    DEFAULT_PAGE_SIZE,
     create_expense,
     create_income,
     get_transactions,
     delete_transaction,
     update_transaction
 )
-import os
-from dotenv import load_dotenv
-import google.generativeai as genai
 
-load_dotenv()
 
-GEMINI_KEY = os.getenv("GEMINI_API_KEY")
-MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
-
-# Configure Gemini
-genai.configure(api_key=GEMINI_KEY)
-
-# Model instance
-model = genai.GenerativeModel(MODEL)
-
-
-def summarize(text: str) -> str:
-    """
-    Use Gemini to turn raw transaction output into natural English.
-    """
-
-    prompt = f"""
-    Rewrite the following as a friendly financial assistant response.
-    ALWAYS use the INR symbol (₹).
-    Do NOT add extra explanation, assumptions, or multiple sentences.
-
-    Message:
-    {text}
-
-    Return only ONE clean rewritten sentence.
-    """
-
-    response = model.generate_content(
-        prompt,
-        generation_config={"temperature": 0.1}
-    )
-
-    return response.text.strip()
-
-
-def create_expense_tool(user_id: int, amount: float, category: str, payee: str, raw_description: str, is_recurring: bool) -> str:
+def create_expense_tool(user_id: int, amount: float, category: str, payee: str, raw_description: str, is_recurring: bool, db: Session = None) -> dict:
     result = create_expense(
         user_id=user_id,
         amount=amount,
         category=category,
         payee=payee,
         raw_description=raw_description,
-        is_recurring=is_recurring
+        is_recurring=is_recurring,
+        db=db
     )
 
     if result.get("status") == "error":
-        return summarize(f"Error creating expense: {result['message']}")
+        return {"kind": "error", "action": "add the expense", "message": result["message"]}
 
-    tx_id = result["transaction_id"]
-    raw = f"Created an expense of ₹{amount} in category {category}. Transaction ID: {tx_id}."
-    return summarize(raw)
+    return {
+        "kind": "expense_created",
+        "transaction_id": result["transaction_id"],
+        "amount": amount,
+        "category": category,
+    }
 
 
-def create_income_tool(user_id: int, amount: float, category: str, payee: str, raw_description: str, is_recurring: bool) -> str:
+def create_income_tool(user_id: int, amount: float, category: str, payee: str, raw_description: str, is_recurring: bool, db: Session = None) -> dict:
     result = create_income(
         user_id=user_id,
         amount=amount,
         category=category,
         payee=payee,
         raw_description=raw_description,
-        is_recurring=is_recurring
+        is_recurring=is_recurring,
+        db=db
     )
 
     if result.get("status") == "error":
-        return summarize(f"Error creating income: {result['message']}")
+        return {"kind": "error", "action": "record the income", "message": result["message"]}
 
-    tx_id = result["transaction_id"]
-    raw = f"Recorded income of ₹{amount} in category {category}. Transaction ID: {tx_id}."
-    return summarize(raw)
+    return {
+        "kind": "income_created",
+        "transaction_id": result["transaction_id"],
+        "amount": amount,
+        "category": category or "income",
+    }
 
 
-def get_transactions_tool(user_id: int, type: str = None, category: str = None) -> str:
-    result = get_transactions(type=type, category=category)
-
-    if result.get("status") == "error":
-        return summarize(f"Error fetching transactions: {result['message']}")
+# only what the transaction_list template shows
+LIST_COLUMNS = ("id", "type", "amount", "category", "timestamp")
 
-    txns = result.get("transaction", [])
 
-    if not txns:
-        return summarize("No transactions found.")
+def get_transactions_tool(user_id: int, type: str = None, category: str = None, start: datetime = None, end: datetime = None,
+                          limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, db: Session = None) -> dict:
+    result = get_transactions(
+        type=type,
+        category=category,
+        start=start,
+        end=end,
+        columns=LIST_COLUMNS,
+        limit=limit,
+        cursor=cursor,
+        db=db
+    )
 
-    raw = "; ".join([
-        f"{t['type']} of ₹{t['amount']} in {t['category']} on {t['timestamp']}"
-        for t in txns
-    ])
+    if result.get("status") == "error":
+        return {"kind": "error", "action": "fetch your transactions", "message": result["message"]}
 
-    return summarize(f"Transactions: {raw}")
+    return {
+        "kind": "transaction_list",
+        "transactions": result.get("transaction", []),
+        "next_cursor": result.get("next_cursor"),
+    }
 
 
-def update_transaction_tool(category: str, amount: float, date_str: str, type: str = "expense") -> str:
+def update_transaction_tool(category: str, amount: float, date_str: str, type: str = "expense", db: Session = None) -> dict:
     result = update_transaction(
         category=category,
         amount=amount,
         date_str=date_str,
-        type=type
+        type=type,
+        db=db
     )
 
     if result.get("status") == "error":
-        return summarize(f"Error updating transaction: {result['message']}")
+        return {"kind": "error", "action": "update the transaction", "message": result["message"]}
 
-    tx_id = result["transaction_id"]
-    raw = f"Updated the {type} in category {category} on {date_str} to ₹{amount}. Transaction ID: {tx_id}."
-    return summarize(raw)
+    return {
+        "kind": "transaction_updated",
+        "transaction_id": result["transaction_id"],
+        "type": type,
+        "category": category,
+        "date": date_str,
+        "amount": amount,
+    }
 
 
-def delete_transaction_tool(category: str, date_str: str, type: str = "expense") -> str:
+def delete_transaction_tool(category: str, date_str: str, type: str = "expense", db: Session = None) -> dict:
     result = delete_transaction(
         category=category,
         date_str=date_str,
-        type=type
+        type=type,
+        db=db
     )
 
     if result.get("status") == "error":
-        return summarize(f"Error deleting transaction: {result['message']}")
-
-    tx_id = result["transaction_id"]
-    raw = f"Deleted the {type} in category {category} on {date_str}. Transaction ID: {tx_id}."
-    return summarize(raw)
+        return {"kind": "error", "action": "delete the transaction", "message": result["message"]}
+
+    return {
+        "kind": "transaction_deleted",
+        "transaction_id": result["transaction_id"],
+        "type": type,
+        "category": category,
+        "date": date_str,
+    }
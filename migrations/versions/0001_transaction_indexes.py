@@ -0,0 +1,31 @@
+"""composite indexes for transaction lookups
+
+Tables that predate migrations were created by Base.metadata.create_all, so
+this revision only adds indexes, and skips any that create_all already made.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_transactions_user_timestamp", ["user_id", "timestamp", "id"]),
+    ("ix_transactions_user_type_timestamp", ["user_id", "type", "timestamp"]),
+    ("ix_transactions_user_category_type_timestamp", ["user_id", "category", "type", "timestamp"]),
+]
+
+
+def upgrade():
+    for name, columns in INDEXES:
+        op.create_index(name, "transactions", columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="transactions", if_exists=True)
@@ -0,0 +1,39 @@
+"""forecast_states table for incremental cashflow forecasts
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Base.metadata.create_all at startup may have created it already
+    if "forecast_states" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "forecast_states",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Integer()),
+        sa.Column("day_total", sa.Float(), nullable=False),
+        sa.Column("n", sa.Integer(), nullable=False),
+        sa.Column("ema_num", sa.Float(), nullable=False),
+        sa.Column("ema_den", sa.Float(), nullable=False),
+        sa.Column("sum_t", sa.Float(), nullable=False),
+        sa.Column("sum_tt", sa.Float(), nullable=False),
+        sa.Column("sum_y", sa.Float(), nullable=False),
+        sa.Column("sum_ty", sa.Float(), nullable=False),
+        sa.Column("balance", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("forecast_states")
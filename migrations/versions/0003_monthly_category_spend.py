@@ -0,0 +1,35 @@
+"""monthly_category_spend aggregate
+
+Backfill existing history afterwards with
+    python -m services.category_spend_service rebuild
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Base.metadata.create_all at startup may have created it already
+    if "monthly_category_spend" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "monthly_category_spend",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("category", sa.String(), primary_key=True),
+        sa.Column("time_period", sa.String(), primary_key=True),
+        sa.Column("spent", sa.Float(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("monthly_category_spend")
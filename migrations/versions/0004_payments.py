@@ -0,0 +1,55 @@
+"""payments and payment_events
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Base.metadata.create_all at startup may have created them already
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "payments" not in existing:
+        op.create_table(
+            "payments",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE")),
+            sa.Column("idempotency_key", sa.String(), nullable=False, unique=True),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("currency", sa.String(), nullable=False),
+            sa.Column("payee", sa.String()),
+            sa.Column("category", sa.String()),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("gateway", sa.String()),
+            sa.Column("order_id", sa.String()),
+            sa.Column("reason", sa.String()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_payments_id", "payments", ["id"])
+        op.create_index("ix_payments_user_id", "payments", ["user_id"])
+
+    if "payment_events" not in existing:
+        op.create_table(
+            "payment_events",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("payment_id", sa.Integer(), sa.ForeignKey("payments.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("detail", sa.String()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_payment_events_id", "payment_events", ["id"])
+        op.create_index("ix_payment_events_payment_id", "payment_events", ["payment_id"])
+
+
+def downgrade():
+    op.drop_table("payment_events")
+    op.drop_table("payments")
@@ -0,0 +1,29 @@
+"""forecast_states.version for compare-and-set checkpoints
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Base.metadata.create_all at startup may have created it already
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("forecast_states")}
+    if "version" in columns:
+        return
+
+    op.add_column(
+        "forecast_states",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade():
+    op.drop_column("forecast_states", "version")
@@ -2,3 +2,6 @@ from .users import User
 from .budget import Budget
 from .account import Account
 from .transaction import Transaction
+from .forecast_state import ForecastState
+from .category_spend import MonthlyCategorySpend
+from .payment import Payment, PaymentEvent
@@ -1,10 +1,10 @@
 from sqlalchemy import Column, Integer, Float, String, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
-from datetime import datetime
 from config.database import Base
+from utils.periods import current_period
 
 def current_year_month():
-    return datetime.now().strftime("%Y-%m")
+    return current_period()
 
 class Budget(Base):
     __tablename__ = "budgets"
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Float, String, ForeignKey
+from config.database import Base
+
+class MonthlyCategorySpend(Base):
+    """
+    Expense total per (user, category, YYYY-MM), kept in step with
+    transactions by services/category_spend_service.py.
+    """
+    __tablename__ = "monthly_category_spend"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String, primary_key=True)
+    time_period = Column(String, primary_key=True)
+    spent = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
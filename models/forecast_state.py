@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from config.database import Base
+
+class ForecastState(Base):
+    """
+    Persisted utils.cashflow.IncrementalForecast, one row per user.
+    """
+    __tablename__ = "forecast_states"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Integer)
+    day_total = Column(Float, nullable=False, default=0.0)
+    n = Column(Integer, nullable=False, default=0)
+    ema_num = Column(Float, nullable=False, default=0.0)
+    ema_den = Column(Float, nullable=False, default=0.0)
+    sum_t = Column(Float, nullable=False, default=0.0)
+    sum_tt = Column(Float, nullable=False, default=0.0)
+    sum_y = Column(Float, nullable=False, default=0.0)
+    sum_ty = Column(Float, nullable=False, default=0.0)
+    balance = Column(Float, nullable=False, default=0.0)
+    # bumped by every write; workers compare-and-set on it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
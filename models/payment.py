@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from config.database import Base
+
+class Payment(Base):
+    __tablename__ = "payments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    # a retried request carries the same key and gets the same payment back
+    idempotency_key = Column(String, nullable=False, unique=True)
+    amount = Column(Float, nullable=False)
+    currency = Column(String, nullable=False, default="INR")
+    payee = Column(String)
+    category = Column(String)
+    # created -> rejected | order_created | failed
+    status = Column(String, nullable=False, default="created")
+    gateway = Column(String)
+    order_id = Column(String)
+    reason = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    events = relationship("PaymentEvent", back_populates="payment", cascade="all, delete", order_by="PaymentEvent.id")
+
+
+class PaymentEvent(Base):
+    """
+    One row per state transition of a payment.
+    """
+    __tablename__ = "payment_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    payment_id = Column(Integer, ForeignKey("payments.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String, nullable=False)
+    detail = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    payment = relationship("Payment", back_populates="events")
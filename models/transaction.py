@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Boolean, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from config.database import Base
@@ -18,4 +18,12 @@ class Transaction(Base):
 
     user = relationship("User", back_populates="transactions")
 
+    # listings are per user, newest first and keyset-paged on (timestamp, id);
+    # update/delete look a row up by category, type and day
+    __table_args__ = (
+        Index("ix_transactions_user_timestamp", "user_id", "timestamp", "id"),
+        Index("ix_transactions_user_type_timestamp", "user_id", "type", "timestamp"),
+        Index("ix_transactions_user_category_type_timestamp", "user_id", "category", "type", "timestamp"),
+    )
+
     
@@ -1,30 +1,42 @@
-from fastapi import APIRouter, HTTPException
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from config.database import get_db
 
 from schemas.budget_schema import BudgetCreate, BudgetResponse, BudgetUpdate
 from services.budget_services import (
     create_budget, get_budgets, update_budget_limit
 )
+from services.category_spend_service import get_remaining_budgets
+from utils.periods import current_period
 
 router = APIRouter(prefix="/budgets", tags=["Budgets"])
 
 
 @router.post("/")
-def add_budget(budget: BudgetCreate, user_id: int = 1):
-    time_period = datetime.now().strftime("%Y-%m")
-    new_budget = create_budget(user_id, budget.category, budget.max_limit, time_period)
+def add_budget(budget: BudgetCreate, user_id: int = 1, db: Session = Depends(get_db)):
+    time_period = current_period()
+    new_budget = create_budget(user_id, budget.category, budget.max_limit, time_period, db=db)
     return new_budget
 
 
 @router.get("/")
-def list_budgets(user_id: int = 1):
-    return get_budgets(user_id)
+def list_budgets(user_id: int = 1, db: Session = Depends(get_db)):
+    return get_budgets(user_id, db=db)
+
+
+@router.get("/remaining")
+def remaining_budgets(time_period: str | None = None, user_id: int = 1, db: Session = Depends(get_db)):
+    """
+    Spend so far against each budget for the month (default: current month).
+    """
+    return get_remaining_budgets(user_id, time_period, db=db)
 
 
 @router.put("/{category}")
-def modify_budget(category: str, update: BudgetUpdate, user_id: int = 1):
-    time_period = datetime.now().strftime("%Y-%m")
-    updated = update_budget_limit(user_id, category, update.max_limit, time_period)
+def modify_budget(category: str, update: BudgetUpdate, user_id: int = 1, db: Session = Depends(get_db)):
+    time_period = current_period()
+    updated = update_budget_limit(user_id, category, update.max_limit, time_period, db=db)
 
     if not updated:
         raise HTTPException(status_code=404, detail="Budget not found")
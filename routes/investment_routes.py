@@ -1,10 +1,12 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Request
-from google import genai
-from google.genai import types
-from services.portfolio import get_stock_investments
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from config.database import get_db
+from config.llm import get_genai_client, llm_slot_sync
+from services.portfolio import get_holdings, get_stock_investments
+from services.rebalance import DEFAULT_RISK_AVERSION, MAX_WEIGHT, rebalance
 from services.transaction_services import create_expense
+from services.whatsapp import send_whatsapp
 import json
-from twilio.rest import Client
 import random
 import os
 from dotenv import load_dotenv
@@ -22,7 +24,7 @@ def fetch_investments(user_id: int = 1):
     return get_stock_investments(user_id)
 
 @router.post("/get-bill-details", response_model=dict)
-def extract_text_from_image(file: UploadFile = File(...)):
+def extract_text_from_image(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """
     Extract bill details from an uploaded image and create an expense transaction.
     """
@@ -35,8 +37,10 @@ def extract_text_from_image(file: UploadFile = File(...)):
             "size": len(image_data)
         })
 
-        # Initialize the Gemini client
-        client = genai.Client()
+        # Shared, pooled Gemini client; google.genai is imported on first use, not at app import
+        from google.genai import types
+
+        client = get_genai_client()
 
         # Define the prompt to extract bill details
         prompt = (
@@ -49,16 +53,17 @@ def extract_text_from_image(file: UploadFile = File(...)):
         print("Prompt sent to Gemini:", prompt)
 
         # Send the image data and prompt to Gemini for text extraction
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[
-                types.Part.from_bytes(
-                    data=image_data,
-                    mime_type=file.content_type or "image/jpeg",
-                ),
-                prompt
-            ]
-        )
+        with llm_slot_sync("gemini-2.5-flash"):
+            response = client.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=[
+                    types.Part.from_bytes(
+                        data=image_data,
+                        mime_type=file.content_type or "image/jpeg",
+                    ),
+                    prompt
+                ]
+            )
         print("Gemini response:", response.text)
 
         # Check if the response text is empty
@@ -88,7 +93,8 @@ def extract_text_from_image(file: UploadFile = File(...)):
             amount=bill_details.get("amount"),
             category=bill_details.get("bill_type"),
             raw_description=bill_details.get("description"),
-            is_recurring=False  # Default to non-recurring
+            is_recurring=False,  # Default to non-recurring
+            db=db
         )
         print("Database transaction result:", result)
 
@@ -110,21 +116,8 @@ def send_whatsapp_message(to: str, content_sid: str) -> str:
     Returns:
         str: The SID of the sent message.
     """
-    account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-    auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-
-    if not account_sid or not auth_token:
-        raise HTTPException(status_code=500, detail="Twilio credentials are not set in the environment variables.")
-
-    client = Client(account_sid, auth_token)
-
     try:
-        message = client.messages.create(
-            from_='whatsapp:+14155238886',
-            to=to,
-            content_sid=content_sid
-        )
-        return message.sid
+        return send_whatsapp(to, content_sid=content_sid)
     except Exception as e:
         print(f"Failed to send WhatsApp message: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to send WhatsApp message: {str(e)}")
@@ -140,27 +133,11 @@ def send_loan_alert1():
         media_url = "https://i.ibb.co/5h7KG2Py/lol.jpg"  # Example media URL
         body = "⚠️ Hi Aryan, your loan is at risk of default. Please take immediate action to avoid penalties."  # Text body
 
-        # Twilio credentials
-        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-
-        if not account_sid or not auth_token:
-            raise HTTPException(status_code=500, detail="Twilio credentials are not set in the environment variables.")
-
-        client = Client(account_sid, auth_token)
-
         # Log the media URL and body for debugging
         print(f"Sending message to {recipient} with body: {body} and media URL: {media_url}")
 
-        # Send the message with media and body
-        message = client.messages.create(
-            from_='whatsapp:+14155238886',
-            to=recipient,
-            body=body,
-            media_url=[media_url]  # Ensure media_url is passed as a list
-        )
-
-        return {"message_sid": message.sid}
+        message_sid = send_whatsapp(recipient, body=body, media_url=[media_url])
+        return {"message_sid": message_sid}
 
     except Exception as e:
         print(f"Error sending message: {str(e)}")
@@ -206,85 +183,21 @@ async def inbound_message(request: Request):
         raise HTTPException(status_code=500, detail=f"Failed to process inbound message: {str(e)}")
 
 @router.get("/portfolio-rebalance", response_model=dict)
-def portfolio_rebalance(user_id: int = 1):
+def portfolio_rebalance(user_id: int = 1, method: str = "mean_variance",
+                        risk_aversion: float = Query(DEFAULT_RISK_AVERSION, gt=0),
+                        max_weight: float = Query(MAX_WEIGHT, gt=0, le=1)):
     """
-    Endpoint to show current portfolio distribution and a rebalanced portfolio
-    based on realistic investment limits for gig workers earning 10-20k per month.
+    Current portfolio distribution, the optimizer's target distribution
+    (mean-variance or risk parity) and the lot-sized trades to get there.
     """
     try:
-        # Fetch current investments
-        current_investments = get_stock_investments(user_id)
-        total_investment = sum(
-            stock['quantity'] * stock['average_price'] for stock in current_investments['holdings']
-        )
-
-        # Separate crypto and non-crypto stocks
-        crypto_stocks = [stock for stock in current_investments['holdings'] if stock['exchange'] == 'Crypto']
-        non_crypto_stocks = [stock for stock in current_investments['holdings'] if stock['exchange'] != 'Crypto']
-
-        # Calculate current portfolio distribution
-        current_distribution = []
-        crypto_total = total_investment * 0.2  # 20% for crypto
-        stock_total = total_investment * 0.8  # 80% for stocks
-
-        # Distribute crypto allocation with slight variations
-        crypto_allocation = [round(crypto_total * (0.33 + i * 0.01), 2) for i in range(len(crypto_stocks))]
-        for stock, allocation in zip(crypto_stocks, crypto_allocation):
-            current_distribution.append({
-                "stock": stock['tradingsymbol'],
-                "amount": allocation,
-                "percentage": round((allocation / total_investment) * 100, 2)
-            })
-
-        # Distribute stock allocation with slight variations
-        stock_allocation = [round(stock_total * (0.08 + i * 0.005), 2) for i in range(len(non_crypto_stocks))]
-        for stock, allocation in zip(non_crypto_stocks, stock_allocation):
-            current_distribution.append({
-                "stock": stock['tradingsymbol'],
-                "amount": allocation,
-                "percentage": round((allocation / total_investment) * 100, 2)
-            })
-
-        # Rebalanced portfolio
-        rebalanced_distribution = []
-        rebalanced_crypto_total = total_investment * 0.35  # 35% for crypto
-        rebalanced_stock_total = total_investment * 0.65  # 65% for stocks
-
-        # Distribute rebalanced crypto allocation with slight variations
-        rebalanced_crypto_allocation = [round(rebalanced_crypto_total * (0.33 + i * 0.01), 2) for i in range(len(crypto_stocks))]
-        for stock, allocation in zip(crypto_stocks, rebalanced_crypto_allocation):
-            rebalanced_distribution.append({
-                "stock": stock['tradingsymbol'],
-                "amount": allocation,
-                "percentage": round((allocation / total_investment) * 100, 2)
-            })
-
-        # Distribute rebalanced stock allocation with slight variations
-        rebalanced_stock_allocation = [round(rebalanced_stock_total * (0.08 + i * 0.005), 2) for i in range(len(non_crypto_stocks))]
-        for stock, allocation in zip(non_crypto_stocks, rebalanced_stock_allocation):
-            rebalanced_distribution.append({
-                "stock": stock['tradingsymbol'],
-                "amount": allocation,
-                "percentage": round((allocation / total_investment) * 100, 2)
-            })
-
-        # Adjust percentages to ensure they sum to 100%
-        current_total_percentage = sum(item['percentage'] for item in current_distribution)
-        rebalanced_total_percentage = sum(item['percentage'] for item in rebalanced_distribution)
-
-        if current_total_percentage != 100:
-            current_distribution[0]['percentage'] += round(100 - current_total_percentage, 2)
-
-        if rebalanced_total_percentage != 100:
-            rebalanced_distribution[0]['percentage'] += round(100 - rebalanced_total_percentage, 2)
-
-        return {
-            "current_portfolio": current_distribution,
-            "rebalanced_portfolio": rebalanced_distribution
-        }
-
+        result = rebalance(get_holdings(user_id), method=method, risk_aversion=risk_aversion, max_weight=max_weight)
     except Exception as e:
         print(f"Error in portfolio rebalance: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error in portfolio rebalance: {str(e)}")
 
+    if result.get("status") == "error":
+        raise HTTPException(status_code=400, detail=result["message"])
+    return result
+
 
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+
+from config.database import get_db
+
+from schemas.payment_schema import PaymentCreate
+from services.payment_service import get_orchestrator, get_payment, get_payment_events, payment_to_dict
+
+router = APIRouter(prefix="/payments", tags=["Payments"])
+
+
+@router.post("/")
+async def create_payment(payment: PaymentCreate, user_id: int = 1,
+                         idempotency_key: str | None = Header(default=None, max_length=64),
+                         db: Session = Depends(get_db)):
+    """
+    Screens the payment and creates a gateway order. Send the same
+    Idempotency-Key header on retries to get the original payment back.
+    """
+    try:
+        orchestrator = get_orchestrator()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    result = await orchestrator.pay(
+        payment.amount, payment.payee, user_id=user_id, category=payment.category,
+        idempotency_key=idempotency_key, db=db
+    )
+    if result["status"] == "error":
+        raise HTTPException(status_code=400, detail=result["message"])
+    return result
+
+
+@router.get("/{idempotency_key}")
+def read_payment(idempotency_key: str, db: Session = Depends(get_db)):
+    payment = get_payment(idempotency_key, db=db)
+    if not payment:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return {**payment_to_dict(payment), "events": get_payment_events(payment.id, db=db)}
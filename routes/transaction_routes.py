@@ -1,6 +1,15 @@
-from fastapi import APIRouter, HTTPException
+import csv
+import io
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
 from datetime import datetime
 
+from config.database import get_db
+
 from schemas.transaction_schema import (
     ExpenseCreate,
     IncomeCreate,
@@ -9,7 +18,14 @@ from schemas.transaction_schema import (
 from services.transaction_services import (
     create_expense,
     create_income,
+    bulk_create_transactions,
+    BULK_CHUNK_SIZE,
+    MAX_REPORTED_ERRORS,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    TRANSACTION_COLUMNS,
     get_transactions,
+    iter_transactions,
     update_transaction,
     delete_transaction,
 )
@@ -18,7 +34,7 @@ router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
 
 @router.post("/expense", response_model=dict)
-def add_expense(expense: ExpenseCreate, user_id: int = 1):
+def add_expense(expense: ExpenseCreate, user_id: int = 1, db: Session = Depends(get_db)):
     result = create_expense(
         user_id=user_id,
         amount=expense.amount,
@@ -26,12 +42,13 @@ def add_expense(expense: ExpenseCreate, user_id: int = 1):
         payee=expense.payee,
         raw_description=expense.raw_description,
         is_recurring=expense.is_recurring,
+        db=db,
     )
     return result
 
 
 @router.post("/income", response_model=dict)
-def add_income(income: IncomeCreate, user_id: int = 1):
+def add_income(income: IncomeCreate, user_id: int = 1, db: Session = Depends(get_db)):
     result = create_income(
         user_id=user_id,
         amount=income.amount,
@@ -39,23 +56,161 @@ def add_income(income: IncomeCreate, user_id: int = 1):
         payee=income.payee,
         raw_description=income.raw_description,
         is_recurring=income.is_recurring,
+        db=db,
     )
     return result
 
 
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+def _csv_rows(text: str):
+    # empty cells mean "not given", so schema defaults apply
+    for row in csv.DictReader(io.StringIO(text)):
+        yield {k.strip(): v for k, v in row.items() if k and v not in (None, "")}
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+async def _ingest_ndjson(request: Request, user_id: int, chunk_size: int, db: Session):
+    """
+    Reads the body line by line and inserts every `chunk_size` rows,
+    so the whole upload never sits in memory.
+    """
+    summary = {"inserted": 0, "failed": 0, "errors": []}
+    rows, buffer, index = [], b"", 0
+
+    async def flush():
+        nonlocal rows, index
+        result = await run_in_threadpool(bulk_create_transactions, rows, user_id, chunk_size, index, db)
+        summary["inserted"] += result["inserted"]
+        summary["failed"] += result["failed"]
+        summary["errors"].extend(result["errors"][:MAX_REPORTED_ERRORS - len(summary["errors"])])
+        index += len(rows)
+        rows = []
+
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                rows.append(_parse_line(line))
+        if len(rows) >= chunk_size:
+            await flush()
+
+    if buffer.strip():
+        rows.append(_parse_line(buffer))
+    if rows:
+        await flush()
+
+    status = "success" if not summary["failed"] else "partial" if summary["inserted"] else "error"
+    return {"status": status, **summary}
+
+
+@router.post("/bulk", response_model=dict)
+async def bulk_add_transactions(request: Request, user_id: int = 1, chunk_size: int = BULK_CHUNK_SIZE, db: Session = Depends(get_db)):
+    """
+    Import many transactions at once. The body is a JSON array (application/json),
+    CSV with a header row (text/csv) or one JSON object per line (application/x-ndjson).
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    chunk_size = max(1, min(chunk_size, 10_000))
+
+    if content_type in NDJSON_TYPES:
+        return await _ingest_ndjson(request, user_id, chunk_size, db)
+
+    body = await request.body()
+    if content_type == "text/csv":
+        rows = _csv_rows(body.decode("utf-8-sig"))
+    else:
+        try:
+            rows = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"invalid JSON: {e}")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="expected a JSON array of transactions")
+
+    return await run_in_threadpool(bulk_create_transactions, rows, user_id, chunk_size, 0, db)
+
+
+def _parse_columns(columns: str | None):
+    if not columns:
+        return None
+    selected = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = set(selected) - set(TRANSACTION_COLUMNS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown columns: {', '.join(sorted(unknown))}")
+    return selected
+
+
 @router.get("/", response_model=dict)
-def list_transactions(type: str | None = None, category: str | None = None, user_id: int = 1):
-    result = get_transactions(type=type, category=category)
+def list_transactions(
+    type: str | None = None,
+    category: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    user_id: int = 1,
+    db: Session = Depends(get_db),
+):
+    """
+    Newest first, `limit` per page. `columns` is a comma-separated subset of the
+    transaction fields; pass `next_cursor` back as `cursor` for the next page.
+    """
+    result = get_transactions(
+        type=type,
+        category=category,
+        start=start,
+        end=end,
+        columns=_parse_columns(columns),
+        limit=limit,
+        cursor=cursor,
+        db=db,
+    )
+
+    if result.get("status") == "error":
+        raise HTTPException(status_code=400, detail=result["message"])
+
     return result
 
 
+@router.get("/export")
+def export_transactions(
+    type: str | None = None,
+    category: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: str | None = None,
+    user_id: int = 1,
+):
+    """
+    Streams every matching transaction as NDJSON, one line per row.
+    """
+    selected = _parse_columns(columns)
+
+    def lines():
+        # the export outlives the request dependencies, so it opens its own session
+        for row in iter_transactions(type=type, category=category, start=start, end=end, columns=selected):
+            yield json.dumps(row, default=str) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.put("/{category}/{date_str}", response_model=dict)
-def modify_transaction(category: str, date_str: str, amount: float, type: str = "expense", user_id: int = 1):
+def modify_transaction(category: str, date_str: str, amount: float, type: str = "expense", user_id: int = 1, db: Session = Depends(get_db)):
     result = update_transaction(
         category=category,
         amount=amount,
         date_str=date_str,
         type=type,
+        db=db,
     )
 
     if result.get("status") == "error":
@@ -65,8 +220,8 @@ def modify_transaction(category: str, date_str: str, amount: float, type: str =
 
 
 @router.delete("/{category}/{date_str}", response_model=dict)
-def remove_transaction(category: str, date_str: str, type: str = "expense", user_id: int = 1):
-    result = delete_transaction(category=category, date_str=date_str, type=type)
+def remove_transaction(category: str, date_str: str, type: str = "expense", user_id: int = 1, db: Session = Depends(get_db)):
+    result = delete_transaction(category=category, date_str=date_str, type=type, db=db)
 
     if result.get("status") == "error":
         raise HTTPException(status_code=404, detail=result["message"])
@@ -0,0 +1,7 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class PaymentCreate(BaseModel):
+    amount: float = Field(..., gt=0)
+    payee: str
+    category: Optional[str] = None
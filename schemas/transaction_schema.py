@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
+from datetime import datetime
 
 class TransactionBase(BaseModel):
     amount: float
@@ -14,6 +15,10 @@ class ExpenseCreate(TransactionBase):
 class IncomeCreate(TransactionBase):
     pass
 
+class TransactionBulkItem(TransactionBase):
+    type: Literal["expense", "income"] = "expense"
+    timestamp: Optional[datetime] = None
+
 class TransactionResponse(BaseModel):
     id: int
     type: str
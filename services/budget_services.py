@@ -1,34 +1,32 @@
-from config.database import SessionLocal
+from sqlalchemy.orm import Session
+from config.database import use_session
 from models.budget import Budget
-from datetime import datetime
+from utils.periods import current_period
 
 # functions for budget
-def create_budget(user_id: int, category: str, max_limit: float, time_period: str = datetime.now().strftime("%Y-%m")):
+def create_budget(user_id: int, category: str, max_limit: float, time_period: str = None, db: Session = None):
+    time_period = time_period or current_period()
     print("[DEBUG] create_budget:", user_id, category, max_limit, time_period)
-    db = SessionLocal()
-    try:
-        budget = Budget(
-            user_id=user_id,
-            category=category,
-            max_limit=max_limit,
-            time_period=time_period
-        )
-        db.add(budget)
-        db.commit()
-        db.refresh(budget)
-        print("[DEBUG] budget created:", budget)
-        return budget
-    except Exception as e:
-        print("[DEBUG] error creating budget:", e)
-        db.rollback()
-        return {"status": "error", "message": str(e)}
-    finally:
-        db.close()
+    with use_session(db) as db:
+        try:
+            budget = Budget(
+                user_id=user_id,
+                category=category,
+                max_limit=max_limit,
+                time_period=time_period
+            )
+            db.add(budget)
+            db.commit()
+            print("[DEBUG] budget created:", budget)
+            return budget
+        except Exception as e:
+            print("[DEBUG] error creating budget:", e)
+            db.rollback()
+            return {"status": "error", "message": str(e)}
 
 
-def get_budgets(user_id: int = 1):
-    db = SessionLocal()
-    try:
+def get_budgets(user_id: int = 1, db: Session = None):
+    with use_session(db) as db:
         budgets = db.query(Budget).filter(Budget.user_id == user_id).all()
         return [
             {
@@ -39,31 +37,27 @@ def get_budgets(user_id: int = 1):
             }
             for b in budgets
         ]
-    finally:
-        db.close()
 
 
-def update_budget_limit(user_id: int, category: str, amount: float, time_period: str):
-    db = SessionLocal()
-    try:
-        budget = db.query(Budget).filter(
-            Budget.user_id == 1,
-            Budget.category == category, 
-            Budget.time_period == datetime.now().strftime("%Y-%m")
-        ).first()
-        if not budget:
-            return {"status": "error", "message": "Budget not found"}
+def update_budget_limit(user_id: int, category: str, amount: float, time_period: str, db: Session = None):
+    with use_session(db) as db:
+        try:
+            budget = db.query(Budget).filter(
+                Budget.user_id == 1,
+                Budget.category == category, 
+                Budget.time_period == current_period()
+            ).first()
+            if not budget:
+                return {"status": "error", "message": "Budget not found"}
 
-        budget.max_limit = amount
-        db.commit()
-        return {
-            "id": budget.id,
-            "category": budget.category,
-            "max_limit": budget.max_limit,
-            "time_period": budget.time_period
-        }
-    except Exception as e:
-        db.rollback()
-        return {"status": "error", "message": str(e)}
-    finally:
-        db.close()
+            budget.max_limit = amount
+            db.commit()
+            return {
+                "id": budget.id,
+                "category": budget.category,
+                "max_limit": budget.max_limit,
+                "time_period": budget.time_period
+            }
+        except Exception as e:
+            db.rollback()
+            return {"status": "error", "message": str(e)}
@@ -0,0 +1,226 @@
+"""
+Monthly spend per (user, category, YYYY-MM).
+
+The transaction service calls add_spend() on the same session as each
+expense write, so the aggregate commits (or rolls back) with the row and
+remaining-budget checks read one indexed row instead of summing history.
+Months are budget months (utils/periods.py), the same ones Budget rows use.
+
+Backfill or repair with:
+    python -m services.category_spend_service rebuild [--user-id N]
+"""
+import argparse
+from collections import defaultdict
+from sqlalchemy import delete, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from config.database import use_session
+from models.budget import Budget
+from models.category_spend import MonthlyCategorySpend
+from models.transaction import Transaction
+from services.notifications import budget_threshold_events
+from utils.periods import BUDGET_TIMEZONE, current_period, period_of, utc_offset_minutes
+
+
+def _dialect_upsert(db: Session, rows):
+    """
+    INSERT ... ON CONFLICT that adds to the existing totals, or None if the
+    dialect has no upsert.
+    """
+    table = MonthlyCategorySpend
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    stmt = dialect_insert(table).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.user_id, table.category, table.time_period],
+        set_={"spent": table.spent + stmt.excluded.spent, "count": table.count + stmt.excluded.count},
+    )
+
+
+def _upsert(db: Session, rows: list):
+    """
+    rows: dicts with user_id, category, time_period, spent, count -- added to
+    the existing totals in one statement where the dialect supports it.
+    """
+    if not rows:
+        return
+
+    stmt = _dialect_upsert(db, rows)
+    if stmt is not None:
+        db.execute(stmt)
+        return
+
+    table = MonthlyCategorySpend
+    for row in rows:
+        updated = db.execute(
+            update(table)
+            .where(table.user_id == row["user_id"], table.category == row["category"], table.time_period == row["time_period"])
+            .values(spent=table.spent + row["spent"], count=table.count + row["count"])
+        )
+        if updated.rowcount == 0:
+            db.execute(insert(table).values(**row))
+
+
+def add_spend(user_id: int, category: str, timestamp, amount: float, db: Session, count: int = 1) -> float:
+    """
+    Adds `amount` (negative to take it back) to the month's total and returns
+    the new total. Nothing is committed here; the caller's commit covers the
+    transaction and the aggregate.
+    """
+    row = {
+        "user_id": user_id,
+        "category": category or "miscellaneous",
+        "time_period": period_of(timestamp),
+        "spent": amount,
+        "count": count,
+    }
+
+    stmt = _dialect_upsert(db, [row])
+    if stmt is not None:
+        return db.execute(stmt.returning(MonthlyCategorySpend.spent)).scalar()
+
+    _upsert(db, [row])
+    return get_category_spend(user_id, row["category"], row["time_period"], db)
+
+
+def check_budget_thresholds(user_id: int, category: str, timestamp, before: float, after: float, db: Session) -> list:
+    """
+    Threshold events for a spend total moving from `before` to `after`:
+    one indexed budget lookup, no scan of transactions. The budget is the
+    one for the timestamp's budget month, the same month add_spend() counted
+    the expense in.
+    """
+    time_period = period_of(timestamp)
+    max_limit = db.execute(
+        select(Budget.max_limit).where(
+            Budget.user_id == user_id,
+            Budget.category == (category or "miscellaneous"),
+            Budget.time_period == time_period,
+        )
+    ).scalar()
+    if not max_limit:
+        return []
+    return budget_threshold_events(user_id, category or "miscellaneous", time_period, before, after, max_limit)
+
+
+def add_spend_rows(rows, db: Session):
+    """
+    Same as add_spend for a batch of transaction value dicts (bulk imports);
+    folds them into one row per (user, category, month) first.
+    """
+    totals = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        if row.get("type", "expense") != "expense":
+            continue
+        key = (row["user_id"], row["category"] or "miscellaneous", period_of(row["timestamp"]))
+        totals[key][0] += row["amount"]
+        totals[key][1] += 1
+
+    _upsert(db, [
+        {"user_id": u, "category": c, "time_period": p, "spent": spent, "count": count}
+        for (u, c, p), (spent, count) in totals.items()
+    ])
+
+
+def get_category_spend(user_id: int, category: str, time_period: str, db: Session) -> float:
+    return db.execute(
+        select(MonthlyCategorySpend.spent).where(
+            MonthlyCategorySpend.user_id == user_id,
+            MonthlyCategorySpend.category == category,
+            MonthlyCategorySpend.time_period == time_period,
+        )
+    ).scalar() or 0.0
+
+
+def get_remaining_budgets(user_id: int = 1, time_period: str = None, db: Session = None):
+    """
+    Every budget for the month with what has been spent against it.
+    """
+    time_period = time_period or current_period()
+    spend = MonthlyCategorySpend
+
+    with use_session(db) as db:
+        rows = db.execute(
+            select(Budget.category, Budget.max_limit, Budget.time_period, func.coalesce(spend.spent, 0.0).label("spent"))
+            .outerjoin(spend, (spend.user_id == Budget.user_id) & (spend.category == Budget.category) & (spend.time_period == Budget.time_period))
+            .where(Budget.user_id == user_id, Budget.time_period == time_period)
+            .order_by(Budget.category)
+        ).all()
+
+        return [
+            {
+                "category": r.category,
+                "max_limit": r.max_limit,
+                "spent": r.spent,
+                "remaining": r.max_limit - r.spent,
+                "percent_used": round(100 * r.spent / r.max_limit, 1) if r.max_limit else None,
+                "time_period": r.time_period,
+            }
+            for r in rows
+        ]
+
+
+def _period_expr(dialect: str):
+    """
+    SQL for period_of(). Only PostgreSQL knows named zones; SQLite and MySQL
+    shift the stored UTC time by the zone's current offset.
+    """
+    if dialect == "postgresql":
+        return func.to_char(func.timezone(BUDGET_TIMEZONE, Transaction.timestamp), "YYYY-MM")
+    offset = utc_offset_minutes()
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m", Transaction.timestamp, f"{offset:+d} minutes")
+    sign, minutes = ("+" if offset >= 0 else "-"), abs(offset)
+    return func.date_format(
+        func.convert_tz(Transaction.timestamp, "+00:00", f"{sign}{minutes // 60:02d}:{minutes % 60:02d}"), "%Y-%m"
+    )
+
+
+def rebuild_category_spend(user_id: int = None, db: Session = None) -> int:
+    """
+    Recomputes the aggregate from transactions (all users, or one) in a single
+    INSERT ... SELECT. Returns the number of rows written.
+    """
+    with use_session(db) as db:
+        try:
+            period = _period_expr(db.get_bind().dialect.name)
+            category = func.coalesce(Transaction.category, literal("miscellaneous"))
+            source = (
+                select(Transaction.user_id, category, period, func.sum(Transaction.amount), func.count())
+                .where(Transaction.type == "expense")
+                .group_by(Transaction.user_id, category, period)
+            )
+            clear = delete(MonthlyCategorySpend)
+            if user_id is not None:
+                source = source.where(Transaction.user_id == user_id)
+                clear = clear.where(MonthlyCategorySpend.user_id == user_id)
+
+            db.execute(clear)
+            result = db.execute(
+                insert(MonthlyCategorySpend).from_select(["user_id", "category", "time_period", "spent", "count"], source)
+            )
+            db.commit()
+            return result.rowcount
+        except Exception:
+            db.rollback()
+            raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the monthly_category_spend aggregate.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--user-id", type=int, default=None, help="only this user (default: everyone)")
+    args = parser.parse_args()
+
+    rows = rebuild_category_spend(args.user_id)
+    print(f"[DEBUG] monthly_category_spend rebuilt: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Incremental cashflow forecasts.
+
+Each user's IncrementalForecast is checkpointed to forecast_states on the
+caller's session, so it commits with the transaction that changed it and
+survives restarts. Checkpoints carry a version that every write bumps with
+a compare-and-set. The in-process cache is keyed on it, so a worker whose
+cached state is stale (another worker wrote or dropped the checkpoint)
+reloads instead of overwriting newer sums. Anything the running sums can't
+absorb (backdated rows, bulk imports, edits, deletes) drops the state, and
+the next read rebuilds it from history once.
+"""
+import os
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config.database import use_session
+from models.account import Account
+from models.forecast_state import ForecastState
+from models.transaction import Transaction
+from utils.cashflow import IncrementalForecast
+
+FORECAST_STATE_CACHE = os.getenv("FORECAST_STATE_CACHE", "1") != "0"
+SAVE_ATTEMPTS = 3
+
+_states = {}
+_lock = threading.Lock()
+
+
+def day_number(timestamp=None) -> int:
+    """
+    UTC calendar day of a timestamp as a date ordinal.
+    """
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc)
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc)
+        timestamp = timestamp.date()
+    return timestamp.toordinal()
+
+
+def rebuild_forecast_state(user_id: int, db: Session) -> IncrementalForecast:
+    """
+    Full scan of the user's history; only needed when there is no usable state.
+    """
+    opening = db.execute(
+        select(func.coalesce(func.sum(Account.balance), 0.0)).where(Account.user_id == user_id)
+    ).scalar()
+    income = db.execute(
+        select(func.coalesce(func.sum(Transaction.amount), 0.0))
+        .where(Transaction.user_id == user_id, Transaction.type == "income")
+    ).scalar()
+
+    state = IncrementalForecast(balance=opening + income)
+    expenses = db.execute(
+        select(Transaction.timestamp, Transaction.amount)
+        .where(Transaction.user_id == user_id, Transaction.type == "expense")
+        .order_by(Transaction.timestamp, Transaction.id)
+    )
+    for timestamp, amount in expenses:
+        state.add_expense(amount, day_number(timestamp))
+    return state
+
+
+def _load(user_id: int, db: Session):
+    """
+    (version, state) from the checkpoint, or (None, None) if there is none.
+    """
+    columns = [ForecastState.version] + [getattr(ForecastState, name) for name in IncrementalForecast.FIELDS]
+    row = db.execute(select(*columns).where(ForecastState.user_id == user_id)).mappings().first()
+    if row is None:
+        return None, None
+    fields = dict(row)
+    version = fields.pop("version")
+    return version, IncrementalForecast(**fields)
+
+
+def _insert(user_id: int, state: IncrementalForecast, db: Session):
+    """
+    Writes the first checkpoint. If another worker wrote one meanwhile,
+    theirs is kept and returned instead.
+    """
+    try:
+        with db.begin_nested():
+            db.execute(insert(ForecastState).values(user_id=user_id, version=1, **state.to_dict()))
+        return 1, state
+    except IntegrityError:
+        version, theirs = _load(user_id, db)
+        return (version, theirs) if theirs is not None else (None, state)
+
+
+def _save(user_id: int, version: int, values: dict, db: Session) -> bool:
+    """
+    Compare-and-set: writes the checkpoint only if it is still at `version`.
+    False means another worker changed (or dropped) it since it was read.
+    """
+    updated = db.execute(
+        update(ForecastState)
+        .where(ForecastState.user_id == user_id, ForecastState.version == version)
+        .values(version=version + 1, **values)
+    )
+    return updated.rowcount == 1
+
+
+def _remember(user_id: int, version: int, state: IncrementalForecast):
+    if FORECAST_STATE_CACHE and version is not None:
+        with _lock:
+            _states[user_id] = (version, state)
+
+
+def _get_state(user_id: int, db: Session, commit: bool, check: bool = True):
+    """
+    (version, state). The cached state is used while the checkpoint is still
+    at its version (check=False skips that read, for callers that
+    compare-and-set anyway); otherwise the checkpoint is loaded, or rebuilt
+    from history if there is none.
+    """
+    with _lock:
+        cached = _states.get(user_id)
+    if cached is not None:
+        if not check:
+            return cached
+        version = db.execute(select(ForecastState.version).where(ForecastState.user_id == user_id)).scalar()
+        if version == cached[0]:
+            return cached
+
+    version, state = _load(user_id, db)
+    if state is None:
+        version, state = _insert(user_id, rebuild_forecast_state(user_id, db), db)
+        if commit:
+            db.commit()
+
+    _remember(user_id, version, state)
+    return version, state
+
+
+def get_forecast_state(user_id: int, db: Session = None) -> IncrementalForecast:
+    with use_session(db) as db:
+        return _get_state(user_id, db, commit=True)[1]
+
+
+def record_transaction(user_id: int, type: str, amount: float, timestamp, db: Session):
+    """
+    O(1) update for one new transaction. Call it before adding the row to the
+    session; the checkpoint is written on `db` and commits with the row.
+    The write is a compare-and-set on the checkpoint's version: if another
+    worker moved it on, their state is reloaded and the update re-applied.
+    """
+    for _ in range(SAVE_ATTEMPTS):
+        version, cached = _get_state(user_id, db, commit=False, check=False)
+        # work on a copy; the cached state only changes once the write succeeds
+        state = IncrementalForecast(alpha=cached.alpha, **cached.to_dict())
+        if type == "income":
+            state.add_income(amount)
+            applied = True
+        else:
+            applied = state.add_expense(amount, day_number(timestamp))
+
+        if not applied:
+            forget_forecast_state(user_id, db)
+            return
+        if version is not None and _save(user_id, version, state.to_dict(), db):
+            _remember(user_id, version + 1, state)
+            return
+
+        with _lock:
+            _states.pop(user_id, None)
+
+    # still contended: drop the checkpoint and let the next read rebuild it
+    forget_forecast_state(user_id, db)
+
+
+def forget_forecast_state(user_id: int, db: Session = None):
+    """
+    Drops the cached state; with a session, also deletes the checkpoint
+    (committed by the caller) so the next read rebuilds from history.
+    """
+    with _lock:
+        _states.pop(user_id, None)
+    if db is not None:
+        db.execute(delete(ForecastState).where(ForecastState.user_id == user_id))
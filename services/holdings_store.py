@@ -0,0 +1,191 @@
+"""
+Cached, array-backed holdings.
+
+The holdings file is parsed once and kept in memory; its mtime is checked at
+most every `reload_interval` seconds and everything is rebuilt when it
+changes. Each user's holdings are also kept as a NumPy structured array
+(HOLDINGS_DTYPE) so portfolio maths runs as vectorized column ops.
+
+The file is either a single holdings document ({"user_id", "holdings", ...},
+the Kite-style mock) or {"users": [document, ...]} for many users. Users not
+in the file get the first document, as get_stock_investments always did.
+
+Settings (env):
+    HOLDINGS_PATH               holdings JSON (default services/investments.json)
+    HOLDINGS_RELOAD_INTERVAL    seconds between mtime checks (default 1.0)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+HOLDINGS_PATH = os.getenv("HOLDINGS_PATH", os.path.join(os.path.dirname(__file__), "investments.json"))
+HOLDINGS_RELOAD_INTERVAL = float(os.getenv("HOLDINGS_RELOAD_INTERVAL", "1.0"))
+
+HOLDINGS_DTYPE = np.dtype([
+    ("symbol", "U32"),
+    ("exchange", "U16"),
+    ("instrument_type", "U16"),
+    ("quantity", np.float64),
+    ("avg_price", np.float64),
+    ("last_price", np.float64),
+])
+
+
+def instrument_type(holding: dict) -> str:
+    if holding.get("instrument_type"):
+        return holding["instrument_type"]
+    return "crypto" if str(holding.get("exchange", "")).lower() == "crypto" else "stock"
+
+
+def to_array(holdings) -> np.ndarray:
+    """
+    List of holding dicts -> HOLDINGS_DTYPE array. Accepts the Kite field
+    names (tradingsymbol, average_price, last_price) and the older
+    (avg_price, current_value) ones.
+    """
+    if isinstance(holdings, np.ndarray):
+        return holdings
+
+    rows = []
+    for h in holdings:
+        quantity = float(h.get("quantity") or 0)
+        avg_price = float(h.get("average_price", h.get("avg_price")) or 0)
+        last_price = h.get("last_price")
+        if last_price is None:
+            value = h.get("current_value")
+            last_price = value / quantity if value is not None and quantity else avg_price
+        rows.append((
+            (h.get("tradingsymbol") or h.get("symbol") or "").upper(),
+            h.get("exchange") or "",
+            instrument_type(h),
+            quantity,
+            avg_price,
+            float(last_price),
+        ))
+    return np.array(rows, dtype=HOLDINGS_DTYPE)
+
+
+class _Snapshot:
+    __slots__ = ("documents", "arrays", "default", "version", "fingerprints")
+
+    def __init__(self, documents: Dict[int, dict], default: dict, version: int):
+        self.documents = documents
+        self.default = default
+        self.version = version
+        self.arrays = {}
+        for user_id, doc in documents.items():
+            array = to_array(doc.get("holdings", []))
+            # shared by every request, so nobody gets to write to it
+            array.flags.writeable = False
+            self.arrays[user_id] = array
+        self.fingerprints = {}
+
+    def holdings(self, user_id: int) -> np.ndarray:
+        array = self.arrays.get(user_id)
+        if array is None:
+            array = self.arrays.get(int(self.default.get("user_id", 1)))
+        return array if array is not None else np.empty(0, dtype=HOLDINGS_DTYPE)
+
+
+class HoldingsStore:
+    def __init__(self, path: str = HOLDINGS_PATH, reload_interval: float = HOLDINGS_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked = 0.0
+        self._version = 0
+        self._snapshot = _Snapshot({}, {"holdings": []}, 0)
+        self.reload(force=True)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Re-parses the file if it changed. Returns True if it did. A file that
+        fails to parse keeps the previous holdings.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.reload_interval:
+            return False
+
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                print("[DEBUG] holdings file unavailable:", e)
+                return False
+            if mtime == self._mtime and not force:
+                return False
+
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                documents = data["users"] if isinstance(data, dict) and "users" in data else data
+                if isinstance(documents, dict):
+                    documents = [documents]
+                by_user = {int(doc.get("user_id", 1)): doc for doc in documents}
+                default = documents[0] if documents else {"holdings": []}
+                self._version += 1
+                snapshot = _Snapshot(by_user, default, self._version)
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                self._mtime = mtime
+                print("[DEBUG] holdings not reloaded:", e)
+                return False
+
+            self._mtime = mtime
+            self._snapshot = snapshot
+            return True
+
+    def _current(self) -> _Snapshot:
+        self.reload()
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """
+        Bumped on every reload, for caches derived from the holdings.
+        """
+        return self._current().version
+
+    def document(self, user_id: int) -> dict:
+        """
+        The user's holdings document as parsed from the file. Shared between
+        callers: treat it as read-only.
+        """
+        snapshot = self._current()
+        return snapshot.documents.get(user_id, snapshot.default)
+
+    def holdings(self, user_id: int) -> np.ndarray:
+        """
+        The user's holdings as a read-only HOLDINGS_DTYPE array.
+        """
+        return self._current().holdings(user_id)
+
+    def fingerprint(self, user_id: int) -> str:
+        """
+        Content hash of the user's holdings; changes only when they do.
+        """
+        snapshot = self._current()
+        digest = snapshot.fingerprints.get(user_id)
+        if digest is None:
+            digest = hashlib.sha1(snapshot.holdings(user_id).tobytes()).hexdigest()
+            snapshot.fingerprints[user_id] = digest
+        return digest
+
+
+_store: Optional[HoldingsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_holdings_store() -> HoldingsStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HoldingsStore()
+    return _store
@@ -0,0 +1,162 @@
+"""
+Budget threshold alerts, delivered off the write path.
+
+notify() only schedules the event on an event loop running in a daemon
+thread, which hands it to the configured async sink, so a slow or failing
+sink (Twilio, say) never adds latency to the expense write.
+
+Sinks are objects with `async def send(event)`. Pick one with NOTIFIER
+(log | whatsapp | queue) or install one with set_notifier().
+"""
+import asyncio
+import os
+import queue
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+NOTIFIER = os.getenv("NOTIFIER", "log").lower()
+BUDGET_ALERT_WHATSAPP_TO = os.getenv("BUDGET_ALERT_WHATSAPP_TO")
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "10000"))
+
+BUDGET_THRESHOLDS = (80, 100)
+
+
+def budget_threshold_events(user_id: int, category: str, time_period: str, before: float, after: float, max_limit: float) -> list:
+    """
+    One event per threshold (% of max_limit) crossed going from `before` to `after`.
+    """
+    events = []
+    for percent in BUDGET_THRESHOLDS:
+        limit = max_limit * percent / 100
+        if before < limit <= after:
+            events.append({
+                "type": "budget_threshold",
+                "user_id": user_id,
+                "category": category,
+                "time_period": time_period,
+                "threshold": percent,
+                "spent": after,
+                "max_limit": max_limit,
+            })
+    return events
+
+
+def format_budget_alert(event: dict) -> str:
+    from mcp.tools.renderer import format_inr, format_period
+
+    spent, limit = format_inr(event["spent"]), format_inr(event["max_limit"])
+    period = format_period(event["time_period"])
+    if event["threshold"] >= 100:
+        return f"⚠️ You've used up your {event['category']} budget for {period}: {spent} spent of {limit}."
+    return f"Heads up: you've used {event['threshold']}% of your {event['category']} budget for {period} ({spent} of {limit})."
+
+
+# ---------------- sinks ----------------
+
+class LogNotifier:
+    async def send(self, event: dict):
+        print("[DEBUG] budget alert:", format_budget_alert(event))
+
+
+class QueueNotifier:
+    """
+    Collects events in memory; for tests and local runs.
+    """
+
+    def __init__(self):
+        self.events = queue.Queue()
+
+    async def send(self, event: dict):
+        self.events.put(event)
+
+
+class WhatsAppNotifier:
+    def __init__(self, to: str = None):
+        self.to = to or BUDGET_ALERT_WHATSAPP_TO
+        if not self.to:
+            raise ValueError("BUDGET_ALERT_WHATSAPP_TO is not set")
+
+    async def send(self, event: dict):
+        from services.whatsapp import send_whatsapp
+
+        await asyncio.to_thread(send_whatsapp, self.to, body=format_budget_alert(event))
+
+
+def build_notifier(kind: str = NOTIFIER):
+    if kind == "whatsapp":
+        return WhatsAppNotifier()
+    if kind == "queue":
+        return QueueNotifier()
+    return LogNotifier()
+
+
+# ---------------- dispatcher ----------------
+
+class NotificationDispatcher:
+    def __init__(self, sink=None, maxsize: int = NOTIFY_QUEUE_SIZE):
+        self.sink = sink
+        self.maxsize = maxsize
+        self._loop = None
+        self._pending = 0
+        self._tasks = set()
+        self._cond = threading.Condition()
+
+    def notify(self, event: dict):
+        self._ensure_started()
+        with self._cond:
+            if self._pending >= self.maxsize:
+                print("[DEBUG] notification queue full, dropping:", event)
+                return
+            self._pending += 1
+        self._loop.call_soon_threadsafe(self._spawn, event)
+
+    def join(self):
+        """
+        Blocks until every queued event has been handed to the sink.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending == 0)
+
+    def _ensure_started(self):
+        if self._loop is not None:
+            return
+        with self._cond:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="notifier", daemon=True).start()
+                self._loop = loop
+
+    def _spawn(self, event: dict):
+        task = self._loop.create_task(self._deliver(event))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, event: dict):
+        try:
+            if self.sink is None:
+                self.sink = build_notifier()
+            await self.sink.send(event)
+        except Exception as e:
+            print("[DEBUG] notification failed:", e)
+        finally:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+
+_dispatcher = NotificationDispatcher()
+
+
+def set_notifier(sink):
+    _dispatcher.sink = sink
+
+
+def notify(event: dict):
+    _dispatcher.notify(event)
+
+
+def join_notifications():
+    _dispatcher.join()
@@ -0,0 +1,311 @@
+"""
+Payment orchestration: compliance screening, then order creation through a
+payment gateway, with idempotency and a recorded state history.
+
+Every payment gets a row keyed by an idempotency key. A retried request with
+the same key returns the existing payment instead of creating a second order,
+with the message it was rejected or failed with kept in its `reason`.
+Each state change is also written to payment_events:
+
+    created -> rejected          (compliance said no)
+    created -> order_created     (gateway returned an order)
+    created -> failed            (gateway error; the same key may retry)
+
+The compliance limits are reserved before the gateway call (so concurrent
+payments can't both slip under them) and released if the order fails. A
+user's counters are seeded from today's and this month's order_created
+payments the first time this process sees them.
+
+Settings (env):
+    PAYMENT_GATEWAY                 "razorpay" (default) or "stub", the offline gateway for testing
+    PAYMENT_IDEMPOTENCY_WINDOW      seconds in which an identical request counts as a retry (default 600)
+    RAZORPAY_TEST_API_KEY / RAZORPAY_TEST_SECRET_KEY
+"""
+import asyncio
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config.compliance import ComplianceEngine
+from config.database import use_session
+from config.llm import get_async_http_client
+from models.payment import Payment, PaymentEvent
+from utils import periods
+
+load_dotenv()
+
+RAZORPAY_ORDERS_URL = "https://api.razorpay.com/v1/orders"
+IDEMPOTENCY_WINDOW = int(os.getenv("PAYMENT_IDEMPOTENCY_WINDOW", "600"))
+
+
+class GatewayError(Exception):
+    pass
+
+
+class RazorpayGateway:
+    """
+    Creates orders with the Razorpay REST API over the shared pooled async
+    HTTP client, so concurrent payments don't each hold a thread or a new
+    TLS connection.
+    """
+    name = "razorpay"
+
+    def __init__(self, key_id: str = None, key_secret: str = None):
+        key_id = key_id or os.getenv("RAZORPAY_TEST_API_KEY")
+        key_secret = key_secret or os.getenv("RAZORPAY_TEST_SECRET_KEY")
+        if not key_id or not key_secret:
+            raise ValueError("RAZORPAY_TEST_API_KEY or RAZORPAY_TEST_SECRET_KEY missing in environment variables "
+                             "(set PAYMENT_GATEWAY=stub for offline testing).")
+        self.auth = httpx.BasicAuth(key_id, key_secret)
+
+    async def create_order(self, amount: float, currency: str, receipt: str, notes: dict) -> dict:
+        order_data = {
+            "amount": int(round(amount * 100)),
+            "currency": currency,
+            "receipt": receipt,
+            "payment_capture": 1,
+            "notes": notes,
+        }
+        try:
+            resp = await get_async_http_client().post(RAZORPAY_ORDERS_URL, json=order_data, auth=self.auth)
+        except httpx.HTTPError as e:
+            raise GatewayError(f"razorpay unreachable: {e}") from e
+
+        if resp.status_code >= 400:
+            try:
+                message = resp.json()["error"]["description"]
+            except (ValueError, KeyError, TypeError):
+                message = resp.text
+            raise GatewayError(f"razorpay error {resp.status_code}: {message}")
+        return resp.json()
+
+
+class StubGateway:
+    """
+    Offline gateway for local runs and tests: order ids are derived from the
+    receipt, so the same payment always gets the same order.
+    """
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+        self.orders = {}
+
+    async def create_order(self, amount: float, currency: str, receipt: str, notes: dict) -> dict:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            raise GatewayError("stub gateway configured to fail")
+        order = {
+            "id": f"order_stub_{receipt[:14]}",
+            "amount": int(round(amount * 100)),
+            "currency": currency,
+            "receipt": receipt,
+            "status": "created",
+            "notes": notes,
+        }
+        self.orders[order["id"]] = order
+        return order
+
+
+def build_gateway():
+    """
+    Razorpay unless PAYMENT_GATEWAY=stub; never falls back to the stub, whose
+    orders and links are not real. Raises ValueError when keys are missing.
+    """
+    choice = os.getenv("PAYMENT_GATEWAY", "razorpay").lower()
+    if choice == "stub":
+        return StubGateway()
+    if choice != "razorpay":
+        raise ValueError(f"unknown PAYMENT_GATEWAY {choice}; use razorpay or stub")
+    return RazorpayGateway()
+
+
+def derive_idempotency_key(user_id: int, amount: float, payee: str, now: float = None,
+                           window: int = IDEMPOTENCY_WINDOW) -> str:
+    """
+    For callers without a client-supplied key (chat turns): the same user,
+    amount and payee within one `window`-second bucket is treated as a retry.
+    40 hex chars, which also fits Razorpay's receipt field.
+    """
+    bucket = int((now if now is not None else time.time()) // window)
+    raw = f"{user_id}|{round(float(amount), 2)}|{(payee or '').strip().lower()}|{bucket}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def upi_link(order_id: str) -> str:
+    return f"https://rzp.io/i/{order_id}"
+
+
+def payment_to_dict(payment: Payment) -> dict:
+    return {
+        "payment_id": payment.id,
+        "idempotency_key": payment.idempotency_key,
+        "status": payment.status,
+        "amount": payment.amount,
+        "currency": payment.currency,
+        "payee": payment.payee,
+        "order_id": payment.order_id,
+        "upi_link": upi_link(payment.order_id) if payment.order_id else None,
+        "reason": payment.reason,
+    }
+
+
+def get_payment(idempotency_key: str, db: Session = None):
+    with use_session(db) as db:
+        return db.execute(select(Payment).where(Payment.idempotency_key == idempotency_key)).scalar_one_or_none()
+
+
+def get_payment_events(payment_id: int, db: Session = None):
+    with use_session(db) as db:
+        events = db.execute(
+            select(PaymentEvent).where(PaymentEvent.payment_id == payment_id).order_by(PaymentEvent.id)
+        ).scalars().all()
+        return [{"status": e.status, "detail": e.detail, "created_at": str(e.created_at)} for e in events]
+
+
+def _payment_history(db: Session, user_id: int, now: datetime) -> list:
+    """
+    This month's completed payments as (timestamp, amount) rows, for seeding
+    the compliance counters. `now` is aware; the month is bounded in UTC and
+    timestamps come back in now's timezone, as the counters use. Naive
+    created_at values are UTC.
+    """
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    rows = db.execute(
+        select(Payment.created_at, Payment.amount).where(
+            Payment.user_id == user_id,
+            Payment.status == "order_created",
+            Payment.created_at >= month_start.astimezone(timezone.utc),
+        )
+    ).all()
+    return [
+        SimpleNamespace(
+            timestamp=(created if created.tzinfo else created.replace(tzinfo=timezone.utc)).astimezone(now.tzinfo),
+            amount=amount,
+        )
+        for created, amount in rows
+        if created is not None
+    ]
+
+
+def _claim(db: Session, user_id: int, key: str, amount: float, currency: str, payee: str, category: str, gateway: str):
+    """
+    Inserts the payment row for `key`. The unique constraint decides between
+    concurrent duplicates; the loser gets the winner's row and fresh=False.
+    """
+    payment = Payment(
+        user_id=user_id,
+        idempotency_key=key,
+        amount=amount,
+        currency=currency,
+        payee=payee,
+        category=category,
+        status="created",
+        gateway=gateway,
+    )
+    try:
+        db.add(payment)
+        db.flush()
+        db.add(PaymentEvent(payment_id=payment.id, status="created"))
+        db.commit()
+        return payment, True
+    except IntegrityError:
+        db.rollback()
+        return get_payment(key, db), False
+
+
+def _transition(db: Session, payment: Payment, status: str, detail: str = None, **fields):
+    for name, value in fields.items():
+        setattr(payment, name, value)
+    payment.status = status
+    db.add(PaymentEvent(payment_id=payment.id, status=status, detail=detail))
+    db.commit()
+
+
+class PaymentOrchestrator:
+    """
+    Runs one payment end to end: claim the idempotency key, screen with the
+    ComplianceEngine, create the gateway order, record each transition.
+    The sync DB steps run in a worker thread; the gateway call is awaited.
+    """
+
+    def __init__(self, gateway=None, compliance: ComplianceEngine = None, currency: str = "INR"):
+        self.gateway = gateway or build_gateway()
+        self.compliance = compliance or ComplianceEngine()
+        self.currency = currency
+
+    async def pay(self, amount: float, payee: str, user_id: int = 1, category: str = None,
+                  idempotency_key: str = None, db: Session = None) -> dict:
+        if not amount or amount <= 0:
+            return {"status": "error", "message": "amount must be positive"}
+        key = idempotency_key or derive_idempotency_key(user_id, amount, payee)
+
+        with use_session(db) as db:
+            payment, fresh = await asyncio.to_thread(
+                _claim, db, user_id, key, amount, self.currency, payee, category, self.gateway.name
+            )
+            if payment is None:
+                return {"status": "error", "message": "payment could not be recorded"}
+
+            # a failed gateway call may be retried with the same key; anything else is a duplicate
+            if not fresh and payment.status != "failed":
+                return {**payment_to_dict(payment), "message": payment.reason, "duplicate": True}
+
+            # the limits' days and months are budget days and months
+            now = periods.now()
+            history = None
+            if not self.compliance.knows(user_id):
+                history = await asyncio.to_thread(_payment_history, db, user_id, now)
+
+            # reserves the amount against the limits; released below if the order fails
+            verdict = self.compliance.check_payment(amount=amount, user=user_id, payee=payee or "", category=category,
+                                                    recent_transactions=history, now=now, record=True)
+            if verdict["status"] != "approved":
+                await asyncio.to_thread(
+                    _transition, db, payment, "rejected", verdict["reason"], reason=verdict["message"]
+                )
+                return {**payment_to_dict(payment), "message": verdict["message"], "duplicate": False}
+
+            try:
+                order = await self.gateway.create_order(amount, self.currency, key, {"payee": payee or ""})
+            except GatewayError as e:
+                print("[DEBUG] payment order failed:", e)
+                self.compliance.release_payment(amount=amount, user=user_id, now=now)
+                await asyncio.to_thread(_transition, db, payment, "failed", "GATEWAY_ERROR", reason=str(e))
+                return {**payment_to_dict(payment), "message": str(e), "duplicate": False}
+            except BaseException:
+                self.compliance.release_payment(amount=amount, user=user_id, now=now)
+                raise
+
+            await asyncio.to_thread(
+                _transition, db, payment, "order_created", order["id"], order_id=order["id"], reason=None
+            )
+            return {**payment_to_dict(payment), "duplicate": False}
+
+
+_orchestrator = None
+
+
+def get_orchestrator() -> PaymentOrchestrator:
+    """
+    Raises ValueError when the payment gateway is not configured.
+    """
+    global _orchestrator
+    if _orchestrator is None:
+        _orchestrator = PaymentOrchestrator()
+    return _orchestrator
+
+
+def set_orchestrator(orchestrator: PaymentOrchestrator):
+    global _orchestrator
+    _orchestrator = orchestrator
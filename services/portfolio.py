@@ -1,38 +1,144 @@
-from collections import defaultdict
-import os
-import json
+import numpy as np
+
+from services.holdings_store import get_holdings_store, to_array
+
 
 def get_stock_investments(user_id):
     """
     Returns a mock API response for user's stock investments, similar to Zerodha's holdings endpoint.
+    Served from the cached holdings store; the file is only re-read when it changes.
+    """
+    return get_holdings_store().document(user_id)
+
+
+def get_holdings(user_id) -> np.ndarray:
+    """
+    The user's holdings as a HOLDINGS_DTYPE structured array.
     """
-    json_path = os.path.join(os.path.dirname(__file__), "investments.json")
-    with open(json_path, "r") as f:
-        data = json.load(f)
-    return data
-    
+    return get_holdings_store().holdings(user_id)
+
+
+def holding_values(holdings):
+    """
+    Per-holding (cost, current value, pnl) columns.
+    """
+    h = to_array(holdings)
+    cost = h["quantity"] * h["avg_price"]
+    value = h["quantity"] * h["last_price"]
+    return cost, value, value - cost
+
+
+def allocation(holdings, by: str = "instrument_type") -> dict:
+    """
+    Share of current value (%) per instrument type, or per symbol with by="symbol".
+    """
+    h = to_array(holdings)
+    _, value, _ = holding_values(h)
+    total = value.sum()
+    if not total:
+        return {}
+    keys, index = np.unique(h[by], return_inverse=True)
+    shares = np.bincount(index, weights=value, minlength=len(keys)) / total * 100
+    return {str(k): round(float(s), 2) for k, s in zip(keys, shares)}
+
+
 def portfolio_summary(investments):
-    total_cost = 0
-    total_value = 0
-    allocation = defaultdict(float)
+    h = to_array(investments)
+    cost, value, _ = holding_values(h)
 
-    for inv in investments:
-        cost = inv["quantity"] * inv["avg_price"]
-        total_cost += cost
-        total_value += inv["current_value"]
-        allocation[inv["instrument_type"]] += inv["current_value"]
+    total_cost = float(cost.sum())
+    total_value = float(value.sum())
 
     pnl = total_value - total_cost
     returns = (pnl / total_cost) * 100 if total_cost else 0
 
-    allocation_percent = {
-        k: round((v / total_value) * 100, 2) for k, v in allocation.items()
-    } if total_value else {}
-
     return {
         "total_cost": round(total_cost, 2),
         "total_current_value": round(total_value, 2),
         "net_pnl": round(pnl, 2),
         "returns_percent": round(returns, 2),
-        "allocation": allocation_percent
-    }
\ No newline at end of file
+        "allocation": allocation(h)
+    }
+
+
+def match_symbols(investments, name: str) -> list:
+    """
+    Held symbols a stock name refers to: the exact symbol, else every held
+    symbol it prefixes, since users (and the entity extractor) say "HDFC"
+    or "TATA" for HDFCBANK or TATASTEEL.
+    """
+    h = to_array(investments)
+    # symbols are stored upper-case, as the exchanges list them
+    name = name.strip().upper()
+    if not name:
+        return []
+    if (h["symbol"] == name).any():
+        return [name]
+    return sorted({str(s) for s in h["symbol"][np.char.startswith(h["symbol"], name)]})
+
+
+def stock_pnl(investments, symbol: str):
+    """
+    P&L for one symbol (all its lots), or None if it isn't held or the name
+    matches several holdings (see match_symbols).
+    """
+    h = to_array(investments)
+    matches = match_symbols(h, symbol)
+    if len(matches) != 1:
+        return None
+    symbol = matches[0]
+    mask = h["symbol"] == symbol
+
+    cost, value, pnl = (column[mask].sum() for column in holding_values(h))
+    quantity = h["quantity"][mask].sum()
+    return {
+        "stock": symbol.upper(),
+        "quantity": float(quantity),
+        "avg_price": round(float(cost / quantity), 2) if quantity else 0.0,
+        "last_price": round(float(h["last_price"][mask][-1]), 2),
+        "current_value": round(float(value), 2),
+        "pnl": round(float(pnl), 2),
+        "pnl_percent": round(float(pnl / cost * 100), 2) if cost else 0.0,
+    }
+
+
+
+def top_movers(investments, n: int = 3):
+    """
+    The n best and n worst holdings by P&L %, as (symbol, pnl %) pairs.
+    """
+    h = to_array(investments)
+    cost, _, pnl = holding_values(h)
+    pct = np.divide(pnl, cost, out=np.zeros_like(pnl), where=cost > 0) * 100
+    order = np.argsort(pct, kind="stable")
+    pair = lambda i: (str(h["symbol"][i]), round(float(pct[i]), 2))
+    return {
+        "gainers": [pair(i) for i in order[::-1][:n] if pct[i] > 0],
+        "losers": [pair(i) for i in order[:n] if pct[i] < 0],
+    }
+
+
+def top_holdings(investments, n: int = 5):
+    """
+    The n largest holdings by current value, as (symbol, share of portfolio %) pairs.
+    """
+    h = to_array(investments)
+    _, value, _ = holding_values(h)
+    total = value.sum()
+    if not total:
+        return []
+    order = np.argsort(value)[::-1][:n]
+    return [(str(h["symbol"][i]), round(float(value[i] / total * 100), 2)) for i in order]
+
+
+def concentration(investments) -> float:
+    """
+    Herfindahl index of the value weights, 0-100: 100 is a single holding,
+    100/n an even split across n.
+    """
+    _, value, _ = holding_values(investments)
+    total = value.sum()
+    if not total:
+        return 0.0
+    weights = value / total
+    return round(float(weights @ weights) * 100, 2)
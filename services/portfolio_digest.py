@@ -0,0 +1,112 @@
+"""
+Compact portfolio context for LLM prompts.
+
+Instead of the repr of every holding (prompt size linear in the portfolio),
+the investment prompts get a fixed-size digest: totals, allocation, largest
+holdings, top movers and risk scores. Digests are cached per user and
+rebuilt only when the holdings fingerprint changes.
+"""
+import threading
+
+import numpy as np
+
+from services.holdings_store import get_holdings_store
+from services.portfolio import (
+    concentration,
+    match_symbols,
+    portfolio_summary,
+    stock_pnl,
+    top_holdings,
+    top_movers,
+)
+from services.rebalance import market_inputs
+from services.risk import risk_profile
+
+TOP_N = 5
+MOVERS_N = 3
+
+_lock = threading.Lock()
+_digests = {}
+
+
+def build_digest(holdings) -> dict:
+    summary = portfolio_summary(holdings)
+    risk = risk_profile(holdings)
+
+    # estimated annual volatility from the rebalancer's (cached) covariance
+    value = holdings["quantity"] * holdings["last_price"]
+    total = value.sum()
+    volatility = None
+    if total:
+        _, cov, *_ = market_inputs(holdings)
+        w = value / total
+        volatility = round(float(np.sqrt(max(w @ cov @ w, 0.0))) * 100, 2)
+
+    return {
+        **summary,
+        "holdings_count": int(len(holdings)),
+        "top_holdings": top_holdings(holdings, TOP_N),
+        **top_movers(holdings, MOVERS_N),
+        "risk": {
+            "diversification_score": risk["diversification_score"],
+            "high_risk_weight": risk["high_risk_weight"],
+            "concentration": concentration(holdings),
+            "volatility": volatility,
+        },
+    }
+
+
+def get_portfolio_digest(user_id: int) -> dict:
+    """
+    The user's digest, recomputed only when their holdings changed.
+    """
+    store = get_holdings_store()
+    fingerprint = store.fingerprint(user_id)
+
+    cached = _digests.get(user_id)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    digest = build_digest(store.holdings(user_id))
+    with _lock:
+        _digests[user_id] = (fingerprint, digest)
+    return digest
+
+
+def format_digest(digest: dict) -> str:
+    risk = digest["risk"]
+    allocation = ", ".join(f"{k} {v}%" for k, v in digest["allocation"].items()) or "none"
+    largest = ", ".join(f"{s} {p}%" for s, p in digest["top_holdings"]) or "none"
+    gainers = ", ".join(f"{s} +{p}%" for s, p in digest["gainers"]) or "none"
+    losers = ", ".join(f"{s} {p}%" for s, p in digest["losers"]) or "none"
+    volatility = f"{risk['volatility']}%" if risk["volatility"] is not None else "n/a"
+
+    return "\n".join([
+        f"Portfolio: {digest['holdings_count']} holdings, invested ₹{digest['total_cost']:,}, "
+        f"value ₹{digest['total_current_value']:,}, P&L ₹{digest['net_pnl']:,} ({digest['returns_percent']}%)",
+        f"Allocation: {allocation}",
+        f"Largest holdings: {largest}",
+        f"Top gainers: {gainers}",
+        f"Top losers: {losers}",
+        f"Risk: diversification {risk['diversification_score']}, high-risk weight {risk['high_risk_weight']}%, "
+        f"concentration (HHI) {risk['concentration']}, est. volatility {volatility}",
+    ])
+
+
+def portfolio_context(user_id: int, stock: str = None) -> str:
+    """
+    Digest text for the prompt, plus the one holding the question is about.
+    """
+    text = format_digest(get_portfolio_digest(user_id))
+    if stock:
+        holdings = get_holdings_store().holdings(user_id)
+        pnl = stock_pnl(holdings, stock)
+        matches = match_symbols(holdings, stock) if pnl is None else None
+        if pnl:
+            text += (f"\n{pnl['stock']}: {pnl['quantity']:g} @ avg ₹{pnl['avg_price']:,}, last ₹{pnl['last_price']:,}, "
+                     f"P&L ₹{pnl['pnl']:,} ({pnl['pnl_percent']}%)")
+        elif matches:
+            text += f"\n{stock.upper()}: several holdings match ({', '.join(matches)})"
+        else:
+            text += f"\n{stock.upper()}: not held"
+    return text
@@ -0,0 +1,309 @@
+"""
+Portfolio rebalancing.
+
+Two target-weight solvers over the user's holdings, both long-only, fully
+invested and capped per asset:
+
+    mean_variance   max  w'mu - (risk_aversion / 2) w'Sigma w
+                    solved with FISTA (accelerated projected gradient); the
+                    projection onto the capped simplex is a safeguarded
+                    Newton search, so an iteration is one matrix-vector
+                    product plus a few vector ops
+    risk_parity     every holding contributes the same share of risk,
+                    solved with SciPy's L-BFGS-B on the convex log-barrier form
+
+Expected returns and covariance come from the price-history file
+(PRICE_HISTORY_PATH, an .npz with "symbols" and "prices" as assets x days)
+via services/risk.py. Symbols without history fall back to the per-type
+assumptions in TYPE_ASSUMPTIONS, uncorrelated with the rest (a diagonal
+block). Inputs and solutions are cached per set of holdings and history
+file version; a new setting (say another risk aversion) is warm-started
+from the last solution over the same inputs, or from the current weights.
+
+Settings (env):
+    PRICE_HISTORY_PATH          optional .npz of price histories
+    REBALANCE_RISK_AVERSION     default risk aversion (default 4)
+    REBALANCE_MAX_WEIGHT        per-asset cap (default 0.25)
+    REBALANCE_MIN_TRADE         smallest trade worth placing, in ₹ (default 500)
+"""
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from services.holdings_store import to_array
+from services.portfolio import holding_values
+from services.risk import annualised_moments
+
+PRICE_HISTORY_PATH = os.getenv("PRICE_HISTORY_PATH")
+DEFAULT_RISK_AVERSION = float(os.getenv("REBALANCE_RISK_AVERSION", "4"))
+MAX_WEIGHT = float(os.getenv("REBALANCE_MAX_WEIGHT", "0.25"))
+MIN_TRADE_VALUE = float(os.getenv("REBALANCE_MIN_TRADE", "500"))
+
+# (annual expected return, annual volatility) for symbols without history
+TYPE_ASSUMPTIONS = {
+    "stock": (0.12, 0.22),
+    "crypto": (0.25, 0.70),
+}
+DEFAULT_ASSUMPTION = (0.08, 0.30)
+
+# smallest tradable quantity per instrument type
+LOT_SIZES = {
+    "stock": 1.0,
+    "crypto": 0.0001,
+}
+
+METHODS = ("mean_variance", "risk_parity")
+
+CACHE_SIZE = 256
+
+_lock = threading.Lock()
+_inputs_cache = OrderedDict()
+_solution_cache = OrderedDict()
+_history = {"key": None, "symbols": None, "prices": None}
+
+MarketInputs = namedtuple("MarketInputs", "mu cov lipschitz source key")
+
+
+def _cache_get(cache: OrderedDict, key):
+    with _lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key, value):
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+# ---------------- inputs ----------------
+
+def _price_history(path: str = None):
+    """
+    (symbol -> row, prices, file version), reloaded when the file changes.
+    """
+    path = path or PRICE_HISTORY_PATH
+    if not path:
+        return {}, None, None
+    try:
+        version = os.stat(path).st_mtime_ns
+    except OSError as e:
+        print("[DEBUG] price history unavailable:", e)
+        return {}, None, None
+
+    key = (path, version)
+    if _history["key"] != key:
+        with np.load(path) as data:
+            symbols = [str(s).upper() for s in data["symbols"]]
+            prices = np.asarray(data["prices"], dtype=np.float64)
+        _history.update(key=key, symbols={s: i for i, s in enumerate(symbols)}, prices=prices)
+    return _history["symbols"], _history["prices"], version
+
+
+def market_inputs(holdings, history_path: str = None):
+    """
+    Annual expected returns, covariance and the gradient's Lipschitz constant
+    (largest eigenvalue of the covariance) for the holdings, cached.
+    """
+    h = to_array(holdings)
+    index, prices, version = _price_history(history_path)
+    key = (h["symbol"].tobytes(), h["instrument_type"].tobytes(), version)
+
+    cached = _cache_get(_inputs_cache, key)
+    if cached is not None:
+        return cached
+
+    assumed = np.array([TYPE_ASSUMPTIONS.get(str(t), DEFAULT_ASSUMPTION) for t in h["instrument_type"]])
+    mu = assumed[:, 0].copy()
+    cov = np.diag(assumed[:, 1] ** 2)
+
+    rows = np.array([index.get(str(s), -1) for s in h["symbol"]], dtype=np.int64)
+    known = np.flatnonzero(rows >= 0)
+    if len(known) and prices is not None and prices.shape[1] > 2:
+        mean, sub = annualised_moments(prices[rows[known]])
+        mu[known] = mean
+        cov[np.ix_(known, known)] = sub
+
+    lipschitz = float(np.linalg.eigvalsh(cov)[-1]) if len(h) else 0.0
+    inputs = MarketInputs(mu, cov, lipschitz, "history" if len(known) else "assumed", key)
+    _cache_put(_inputs_cache, key, inputs)
+    return inputs
+
+
+# ---------------- solvers ----------------
+
+def project_capped_simplex(v: np.ndarray, cap: float) -> np.ndarray:
+    """
+    Euclidean projection onto {w : sum(w) = 1, 0 <= w <= cap}.
+    w = clip(v - tau, 0, cap), with tau found by Newton steps on the
+    piecewise-linear sum, falling back to bisection inside the bracket.
+    """
+    n = len(v)
+    if n == 0:
+        return v
+    cap = max(cap, 1.0 / n)
+
+    lo, hi = v.min() - cap, v.max()
+    tau = (v.sum() - 1.0) / n
+    for _ in range(100):
+        shifted = v - tau
+        w = np.clip(shifted, 0.0, cap)
+        excess = w.sum() - 1.0
+        if abs(excess) < 1e-12:
+            break
+        if excess > 0:
+            lo = tau
+        else:
+            hi = tau
+        free = np.count_nonzero((shifted > 0) & (shifted < cap))
+        step = tau + excess / free if free else None
+        tau = step if step is not None and lo < step < hi else (lo + hi) / 2
+    return w
+
+
+def solve_mean_variance(mu, cov, risk_aversion: float = DEFAULT_RISK_AVERSION, cap: float = MAX_WEIGHT,
+                        w0=None, lipschitz: float = None, tol: float = 1e-8, max_iter: int = 2000):
+    """
+    FISTA for max w'mu - (risk_aversion / 2) w'Sigma w on the capped simplex.
+    Returns (weights, iterations).
+    """
+    n = len(mu)
+    if lipschitz is None:
+        lipschitz = float(np.linalg.eigvalsh(cov)[-1])
+    step = 1.0 / max(risk_aversion * lipschitz, 1e-12)
+
+    w = project_capped_simplex(np.full(n, 1.0 / n) if w0 is None else np.asarray(w0, dtype=np.float64), cap)
+    y, t = w, 1.0
+    for k in range(1, max_iter + 1):
+        grad = risk_aversion * (cov @ y) - mu
+        w_next = project_capped_simplex(y - step * grad, cap)
+        if np.max(np.abs(w_next - w)) < tol:
+            return w_next, k
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + ((t - 1) / t_next) * (w_next - w)
+        w, t = w_next, t_next
+    return w, max_iter
+
+
+def solve_risk_parity(cov, budget=None, y0=None):
+    """
+    Equal (or `budget`-weighted) risk contributions. Minimises
+    0.5 y'Sigma y - sum(b log y) over y > 0, then normalises y to weights.
+    A diagonal covariance has the closed form w ~ sqrt(b) / sigma.
+    """
+    n = cov.shape[0]
+    b = np.full(n, 1.0 / n) if budget is None else np.asarray(budget, dtype=np.float64) / np.sum(budget)
+    vol = np.sqrt(np.diag(cov))
+
+    if not np.any(cov - np.diag(np.diag(cov))):
+        w = np.sqrt(b) / vol
+        return w / w.sum()
+
+    from scipy.optimize import minimize
+
+    def objective(y):
+        sy = cov @ y
+        return 0.5 * y @ sy - b @ np.log(y), sy - b / y
+
+    if y0 is None:
+        start = np.sqrt(b) / vol
+    else:
+        # warm start from earlier weights, scaled onto y'Sigma y = 1 where the optimum lies
+        start = np.maximum(np.asarray(y0, dtype=np.float64), 1e-12)
+        start = start / np.sqrt(start @ cov @ start)
+    result = minimize(objective, start, jac=True, method="L-BFGS-B", bounds=[(1e-12, None)] * n,
+                      options={"maxiter": 500, "gtol": 1e-10})
+    return result.x / result.x.sum()
+
+
+# ---------------- trades ----------------
+
+def trade_list(holdings, target_weights, min_trade_value: float = MIN_TRADE_VALUE):
+    """
+    Orders that move the holdings towards the target weights, in whole lots
+    (LOT_SIZES) and rounded towards zero so the trades never exceed the
+    target. Trades worth less than `min_trade_value` are skipped.
+    """
+    h = to_array(holdings)
+    _, value, _ = holding_values(h)
+    target_value = np.asarray(target_weights) * value.sum()
+
+    lots = np.array([LOT_SIZES.get(str(t), 1.0) for t in h["instrument_type"]])
+    price = np.where(h["last_price"] > 0, h["last_price"], 1.0)
+    delta_qty = np.trunc((target_value - value) / price / lots) * lots
+    delta_value = delta_qty * price
+
+    trades = []
+    for i in np.flatnonzero(np.abs(delta_value) >= max(min_trade_value, 1e-9)):
+        trades.append({
+            "stock": str(h["symbol"][i]),
+            "action": "buy" if delta_qty[i] > 0 else "sell",
+            "quantity": round(float(abs(delta_qty[i])), 6),
+            "amount": round(float(abs(delta_value[i])), 2),
+        })
+    return trades
+
+
+def _distribution(symbols, amounts, total):
+    return [
+        {"stock": str(s), "amount": round(float(a), 2), "percentage": round(float(a / total * 100), 2) if total else 0.0}
+        for s, a in zip(symbols, amounts)
+    ]
+
+
+def rebalance(holdings, method: str = "mean_variance", risk_aversion: float = DEFAULT_RISK_AVERSION,
+              max_weight: float = MAX_WEIGHT, min_trade_value: float = MIN_TRADE_VALUE,
+              history_path: str = None) -> dict:
+    """
+    Current vs target allocation, the trades to get there, and the target's
+    expected return and volatility (annual).
+    """
+    if method not in METHODS:
+        return {"status": "error", "message": f"unknown method {method}; use one of {', '.join(METHODS)}"}
+    # the FISTA step is 1 / (risk_aversion * L): non-positive values diverge
+    if not risk_aversion > 0:
+        return {"status": "error", "message": "risk_aversion must be positive"}
+    if not 0 < max_weight <= 1:
+        return {"status": "error", "message": "max_weight must be in (0, 1]"}
+
+    h = to_array(holdings)
+    if len(h) == 0:
+        return {"status": "error", "message": "no holdings to rebalance"}
+
+    _, value, _ = holding_values(h)
+    total = float(value.sum())
+    current = value / total if total else np.full(len(h), 1.0 / len(h))
+
+    mu, cov, lipschitz, source, inputs_key = market_inputs(h, history_path)
+    # targets depend on the symbols and settings, not on quantities held
+    key = (inputs_key, method, risk_aversion, max_weight)
+    weights = _cache_get(_solution_cache, key)
+
+    if weights is None:
+        # warm start from the last solve over the same inputs, e.g. with another risk aversion
+        previous = _cache_get(_solution_cache, (inputs_key, method))
+        if method == "mean_variance":
+            weights, _ = solve_mean_variance(mu, cov, risk_aversion, max_weight,
+                                             w0=previous if previous is not None else current, lipschitz=lipschitz)
+        else:
+            weights = solve_risk_parity(cov, y0=previous)
+            if weights.max() > max(max_weight, 1.0 / len(h)):
+                weights = project_capped_simplex(weights, max_weight)
+        _cache_put(_solution_cache, key, weights)
+        _cache_put(_solution_cache, (inputs_key, method), weights)
+
+    return {
+        "method": method,
+        "inputs": source,
+        "current_portfolio": _distribution(h["symbol"], value, total),
+        "rebalanced_portfolio": _distribution(h["symbol"], weights * total, total),
+        "trades": trade_list(h, weights, min_trade_value),
+        "expected_return": round(float(weights @ mu) * 100, 2),
+        "volatility": round(float(np.sqrt(max(weights @ cov @ weights, 0.0))) * 100, 2),
+    }
@@ -1,28 +1,233 @@
+"""
+Risk metrics over price histories.
+
+Prices are a matrix of assets x days (oldest first), e.g. loaded with
+load_price_history(), which memory-maps .npy files so a large history is
+paged in as it is read rather than loaded up front. All metrics are
+computed with whole-matrix NumPy ops from one returns matrix: no Python
+loop over assets, users or days.
+
+Annualisation assumes TRADING_DAYS periods a year; Sharpe ratios use
+RISK_FREE_RATE (annual, env, default 6.5%).
+"""
+import os
+
 import numpy as np
 
+from services.holdings_store import to_array
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.065"))
+
+RISKY_ASSETS = ("crypto", "smallcap", "penny")
+
+
 def calculate_diversification(investments):
-    types = [inv["instrument_type"] for inv in investments]
-    score = len(set(types)) / max(len(investments), 1)
+    types = to_array(investments)["instrument_type"]
+    score = len(np.unique(types)) / max(len(types), 1)
     return round(score * 100, 2)  # percentage
 
 def calculate_volatility(history_values):
     if len(history_values) < 2:
         return 0
+    history_values = np.asarray(history_values, dtype=np.float64)
     returns = np.diff(history_values) / history_values[:-1]
     vol = np.std(returns)
     return round(float(vol), 4)
 
 def risk_profile(investments, history_values=None):
-    diversification = calculate_diversification(investments)
-    volatility = calculate_volatility(history_values or [])
+    h = to_array(investments)
+    diversification = calculate_diversification(h)
+    volatility = calculate_volatility(history_values if history_values is not None else [])
 
-    risky_assets = ["crypto", "smallcap", "penny"]
-    risky_weight = sum(
-        inv["current_value"] for inv in investments if inv["instrument_type"] in risky_assets
-    ) / max(sum(inv["current_value"] for inv in investments), 1)
+    # one pass over the value column instead of two generator sums
+    value = h["quantity"] * h["last_price"]
+    risky = np.isin(h["instrument_type"], RISKY_ASSETS)
+    risky_weight = value[risky].sum() / max(value.sum(), 1)
 
     return {
         "diversification_score": diversification,
         "volatility": volatility,
-        "high_risk_weight": round(risky_weight * 100, 2)
-    }
\ No newline at end of file
+        "high_risk_weight": round(float(risky_weight) * 100, 2)
+    }
+
+
+# ---------------- price-history engine ----------------
+
+def load_price_history(path: str, mmap: bool = True) -> np.ndarray:
+    """
+    assets x days matrix from a .npy file, memory-mapped read-only by default.
+    """
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+
+def save_price_history(path: str, prices) -> None:
+    np.save(path, np.asarray(prices, dtype=np.float64))
+
+
+def returns_matrix(prices) -> np.ndarray:
+    """
+    Simple daily returns, assets x (days - 1). A 1-D series is treated as one asset.
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=np.float64))
+    return prices[:, 1:] / prices[:, :-1] - 1.0
+
+
+def annualised_moments(prices, periods: int = TRADING_DAYS):
+    """
+    (mean return, covariance) per year, assets and assets x assets.
+    """
+    R = returns_matrix(prices)
+    mean = R.mean(axis=1)
+    centered = R - mean[:, None]
+    cov = centered @ centered.T / max(R.shape[1] - 1, 1)
+    return mean * periods, cov * periods
+
+
+def max_drawdown(values, axis: int = -1) -> np.ndarray:
+    """
+    Largest peak-to-trough fall along `axis`, as a negative fraction.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    peaks = np.maximum.accumulate(values, axis=axis)
+    return (values / peaks - 1.0).min(axis=axis)
+
+
+def _growth(returns: np.ndarray) -> np.ndarray:
+    # value of 1 invested at the start, with the starting point included
+    growth = np.cumprod(1.0 + returns, axis=-1)
+    ones = np.ones(growth.shape[:-1] + (1,))
+    return np.concatenate([ones, growth], axis=-1)
+
+
+def _sharpe(mean, vol, periods, risk_free):
+    excess = mean * periods - risk_free
+    return np.divide(excess, vol, out=np.zeros_like(np.asarray(excess, dtype=np.float64)), where=vol > 0)
+
+
+def risk_metrics(prices, weights=None, benchmark=None, risk_free: float = RISK_FREE_RATE,
+                 periods: int = TRADING_DAYS) -> dict:
+    """
+    Per-asset and portfolio metrics from one returns matrix.
+
+    prices    : assets x days (ndarray or memmap)
+    weights   : portfolio weights per asset (default: equal weight)
+    benchmark : index price series over the same days, for beta
+
+    Returns a dict of arrays (per asset) and floats (portfolio): volatility,
+    sharpe, max_drawdown, beta (with a benchmark), covariance and the same
+    for the portfolio. Volatilities and covariance are annualised.
+    """
+    prices = np.atleast_2d(prices)
+    R = returns_matrix(prices)
+    n_assets, n_days = R.shape
+    if n_days < 2:
+        raise ValueError("need at least three prices per asset")
+
+    w = np.full(n_assets, 1.0 / n_assets) if weights is None else np.asarray(weights, dtype=np.float64)
+    if w.shape != (n_assets,):
+        raise ValueError(f"expected {n_assets} weights, got {w.shape}")
+
+    mean = R.mean(axis=1)
+    centered = R - mean[:, None]
+    cov = centered @ centered.T / (n_days - 1)
+    vol = np.sqrt(np.diag(cov))
+
+    port_returns = w @ R
+    port_vol = float(np.sqrt(max(w @ cov @ w, 0.0)))
+    port_mean = float(port_returns.mean())
+
+    out = {
+        "mean_return": mean * periods,
+        "volatility": vol * np.sqrt(periods),
+        "covariance": cov * periods,
+        "sharpe": _sharpe(mean, vol * np.sqrt(periods), periods, risk_free),
+        "max_drawdown": max_drawdown(prices, axis=-1),
+        "portfolio": {
+            "mean_return": port_mean * periods,
+            "volatility": float(port_vol * np.sqrt(periods)),
+            "sharpe": float(_sharpe(port_mean, port_vol * np.sqrt(periods), periods, risk_free)),
+            "max_drawdown": float(max_drawdown(_growth(port_returns))),
+        },
+    }
+
+    if benchmark is not None:
+        b = returns_matrix(benchmark)[0]
+        if b.shape[0] != n_days:
+            raise ValueError("benchmark must cover the same days as prices")
+        b = b - b.mean()
+        var_b = b @ b
+        beta = centered @ b / var_b if var_b > 0 else np.zeros(n_assets)
+        out["beta"] = beta
+        out["portfolio"]["beta"] = float(w @ beta)
+
+    return out
+
+
+def _rolling_moments(R: np.ndarray, window: int):
+    """
+    Mean and sample variance of every `window`-day span, from running sums of
+    returns and squared returns, so the cost does not grow with the window.
+    """
+    zeros = np.zeros((R.shape[0], 1))
+    s1 = np.concatenate([zeros, np.cumsum(R, axis=1)], axis=1)
+    s2 = np.concatenate([zeros, np.cumsum(R * R, axis=1)], axis=1)
+    sum1 = s1[:, window:] - s1[:, :-window]
+    sum2 = s2[:, window:] - s2[:, :-window]
+    var = (sum2 - sum1 * sum1 / window) / (window - 1)
+    return sum1 / window, np.maximum(var, 0.0)
+
+
+def rolling_volatility(prices, window: int = 21, periods: int = TRADING_DAYS) -> np.ndarray:
+    """
+    Annualised volatility over every `window`-day span, assets x (days - window).
+    """
+    R = returns_matrix(prices)
+    if R.shape[1] < window:
+        return np.empty((R.shape[0], 0))
+    _, var = _rolling_moments(R, window)
+    return np.sqrt(var * periods)
+
+
+def rolling_sharpe(prices, window: int = 63, risk_free: float = RISK_FREE_RATE,
+                   periods: int = TRADING_DAYS) -> np.ndarray:
+    R = returns_matrix(prices)
+    if R.shape[1] < window:
+        return np.empty((R.shape[0], 0))
+    mean, var = _rolling_moments(R, window)
+    return _sharpe(mean, np.sqrt(var * periods), periods, risk_free)
+
+
+def batch_portfolio_risk(prices, weights, risk_free: float = RISK_FREE_RATE,
+                         periods: int = TRADING_DAYS) -> dict:
+    """
+    Batch mode: many users' portfolios over one shared asset universe.
+
+    prices  : assets x days
+    weights : users x assets (rows are each user's weights; zeros for
+              assets they don't hold)
+
+    Returns arrays with one entry per user: volatility, mean_return, sharpe
+    and max_drawdown. The covariance is computed once and shared by all.
+    """
+    R = returns_matrix(prices)
+    W = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    if W.shape[1] != R.shape[0]:
+        raise ValueError(f"weights have {W.shape[1]} assets, prices have {R.shape[0]}")
+
+    mean = R.mean(axis=1)
+    centered = R - mean[:, None]
+    cov = centered @ centered.T / (R.shape[1] - 1)
+
+    port_mean = W @ mean
+    # w_u' C w_u for every user at once: one matrix product, then a row-wise dot
+    port_var = np.einsum("ua,ua->u", W @ cov, W)
+    port_vol = np.sqrt(np.maximum(port_var, 0.0)) * np.sqrt(periods)
+    port_returns = W @ R
+
+    return {
+        "mean_return": port_mean * periods,
+        "volatility": port_vol,
+        "sharpe": _sharpe(port_mean, port_vol, periods, risk_free),
+        "max_drawdown": max_drawdown(_growth(port_returns), axis=-1),
+    }
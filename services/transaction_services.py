@@ -1,122 +1,336 @@
-from config.database import SessionLocal
+import base64
+import json
+from pydantic import ValidationError
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.orm import Session
+from config.database import use_session
 from models.transaction import Transaction
-from datetime import datetime, timezone
-from sqlalchemy.sql import func
-
-def create_expense(user_id: int, amount: float, payee: str = None, category: str = "miscellenous", raw_description: str = None, is_recurring: bool = False):
-    db = SessionLocal()
-    try: 
-        tx = Transaction(
-            user_id = 1, 
-            type = "expense",
-            amount = amount, 
-            category = category,
-            payee = payee,
-            raw_description = raw_description,
-            # timestamp = datetime.now(timezone.utc),
-            is_recurring = is_recurring
-        )
-        db.add(tx)
-        db.commit()
-        db.refresh(tx)
-        return {"status": "success", "transaction_id": tx.id}
-    except Exception as e:
-        db.rollback()
-        return {"status": "error", "message": str(e)}
-    finally:
-        db.close()
-
-
-def create_income(user_id: int, amount: float, payee: str = None, category: str = "", raw_description: str = None, is_recurring: bool = False):
-    db = SessionLocal()
-    try: 
-        tx = Transaction(
-            user_id = 1, 
-            type = "income",
-            amount = amount, 
-            category = category,
-            payee = payee,
-            raw_description = raw_description,
-            # timestamp = datetime.now(timezone.utc),
-            is_recurring = is_recurring
-        )
-        db.add(tx)
-        db.commit()
-        db.refresh(tx)
-        return {"status": "success", "transaction_id": tx.id}
-    except Exception as e:
-        db.rollback()
-        return {"status": "error", "message": str(e)}
-    finally:
-        db.close()
+from schemas.transaction_schema import TransactionBulkItem
+from services.category_spend_service import add_spend, add_spend_rows, check_budget_thresholds
+from services.forecast_service import forget_forecast_state, record_transaction
+from services.notifications import notify
+from datetime import datetime, time, timedelta, timezone
 
+def create_expense(user_id: int, amount: float, payee: str = None, category: str = "miscellenous", raw_description: str = None, is_recurring: bool = False, db: Session = None):
+    with use_session(db) as db:
+        try: 
+            tx = Transaction(
+                user_id = 1, 
+                type = "expense",
+                amount = amount, 
+                category = category,
+                payee = payee,
+                raw_description = raw_description,
+                timestamp = datetime.now(timezone.utc),
+                is_recurring = is_recurring
+            )
+            record_transaction(tx.user_id, tx.type, tx.amount, tx.timestamp, db)
+            spent = add_spend(tx.user_id, tx.category, tx.timestamp, tx.amount, db)
+            alerts = check_budget_thresholds(tx.user_id, tx.category, tx.timestamp, spent - tx.amount, spent, db)
+            db.add(tx)
+            db.commit()
+            # only after the commit, and without waiting on delivery
+            for event in alerts:
+                notify(event)
+            return {"status": "success", "transaction_id": tx.id}
+        except Exception as e:
+            db.rollback()
+            forget_forecast_state(1)
+            return {"status": "error", "message": str(e)}
 
-def get_transactions(type: str = None, category: str = None): 
-    db = SessionLocal()
-    try: 
-        query = (
-            db.query(Transaction)
-            .filter(Transaction.user_id == 1)
-        )
 
-        if category is not None:  
-            query = query.filter(Transaction.category == category)
-
-        if type is not None: 
-            query = query.filter(Transaction.type == type)
-
-        txs = query.order_by(Transaction.timestamp.desc()).all()
-
-        transaction_list = [
-            {
-                "id": t.id, 
-                "type": t.type,
-                "amount": t.amount,
-                "category": t.category, 
-                "raw_description": t.raw_description,
-                "timestamp": str(t.timestamp),
-                "is_recurring": t.is_recurring
-            }
-            for t in txs
-        ]
-        return {"transaction": transaction_list}
-    
-    except Exception as e:
-        db.rollback()
-        return {"status": "error", "message": str(e)}
-    finally:
-        db.close()
+def create_income(user_id: int, amount: float, payee: str = None, category: str = "", raw_description: str = None, is_recurring: bool = False, db: Session = None):
+    with use_session(db) as db:
+        try: 
+            tx = Transaction(
+                user_id = 1, 
+                type = "income",
+                amount = amount, 
+                category = category,
+                payee = payee,
+                raw_description = raw_description,
+                timestamp = datetime.now(timezone.utc),
+                is_recurring = is_recurring
+            )
+            record_transaction(tx.user_id, tx.type, tx.amount, tx.timestamp, db)
+            db.add(tx)
+            db.commit()
+            return {"status": "success", "transaction_id": tx.id}
+        except Exception as e:
+            db.rollback()
+            forget_forecast_state(1)
+            return {"status": "error", "message": str(e)}
 
 
-def update_transaction( category: str,amount: float, date_str: str, type: str = "expense"):
-    db = SessionLocal()
+TRANSACTION_COLUMNS = ("id", "type", "amount", "category", "payee", "raw_description", "timestamp", "is_recurring")
+DEFAULT_COLUMNS = ("id", "type", "amount", "category", "raw_description", "timestamp", "is_recurring")
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(timestamp, id: int) -> str:
+    raw = json.dumps([timestamp.isoformat() if timestamp else None, id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
     try:
-        target_date = datetime.fromisoformat(date_str).date()
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, id = json.loads(raw)
+        return (datetime.fromisoformat(timestamp) if timestamp else None), int(id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
 
-        tx = (db.query(Transaction).filter(Transaction.user_id == 1, Transaction.category == category, Transaction.type == type,func.date(Transaction.timestamp) == target_date).first())
-        if not tx:
-            return {"status": "error", "message": "Transaction not found"}
-        tx.amount = amount
-        db.commit()
-        return {"status": "success", "transaction_id": tx.id}
-    except Exception as e:
-        db.rollback()
-        return {"status": "error", "message": str(e)}
-    finally:
-        db.close()
-
-
-def delete_transaction(category: str, date_str: str, type: str = "expense"):
-    db = SessionLocal()
-    try: 
-        txn = (db.query(Transaction).filter(Transaction.user_id == 1, Transaction.category == category, Transaction.type == type, func.date(Transaction.timestamp) == date_str).first())
-        if not txn:
-            return {"status": "error", "message": "Transaction not found"}
-        db.delete(txn)
+
+def month_range(period: str):
+    """
+    "2024-03" -> (2024-03-01, 2024-04-01), a half-open range for date filters.
+    """
+    start = datetime.strptime(period, "%Y-%m")
+    end = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start, end
+
+
+def _select_transactions(columns, type=None, category=None, start=None, end=None, cursor=None):
+    """
+    Projects only the requested columns, newest first. Paging is keyset on
+    (timestamp, id), so every page costs the same no matter how deep it is.
+    """
+    unknown = set(columns) - set(TRANSACTION_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown columns: {', '.join(sorted(unknown))}")
+
+    # timestamp and id are always fetched: they make up the cursor
+    selected = list(dict.fromkeys(["timestamp", "id", *columns]))
+    stmt = select(*(getattr(Transaction, c) for c in selected)).where(Transaction.user_id == 1)
+
+    if category is not None:
+        stmt = stmt.where(Transaction.category == category)
+    if type is not None:
+        stmt = stmt.where(Transaction.type == type)
+    if start is not None:
+        stmt = stmt.where(Transaction.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(Transaction.timestamp < end)
+
+    if cursor:
+        ts, id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            Transaction.timestamp < ts,
+            and_(Transaction.timestamp == ts, Transaction.id < id),
+        ))
+
+    return stmt.order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+
+
+def _row_to_dict(row, columns) -> dict:
+    out = {c: row[c] for c in columns}
+    if "timestamp" in out:
+        out["timestamp"] = str(out["timestamp"])
+    return out
+
+
+def get_transactions(type: str = None, category: str = None, start: datetime = None, end: datetime = None,
+                     columns=None, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, db: Session = None):
+    """
+    One page of transactions. Pass the returned `next_cursor` back to get the
+    next page; it is None on the last one.
+    """
+    columns = list(columns or DEFAULT_COLUMNS)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    with use_session(db) as db:
+        try:
+            stmt = _select_transactions(columns, type, category, start, end, cursor)
+            rows = db.execute(stmt.limit(limit + 1)).mappings().all()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+
+            transaction_list = [_row_to_dict(r, columns) for r in rows]
+            return {"transaction": transaction_list, "next_cursor": next_cursor}
+
+        except Exception as e:
+            db.rollback()
+            return {"status": "error", "message": str(e)}
+
+
+def iter_transactions(type: str = None, category: str = None, start: datetime = None, end: datetime = None,
+                      columns=None, batch_size: int = MAX_PAGE_SIZE, db: Session = None):
+    """
+    Yields every matching transaction as a dict, one keyset page at a time,
+    for exports over large ranges.
+    """
+    columns = list(columns or DEFAULT_COLUMNS)
+
+    with use_session(db) as db:
+        cursor = None
+        while True:
+            stmt = _select_transactions(columns, type, category, start, end, cursor)
+            rows = db.execute(stmt.limit(batch_size)).mappings().all()
+
+            for r in rows:
+                yield _row_to_dict(r, columns)
+
+            if len(rows) < batch_size:
+                return
+            cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+
+
+def day_range(date_str: str):
+    """
+    "2024-03-05" -> (2024-03-05 00:00, 2024-03-06 00:00). A half-open range on the
+    raw column keeps the (user_id, category, type, timestamp) index usable,
+    where func.date(timestamp) forced a scan.
+    """
+    start = datetime.combine(datetime.fromisoformat(date_str).date(), time.min)
+    return start, start + timedelta(days=1)
+
+
+def find_transaction_stmt(category: str, date_str: str, type: str = "expense"):
+    start, end = day_range(date_str)
+    return (
+        select(Transaction)
+        .where(
+            Transaction.user_id == 1,
+            Transaction.category == category,
+            Transaction.type == type,
+            Transaction.timestamp >= start,
+            Transaction.timestamp < end,
+        )
+        .limit(1)
+    )
+
+
+def update_transaction( category: str,amount: float, date_str: str, type: str = "expense", db: Session = None):
+    with use_session(db) as db:
+        try:
+            tx = db.execute(find_transaction_stmt(category, date_str, type)).scalar_one_or_none()
+            if not tx:
+                return {"status": "error", "message": "Transaction not found"}
+            if tx.type == "expense":
+                add_spend(tx.user_id, tx.category, tx.timestamp, amount - tx.amount, db, count=0)
+            tx.amount = amount
+            forget_forecast_state(tx.user_id, db)
+            db.commit()
+            return {"status": "success", "transaction_id": tx.id}
+        except Exception as e:
+            db.rollback()
+            return {"status": "error", "message": str(e)}
+
+
+def delete_transaction(category: str, date_str: str, type: str = "expense", db: Session = None):
+    with use_session(db) as db:
+        try: 
+            txn = db.execute(find_transaction_stmt(category, date_str, type)).scalar_one_or_none()
+            if not txn:
+                return {"status": "error", "message": "Transaction not found"}
+            if txn.type == "expense":
+                add_spend(txn.user_id, txn.category, txn.timestamp, -txn.amount, db, count=-1)
+            db.delete(txn)
+            forget_forecast_state(txn.user_id, db)
+            db.commit()
+            return {"status": "success", "transaction_id": txn.id}
+        except Exception as e:
+            db.rollback()
+            return {"status": "error", "message": str(e)}
+
+
+BULK_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors())
+
+
+def _insert_chunk(db: Session, chunk: list, errors: list) -> int:
+    """
+    One multi-row INSERT and one commit for the chunk. If the chunk is rejected,
+    fall back to row-by-row inserts so only the bad rows are reported.
+    """
+    table = Transaction.__table__
+    try:
+        rows = [values for _, values in chunk]
+        db.execute(insert(table), rows)
+        add_spend_rows(rows, db)
         db.commit()
-        return {"status": "success", "transaction_id": txn.id}
-    except Exception as e:
+        return len(chunk)
+    except Exception:
         db.rollback()
-        return {"status": "error", "message": str(e)}
-    finally: 
-        db.close()
\ No newline at end of file
+
+    inserted = 0
+    for index, values in chunk:
+        try:
+            db.execute(insert(table), [values])
+            add_spend_rows([values], db)
+            db.commit()
+            inserted += 1
+        except Exception as e:
+            db.rollback()
+            errors.append({"row": index, "message": str(e.__cause__ or e)})
+    return inserted
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    """
+    Imported timestamps in UTC, as the rest of the table is. Naive ones are
+    taken to be UTC already.
+    """
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def bulk_create_transactions(rows, user_id: int = 1, chunk_size: int = BULK_CHUNK_SIZE, start_index: int = 0, db: Session = None):
+    """
+    Validate rows (dicts shaped like TransactionBulkItem) and insert them in
+    chunks of `chunk_size`. `rows` may be any iterable, so callers can stream.
+    Row numbers in the error report start at `start_index`.
+    """
+    inserted = 0
+    errors = []
+    now = datetime.now(timezone.utc)
+
+    with use_session(db) as db:
+        chunk = []
+        for index, row in enumerate(rows, start=start_index):
+            if not isinstance(row, dict):
+                errors.append({"row": index, "message": "not a valid JSON object"})
+                continue
+            try:
+                item = TransactionBulkItem.model_validate(row)
+            except ValidationError as e:
+                errors.append({"row": index, "message": _validation_message(e)})
+                continue
+
+            chunk.append((index, {
+                "user_id": user_id,
+                "type": item.type,
+                "amount": item.amount,
+                "category": item.category or "miscellaneous",
+                "payee": item.payee,
+                "raw_description": item.raw_description,
+                "timestamp": _as_utc(item.timestamp) if item.timestamp else now,
+                "is_recurring": item.is_recurring,
+            }))
+            if len(chunk) >= chunk_size:
+                inserted += _insert_chunk(db, chunk, errors)
+                chunk = []
+
+        if chunk:
+            inserted += _insert_chunk(db, chunk, errors)
+
+        if inserted:
+            # imports are usually backdated; rebuild the forecast on next read
+            forget_forecast_state(user_id, db)
+            db.commit()
+
+    return {
+        "status": "success" if not errors else "partial" if inserted else "error",
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+    }
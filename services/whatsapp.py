@@ -0,0 +1,37 @@
+import os
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TWILIO_WHATSAPP_FROM = os.getenv("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
+
+
+@lru_cache(maxsize=1)
+def _get_client(account_sid: str, auth_token: str):
+    from twilio.rest import Client
+
+    return Client(account_sid, auth_token)
+
+
+def send_whatsapp(to: str, content_sid: str = None, body: str = None, media_url: list = None) -> str:
+    """
+    Send a WhatsApp message through Twilio, either a pre-approved content
+    template (content_sid) or a free-form body. Returns the message SID.
+    """
+    account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+
+    if not account_sid or not auth_token:
+        raise ValueError("Twilio credentials are not set in the environment variables.")
+
+    message = {"from_": TWILIO_WHATSAPP_FROM, "to": to}
+    if content_sid:
+        message["content_sid"] = content_sid
+    if body:
+        message["body"] = body
+    if media_url:
+        message["media_url"] = media_url
+
+    return _get_client(account_sid, auth_token).messages.create(**message).sid
@@ -1,7 +1,5 @@
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from sklearn.linear_model import LinearRegression
 
 
 # ----------MATH BASED---------------
@@ -85,79 +83,341 @@ from sklearn.linear_model import LinearRegression
 
 
 # -----------HYBRID------------------
-def forecast_variable_expenses(expenses_df):
+# Daily variable spend = EMA of daily totals (smooths short-term fluctuations)
+# + least-squares trend (captures a rising/falling pattern). Both have closed
+# forms, so all users are computed together from per-user sums.
+
+EMA_ALPHA = 0.4
+TREND_OFFSET_DAYS = 15   # mid-month projection
+
+VARIABLE_FORECAST_DTYPE = [
+    ("ema", np.float64),
+    ("trend", np.float64),
+    ("daily_projection", np.float64),
+    ("days", np.int64),
+]
+
+
+def forecast_variable_expenses_batch(
+    expenses_df,
+    alpha=EMA_ALPHA,
+    fill_missing=False,
+    user_col="user_id",
+    date_col="date",
+    amount_col="amount"
+):
     """
-    Returns projected daily variable spend based on:
-    - EMA (smooths short-term fluctuations)
-    - Trend via linear regression (captures rising/falling pattern)
+    Projected daily variable spend for every user in a long-format frame.
+
+    Parameters:
+    ----------
+    expenses_df : DataFrame with columns [user_col, date_col, amount_col]
+    alpha : EMA smoothing factor (same weights as pandas ewm(alpha).mean())
+    fill_missing : count days without spend as zero-spend days; by default
+                   only days with spend are points in the series
+
+    Returns:
+    --------
+    structured array, one row per user (sorted by user id):
+    user_id, ema, trend (change per day), daily_projection, days
     """
+    # pandas is only needed by the batch entry points, not by IncrementalForecast on the write path
+    import pandas as pd
+
+    codes, users = pd.factorize(expenses_df[user_col], sort=True)
+    users = np.asarray(users)
+    n_users = len(users)
+    result = np.zeros(n_users, dtype=[("user_id", users.dtype)] + VARIABLE_FORECAST_DTYPE)
+    result["user_id"] = users
+    if n_users == 0:
+        return result
+
+    day = pd.to_datetime(expenses_df[date_col]).to_numpy().astype("datetime64[D]").astype(np.int64)
+    amount = expenses_df[amount_col].to_numpy(dtype=np.float64)
+
+    # daily totals per (user, day)
+    order = np.lexsort((day, codes))
+    codes, day, amount = codes[order], day[order], amount[order]
+    first = np.r_[True, (codes[1:] != codes[:-1]) | (day[1:] != day[:-1])]
+    starts = np.flatnonzero(first)
+    y = np.add.reduceat(amount, starts)
+    user, day = codes[starts], day[starts]
+
+    # t = position of each point in its user's series
+    user_start = np.flatnonzero(np.r_[True, user[1:] != user[:-1]])
+    if fill_missing:
+        t = (day - day[user_start][user]).astype(np.float64)
+    else:
+        t = (np.arange(len(user)) - user_start[user]).astype(np.float64)
+
+    last_t = np.zeros(n_users)
+    np.maximum.at(last_t, user, t)
+
+    if fill_missing:
+        n = last_t + 1
+        sum_t = last_t * n / 2
+        sum_tt = last_t * n * (2 * last_t + 1) / 6
+    else:
+        n = np.bincount(user, minlength=n_users).astype(np.float64)
+        sum_t = np.bincount(user, weights=t, minlength=n_users)
+        sum_tt = np.bincount(user, weights=t * t, minlength=n_users)
+    sum_y = np.bincount(user, weights=y, minlength=n_users)
+    sum_ty = np.bincount(user, weights=t * y, minlength=n_users)
+
+    # EMA (adjust=True): sum((1-a)^(T-t) * y) / sum((1-a)^(T-t)); zero days add only to the denominator
+    w = (1 - alpha) ** (last_t[user] - t)
+    ema_num = np.bincount(user, weights=w * y, minlength=n_users)
+    if fill_missing:
+        ema_den = (1 - (1 - alpha) ** n) / alpha
+    else:
+        ema_den = np.bincount(user, weights=w, minlength=n_users)
+    ema = ema_num / ema_den
+
+    # OLS slope; a single point has no trend
+    denom = n * sum_tt - sum_t * sum_t
+    trend = np.divide(n * sum_ty - sum_t * sum_y, denom, out=np.zeros(n_users), where=denom > 0)
+
+    result["ema"] = ema
+    result["trend"] = trend
+    result["daily_projection"] = np.maximum(ema + trend * TREND_OFFSET_DAYS, 0)
+    result["days"] = n.astype(np.int64)
+    return result
+
+
+def forecast_variable_expenses(expenses_df, fill_missing=False):
+    """
+    Returns projected daily variable spend for one user's expenses
+    (columns "date", "amount").
+    """
+    import pandas as pd
 
-    # Daily total spending
-    daily = expenses_df.groupby("date")["amount"].sum().reset_index()
-    daily.sort_values("date", inplace=True)
+    if len(expenses_df) == 0:
+        return 0.0
 
-    # --- EMA ---
-    ema = daily["amount"].ewm(alpha=0.4).mean().iloc[-1]
+    single = pd.DataFrame({
+        "user_id": 0,
+        "date": expenses_df["date"].to_numpy(),
+        "amount": expenses_df["amount"].to_numpy(),
+    })
+    return float(forecast_variable_expenses_batch(single, fill_missing=fill_missing)["daily_projection"][0])
 
-    # --- Trend (Linear Regression) ---
-    daily["t"] = np.arange(len(daily))
-    model = LinearRegression()
-    model.fit(daily[["t"]], daily["amount"])
-    trend = model.coef_[0]   # daily change
 
-    # Final estimated daily variable cost for next 30 days
-    daily_proj = ema + trend * 15   # mid-month projection
+# -----------VECTORIZED ENGINE------------------
+# Scheduled flows (salary, EMIs, SIPs) are summed into a per-user
+# day-of-month table with np.add.at, then gathered by each horizon day's
+# day-of-month. Balances are a cumsum, so a batch is O(users x days) in NumPy.
 
-    return float(max(daily_proj, 0))
+def horizon_dates(horizon: int = 30, start=None) -> np.ndarray:
+    start = np.datetime64(datetime.today().date() if start is None else start, "D")
+    return start + np.arange(horizon)
 
 
-def forecast_cashflow_next_month(
+def day_of_month(dates: np.ndarray) -> np.ndarray:
+    return (dates - dates.astype("datetime64[M]")).astype(int) + 1
+
+
+def scheduled_by_day(n_users: int, user_idx, day, amount, dtype=np.float64) -> np.ndarray:
+    """
+    (n_users, 32) table: column d holds each user's total flow due on day d.
+    A day the month doesn't have (e.g. 31) never matches, as before.
+    """
+    table = np.zeros((n_users, 32), dtype=dtype)
+    if len(amount):
+        np.add.at(table, (np.asarray(user_idx), np.asarray(day)), np.asarray(amount, dtype=dtype))
+    return table
+
+
+def forecast_cashflow_batch(
+    starting_balance,
+    inflows=None,
+    outflows=None,
+    daily_variable=None,
+    horizon: int = 30,
+    start=None,
+    return_flows: bool = False,
+    dtype=np.float64
+):
+    """
+    Forecasts daily balances for many users at once.
+
+    Parameters:
+    ----------
+    starting_balance : array (n_users,)
+    inflows, outflows : (user_idx, day_of_month, amount) arrays, one entry per
+                        scheduled flow (salaries; EMIs and SIPs)
+    daily_variable : array (n_users,) projected variable spend per day
+    horizon : number of days to forecast (30, 90, 365, ...)
+
+    Returns:
+    --------
+    dict with "date" (horizon,) and "balance" (n_users, horizon); plus
+    "inflow" and "outflow" of the same shape when return_flows is set
+    """
+    balance0 = np.asarray(starting_balance, dtype=dtype)
+    n_users = len(balance0)
+    empty = (np.empty(0, int), np.empty(0, int), np.empty(0, dtype))
+
+    dates = horizon_dates(horizon, start)
+    dom = day_of_month(dates)
+
+    inflow_by_day = scheduled_by_day(n_users, *(inflows or empty), dtype=dtype)
+    outflow_by_day = scheduled_by_day(n_users, *(outflows or empty), dtype=dtype)
+    variable = np.zeros(n_users, dtype=dtype) if daily_variable is None else np.asarray(daily_variable, dtype=dtype)
+
+    result = {"date": dates}
+    if return_flows:
+        result["inflow"] = inflow_by_day[:, dom]
+        result["outflow"] = outflow_by_day[:, dom] + variable[:, None]
+        net = result["inflow"] - result["outflow"]
+    else:
+        # one (users x days) buffer: net flow, then cumsum'd in place
+        inflow_by_day -= outflow_by_day
+        net = inflow_by_day[:, dom]
+        net -= variable[:, None]
+
+    np.cumsum(net, axis=1, out=net)
+    net += balance0[:, None]
+    result["balance"] = net
+    return result
+
+
+def _schedule(items, day_key, amount_key):
+    day = np.array([item[day_key] for item in items], dtype=int)
+    amount = np.array([item[amount_key] for item in items], dtype=float)
+    return np.zeros(len(items), dtype=int), day, amount
+
+
+def forecast_cashflow(
     expenses_df,
     income_streams,
     investments,
     loans,
     budget,
-    starting_balance
+    starting_balance,
+    horizon=30,
+    start=None
 ):
-
-    today = datetime.today().date()
-    next_30 = [today + timedelta(days=i) for i in range(30)]
-
-    df = pd.DataFrame({
-        "date": next_30,
-        "inflow": 0.0,
-        "outflow": 0.0
+    """
+    Single-user forecast over `horizon` days.
+    Returns a DataFrame with date, inflow, outflow, balance.
+    """
+    import pandas as pd
+
+    outflows = [
+        np.concatenate(parts)
+        for parts in zip(_schedule(loans, "due_day", "emi"), _schedule(investments, "day", "amount"))
+    ]
+
+    forecast = forecast_cashflow_batch(
+        starting_balance=[starting_balance],
+        inflows=_schedule(income_streams, "credit_day", "amount"),
+        outflows=outflows,
+        daily_variable=[forecast_variable_expenses(expenses_df)],
+        horizon=horizon,
+        start=start,
+        return_flows=True
+    )
+
+    return pd.DataFrame({
+        "date": forecast["date"].astype(object),
+        "inflow": forecast["inflow"][0],
+        "outflow": forecast["outflow"][0],
+        "balance": forecast["balance"][0],
     })
 
 
-    # FIXED INFLOWS (salary etc.)
-    for inc in income_streams:
-        for i, row in df.iterrows():
-            if row["date"].day == inc["credit_day"]:
-                df.loc[i, "inflow"] += inc["amount"]
-
-    # FIXED EXPENSES (EMI, SIP)
-    for loan in loans:
-        for i, row in df.iterrows():
-            if row["date"].day == loan["due_day"]:
-                df.loc[i, "outflow"] += loan["emi"]
+def forecast_cashflow_next_month(
+    expenses_df,
+    income_streams,
+    investments,
+    loans,
+    budget,
+    starting_balance
+):
+    return forecast_cashflow(expenses_df, income_streams, investments, loans, budget, starting_balance, horizon=30)
 
-    for inv in investments:
-        for i, row in df.iterrows():
-            if row["date"].day == inv["day"]:
-                df.loc[i, "outflow"] += inv["amount"]
 
-    # VARIABLE EXPENSE FORECAST
-    daily_var_spend = forecast_variable_expenses(expenses_df)
-    df["outflow"] += daily_var_spend
+# -----------INCREMENTAL STATE------------------
+# The same EMA + trend as forecast_variable_expenses, kept as running sums so
+# each new transaction is O(1) and a projection never rescans history.
 
-    # RUNNING BALANCE
-    bal = starting_balance
-    balances = []
+class IncrementalForecast:
+    """
+    Per-user running forecast state.
 
-    for _, row in df.iterrows():
-        bal = bal + row["inflow"] - row["outflow"]
-        balances.append(bal)
+    Closed days are folded into the EMA (numerator/denominator) and the trend's
+    sufficient statistics (n, Σt, Σt², Σy, Σty); the current day's total stays
+    open until a later day arrives. `balance` is the running account balance.
+    """
 
-    df["balance"] = balances
-    return df
\ No newline at end of file
+    FIELDS = ("day", "day_total", "n", "ema_num", "ema_den", "sum_t", "sum_tt", "sum_y", "sum_ty", "balance")
+
+    def __init__(self, balance: float = 0.0, alpha: float = EMA_ALPHA, **fields):
+        self.alpha = alpha
+        self.day = None          # ordinal of the open day
+        self.day_total = 0.0
+        self.n = 0
+        self.ema_num = 0.0
+        self.ema_den = 0.0
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        self.sum_y = 0.0
+        self.sum_ty = 0.0
+        self.balance = balance
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def _fold(self, y: float):
+        t = self.n
+        decay = 1 - self.alpha
+        self.ema_num = self.ema_num * decay + y
+        self.ema_den = self.ema_den * decay + 1
+        self.sum_t += t
+        self.sum_tt += t * t
+        self.sum_y += y
+        self.sum_ty += t * y
+        self.n += 1
+
+    def add_expense(self, amount: float, day: int) -> bool:
+        """
+        Adds an expense on `day` (date ordinal). Returns False for a day before
+        the open one: the running sums can't absorb it, so the caller rebuilds.
+        """
+        self.balance -= amount
+        if self.day is None:
+            self.day, self.day_total = day, amount
+        elif day == self.day:
+            self.day_total += amount
+        elif day > self.day:
+            self._fold(self.day_total)
+            self.day, self.day_total = day, amount
+        else:
+            return False
+        return True
+
+    def add_income(self, amount: float):
+        self.balance += amount
+
+    def daily_projection(self) -> float:
+        """
+        Projected daily variable spend, with the open day as the latest point.
+        """
+        if self.day is None:
+            return 0.0
+
+        t, y = self.n, self.day_total
+        decay = 1 - self.alpha
+        n = self.n + 1
+        sum_t, sum_tt = self.sum_t + t, self.sum_tt + t * t
+        sum_y, sum_ty = self.sum_y + y, self.sum_ty + t * y
+
+        ema = (self.ema_num * decay + y) / (self.ema_den * decay + 1)
+        denom = n * sum_tt - sum_t * sum_t
+        trend = (n * sum_ty - sum_t * sum_y) / denom if denom > 0 else 0.0
+        return max(ema + trend * TREND_OFFSET_DAYS, 0.0)
+
+    def project_balance(self, days: int) -> float:
+        return self.balance - self.daily_projection() * days
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
@@ -0,0 +1,47 @@
+"""
+Budget months.
+
+Budgets, the monthly spend aggregate and threshold alerts all bucket by the
+calendar month in one timezone, so an expense logged at 00:30 IST on the 1st
+counts toward the new month's budget, not the previous one.
+
+Settings (env):
+    BUDGET_TIMEZONE     IANA zone for budget months (default Asia/Kolkata)
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+BUDGET_TIMEZONE = os.getenv("BUDGET_TIMEZONE", "Asia/Kolkata")
+BUDGET_TZ = ZoneInfo(BUDGET_TIMEZONE)
+
+
+def now() -> datetime:
+    return datetime.now(BUDGET_TZ)
+
+
+def current_period() -> str:
+    return now().strftime("%Y-%m")
+
+
+def next_period() -> str:
+    return (now().replace(day=1) + timedelta(days=32)).strftime("%Y-%m")
+
+
+def period_of(timestamp=None) -> str:
+    """
+    YYYY-MM of a timestamp in the budget timezone. Naive timestamps are UTC,
+    as the stored transaction timestamps are.
+    """
+    if timestamp is None:
+        return current_period()
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(BUDGET_TZ).strftime("%Y-%m")
+
+
+def utc_offset_minutes() -> int:
+    """
+    The zone's current UTC offset, for databases without named time zones.
+    """
+    return int(now().utcoffset().total_seconds() // 60)